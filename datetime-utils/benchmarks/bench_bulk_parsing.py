@@ -0,0 +1,60 @@
+"""
+Benchmark: iso_strings_to_datetimes() vs iso_string_to_datetime() in a loop, for
+ columns of ISO 8601 strings with a "Z" suffix, a "+01:00" offset and no offset.
+
+Run it with:
+    $ make benchmark
+or:
+    $ python benchmarks/bench_bulk_parsing.py --n-values 1000000
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+
+import datetime_utils
+
+
+def _time(fn, *args, n_repeats: int = 3) -> float:
+    # The best of n_repeats runs, in seconds.
+    best = float("inf")
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _loop(values: list[str]) -> list[datetime]:
+    return [datetime_utils.iso_string_to_datetime(x) for x in values]
+
+
+def main(n_values: int, n_repeats: int) -> None:
+    start = datetime(2024, 2, 6, 17, 20, 32, 123000)
+    print(f"n_values: {n_values}, python: {sys.version.split()[0]}")
+    for suffix in ("Z", "+01:00", ""):
+        values = [
+            (start + timedelta(seconds=i)).isoformat() + suffix for i in range(n_values)
+        ]
+        print(f"\n{values[0]}")
+        bulk = _time(
+            datetime_utils.iso_strings_to_datetimes, values, n_repeats=n_repeats
+        )
+        print(f"  {'iso_strings_to_datetimes':<36} {bulk * 1000:>10.1f} ms")
+        try:
+            loop = _time(_loop, values, n_repeats=n_repeats)
+        except ValueError:
+            # Fi. the "Z" suffix, not accepted by fromisoformat() on Python 3.10.
+            print(f"  {'iso_string_to_datetime (loop)':<36} {'n/a':>10}")
+            continue
+        print(f"  {'iso_string_to_datetime (loop)':<36} {loop * 1000:>10.1f} ms")
+        print(f"  speedup: {loop / bulk:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-values", type=int, default=1_000_000)
+    parser.add_argument("--n-repeats", type=int, default=3)
+    args = parser.parse_args()
+    main(args.n_values, args.n_repeats)
@@ -1 +1,2 @@
+from .bulk_parsing import *
 from .datetime_utils import *
@@ -0,0 +1,402 @@
+"""
+** DATETIME UTILS: BULK PARSING **
+==================================
+Parse a whole column of ISO 8601 strings (fi. timestamps from a DB export or an
+ API) at once, faster than iso_string_to_datetime() in a loop (see
+ benchmarks/bench_bulk_parsing.py); invalid strings are reported instead of raising.
+The output can be a NumPy datetime64 array (optional extra: pip install
+ "datetime-utils[numpy]").
+
+```py
+import datetime_utils
+
+result = datetime_utils.iso_strings_to_datetimes(
+    ["2024-02-06T17:20:32Z", "2024-02-06T17:21:05Z", "xxx", None]
+)
+result.values
+>>> [datetime(2024, 2, 6, 17, 20, 32, tzinfo=timezone.utc), ..., None, None]
+result.invalid_positions
+>>> [2]
+```
+"""
+
+import functools
+import importlib
+import itertools
+import operator
+import re
+import warnings
+from collections import Counter
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Iterable, NamedTuple
+
+try:
+    # NumPy is an optional extra: pip install "datetime-utils[numpy]".
+    np = importlib.import_module("numpy")
+except ImportError:
+    np = None
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "ParsedDatetimes",
+    "iso_strings_to_datetimes",
+]
+
+# The max number of strings used to detect the dominant format of a column.
+_SAMPLE_SIZE = 1000
+
+# The number of strings parsed in bulk (see _parse_chunk_fast()).
+_CHUNK_SIZE = 4096
+
+_TZINFO_GETTER = operator.attrgetter("tzinfo")
+
+# The shape of a string, to detect the dominant format: fi. "2024-02-06T17:20:32Z"
+#  -> "0000-00-00T00:00:00Z".
+_DIGITS_TO_ZERO = str.maketrans("123456789", "000000000")
+_SHAPE_REGEX = re.compile(
+    r"0000-00-00(?:[Tt ]00(?::00(?::00(?:[.,]0+)?)?)?(?P<offset>[Zz]|[+-]00(?::?00)?)?)?"
+)
+
+# Any ISO 8601 string (in the extended format), for the strings that do not match
+#  the dominant format of a column.
+_ISO_REGEX = re.compile(
+    r"(\d{4})-(\d\d)-(\d\d)"
+    r"(?:[Tt ](\d\d)(?::(\d\d)(?::(\d\d)(?:[.,](\d+))?)?)?([Zz]|[+-]\d\d(?::?\d\d)?)?)?"
+)
+_OFFSET_REGEX = re.compile(r"([+-])(\d\d):?(\d\d)?")
+
+
+class ParsedDatetimes(NamedTuple):
+    """
+    The result of iso_strings_to_datetimes().
+
+    Args:
+        values: a list of datetimes, or a NumPy datetime64 array; None (or NaT)
+         for the invalid and the None strings.
+        invalid_positions: the indexes of the invalid strings.
+    """
+
+    values: list[datetime | None] | Any
+    invalid_positions: list[int]
+
+
+@functools.cache
+def _get_timezone(minutes: int) -> tzinfo:
+    # Shared tzinfo objects (there are at most 2879 valid offsets), instead of a new
+    #  one for every datetime.
+    if minutes == 0:
+        return timezone.utc
+    return timezone(timedelta(minutes=minutes))
+
+
+def _parse_offset(text: str) -> int | None:
+    # A UTC offset (fi. "Z", "+01:00", "-0530", "+01") in minutes, None if invalid.
+    if text in ("Z", "z"):
+        return 0
+    match = _OFFSET_REGEX.fullmatch(text)
+    if match is None:
+        return None
+    sign, hours, minutes = match.groups()
+    minutes = int(minutes or 0)
+    if minutes >= 60:
+        return None
+    minutes += int(hours) * 60
+    if minutes >= 24 * 60:
+        return None
+    return -minutes if sign == "-" else minutes
+
+
+def _parse_iso_string(text: str) -> datetime | None:
+    # The slow path: any ISO 8601 string (with a fraction of any length, a "Z"
+    #  suffix, ...), on any Python version. None if invalid.
+    match = _ISO_REGEX.fullmatch(text)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    tz = None
+    if offset is not None:
+        minutes = _parse_offset(offset)
+        if minutes is None:
+            return None
+        tz = _get_timezone(minutes)
+    try:
+        return datetime(
+            int(year),
+            int(month),
+            int(day),
+            int(hour or 0),
+            int(minute or 0),
+            int(second or 0),
+            int((fraction or "0")[:6].ljust(6, "0")),
+            tz,
+        )
+    except ValueError:
+        return None
+
+
+def _get_offset(suffix: str, cache: dict) -> tuple[tzinfo, int] | None:
+    # An offset suffix (fi. "Z", "+0100") -> the shared tzinfo and the offset in
+    #  minutes. Only the valid suffixes are cached, so the cache stays small.
+    entry = cache.get(suffix)
+    if entry is None:
+        minutes = _parse_offset(suffix)
+        if minutes is None:
+            return None
+        entry = cache[suffix] = (_get_timezone(minutes), minutes)
+    return entry
+
+
+def _parse_fast(text: str, local_length: int, offsets: dict) -> datetime | None:
+    # The fast path, for the strings in the dominant format: the date and time are
+    #  parsed in C by datetime.fromisoformat(), and the offset suffix (if any) is
+    #  looked up in the cache. None if invalid.
+    try:
+        value = datetime.fromisoformat(text[:local_length])
+    except ValueError:
+        return None
+    if local_length == len(text):
+        return value
+    entry = _get_offset(text[local_length:], offsets)
+    if entry is None or value.tzinfo is not None:
+        return None
+    # Note: datetime.combine() attaches the shared tzinfo 3x faster than
+    #  datetime.replace() (and fromisoformat() would create a new tzinfo).
+    return datetime.combine(value, value.time(), entry[0])
+
+
+def _detect_format(values: list) -> tuple[int, int] | None:
+    # The dominant format of a column, as (the length of the strings, the length of
+    #  the date and time part before the offset), detected on a sample. None if the
+    #  fast path does not give the same results of the slow path on the sample
+    #  (fi. a fraction of 1 digit, not accepted by fromisoformat() on Python 3.10).
+    step = max(1, len(values) // _SAMPLE_SIZE)
+    sample = [x for x in values[::step] if isinstance(x, str)]
+    shapes = Counter(x.translate(_DIGITS_TO_ZERO) for x in sample)
+    if not shapes:
+        return None
+    shape = shapes.most_common(1)[0][0]
+    match = _SHAPE_REGEX.fullmatch(shape)
+    if match is None:
+        return None
+    local_length = match.start("offset") if match["offset"] else len(shape)
+
+    offsets = dict()
+    for text in sample:
+        if text.translate(_DIGITS_TO_ZERO) != shape:
+            continue
+        value = _parse_fast(text, local_length, offsets)
+        expected = _parse_iso_string(text)
+        if value is None and expected is None:
+            # An invalid string (fi. the month 13).
+            continue
+        if (
+            value is None
+            or expected is None
+            or value != expected
+            or value.utcoffset() != expected.utcoffset()
+        ):
+            return None
+    return len(shape), local_length
+
+
+def _parse_chunk_fast(
+    chunk: list, fmt: tuple[int, int], offsets: dict
+) -> tuple[list[str], list[datetime], tuple[tzinfo, int] | None] | None:
+    # A chunk where all the strings are in the dominant format, with the same offset
+    #  suffix (the common case), is parsed in bulk with the loops in C (map()):
+    #  the date and time parts (text), their naive datetimes and the offset (None
+    #  for a format without offset). None if any string is not in that format.
+    length, local_length = fmt
+    try:
+        if set(map(len, chunk)) != {length}:
+            return None
+        entry = None
+        local_texts = chunk
+        if local_length != length:
+            suffixes = {text[local_length:] for text in chunk}
+            if len(suffixes) != 1:
+                return None
+            entry = _get_offset(suffixes.pop(), offsets)
+            if entry is None:
+                return None
+            local_texts = [text[:local_length] for text in chunk]
+        values = list(map(datetime.fromisoformat, local_texts))
+    except (TypeError, ValueError):
+        # Fi. a None, an invalid string or a string that is not a str.
+        return None
+    if any(map(_TZINFO_GETTER, values)):
+        return None
+    return local_texts, values, entry
+
+
+def _parse_chunk_whole(chunk: list, fmt: tuple[int, int]) -> list[datetime] | None:
+    # A chunk where all the strings have the length of the dominant format is
+    #  parsed in bulk by fromisoformat() on the whole strings, which is faster
+    #  than slicing them in _parse_chunk_fast() (and, on Python 3.11+, it returns the
+    #  timezone.utc singleton for "Z" and "+00:00"; the other tzinfo objects are not
+    #  shared, as attaching a shared one would take longer than the parsing). None
+    #  if any string is not valid (fi. "z", or "Z" on Python 3.10).
+    try:
+        if set(map(len, chunk)) != {fmt[0]}:
+            return None
+        return list(map(datetime.fromisoformat, chunk))
+    except (TypeError, ValueError):
+        # Fi. a None, an invalid string or a string that is not a str.
+        return None
+
+
+def _parse_chunk_slow(
+    chunk: list,
+    start: int,
+    fmt: tuple[int, int] | None,
+    offsets: dict,
+    invalid_positions: list[int],
+) -> list[datetime | None]:
+    # One string at a time: the fast path for the strings in the dominant format,
+    #  the regex for the others.
+    length, local_length = fmt or (None, None)
+    results = []
+    for i, text in enumerate(chunk, start):
+        value = None
+        if text is None:
+            results.append(None)
+            continue
+        if isinstance(text, str) and len(text) == length:
+            value = _parse_fast(text, local_length, offsets)
+        if value is None:
+            value = _parse_iso_string(text) if isinstance(text, str) else None
+            if value is None:
+                invalid_positions.append(i)
+        results.append(value)
+    return results
+
+
+def _to_list(values: list, fmt: tuple[int, int] | None) -> ParsedDatetimes:
+    offsets = dict()
+    results = []
+    invalid_positions = []
+    # Disabled as soon as fromisoformat() rejects a chunk that _parse_chunk_fast()
+    #  accepts (so that a format not supported by fromisoformat() is tried once).
+    use_whole = bool(fmt)
+    for start in range(0, len(values), _CHUNK_SIZE):
+        chunk = values[start : start + _CHUNK_SIZE]
+        if use_whole:
+            chunk_values = _parse_chunk_whole(chunk, fmt)
+            if chunk_values is not None:
+                results += chunk_values
+                continue
+        parsed = _parse_chunk_fast(chunk, fmt, offsets) if fmt else None
+        if parsed is None:
+            results += _parse_chunk_slow(chunk, start, fmt, offsets, invalid_positions)
+            continue
+        use_whole = False
+        _, chunk_values, entry = parsed
+        if entry is not None:
+            # Note: datetime.combine() attaches the shared tzinfo 3x faster than
+            #  datetime.replace().
+            chunk_values = map(
+                datetime.combine,
+                chunk_values,
+                map(datetime.time, chunk_values),
+                itertools.repeat(entry[0]),
+            )
+        results += chunk_values
+    return ParsedDatetimes(results, invalid_positions)
+
+
+def _to_utc_naive(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _to_ndarray(values: list, fmt: tuple[int, int] | None) -> ParsedDatetimes:
+    # The date and time parts (as text) are converted to datetime64 in bulk, in C,
+    #  by NumPy, and then shifted by the offset.
+    offsets = dict()
+    arrays = []
+    invalid_positions = []
+    for start in range(0, len(values), _CHUNK_SIZE):
+        chunk = values[start : start + _CHUNK_SIZE]
+        parsed = _parse_chunk_fast(chunk, fmt, offsets) if fmt else None
+        if parsed is not None:
+            local_texts, _, entry = parsed
+            try:
+                # Note: NumPy warns about the timezones before failing on some
+                #  texts (fi. with a comma fraction), that go to the slow path.
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", UserWarning)
+                    array = np.array(local_texts, dtype="datetime64[us]")
+            except ValueError:
+                # A text accepted by fromisoformat() but not by NumPy.
+                parsed = None
+            else:
+                if entry is not None:
+                    array -= np.timedelta64(entry[1], "m")
+        if parsed is None:
+            chunk_values = _parse_chunk_slow(
+                chunk, start, fmt, offsets, invalid_positions
+            )
+            array = np.array(
+                [_to_utc_naive(x) for x in chunk_values], dtype="datetime64[us]"
+            )
+        arrays.append(array)
+    if not arrays:
+        return ParsedDatetimes(np.empty(0, dtype="datetime64[us]"), invalid_positions)
+    return ParsedDatetimes(np.concatenate(arrays), invalid_positions)
+
+
+def iso_strings_to_datetimes(
+    values: Iterable[str | None], as_ndarray: bool = False
+) -> ParsedDatetimes:
+    """
+    Parse many ISO 8601 strings at once, like iso_string_to_datetime() in a loop,
+     but without raising for the invalid strings.
+
+    The dominant format of the strings (fi. "2024-02-06T17:20:32.123+01:00") is
+     detected once on a sample: chunks of strings in that format are parsed in
+     bulk (the date and time parsed in C by datetime.fromisoformat(), and the UTC
+     offset looked up in a cache), while the other strings are parsed one at a
+     time. When fromisoformat() accepts the whole strings (fi. "+01:00", and "Z" on
+     Python 3.11+), the chunks are parsed by it on the whole strings instead,
+     which is faster.
+    The tzinfo objects are shared by all the datetimes with the same offset only
+     when the offset is parsed separately (fi. "Z" on Python 3.10, and the slow
+     path) and for UTC on Python 3.11+.
+    Compared to iso_string_to_datetime(), it also accepts the "Z" suffix and
+     fractions of any length on Python 3.10.
+
+    Args:
+        values: ISO 8601 strings, like "2024-02-06", "2024-02-06T17:20:32" or
+         "2024-02-06 17:20:32.123456Z"; None values are kept as None (and they are
+         not invalid).
+        as_ndarray: True to return a NumPy datetime64[us] array (requires the extra:
+         pip install datetime-utils[numpy]); datetime64 has no timezone, so aware
+         datetimes are converted to UTC, and invalid strings are NaT.
+
+    Returns: a ParsedDatetimes with the `values` (a list of datetimes with None for
+     the invalid strings, or a datetime64 array) and the `invalid_positions`.
+
+    Example:
+        result = datetime_utils.iso_strings_to_datetimes(
+            ["2024-02-06T17:20:32+01:00", "xxx"]
+        )
+        assert result.values[0] == datetime(
+            2024, 2, 6, 17, 20, 32, tzinfo=timezone(timedelta(hours=1))
+        )
+        assert result.invalid_positions == [1]
+    """
+    if as_ndarray and np is None:
+        msg = (
+            "The extra lib `numpy` is required in order to use"
+            " `iso_strings_to_datetimes(as_ndarray=True)`; you should:"
+            " pip install datetime-utils[numpy]"
+        )
+        raise Exception(msg)
+
+    if not isinstance(values, list):
+        values = list(values)
+    fmt = _detect_format(values)
+    if as_ndarray:
+        return _to_ndarray(values, fmt)
+    return _to_list(values, fmt)
@@ -0,0 +1,211 @@
+import warnings
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import datetime_utils
+from datetime_utils import bulk_parsing
+
+CET = timezone(timedelta(hours=1))
+
+
+class TestIsoStringsToDatetimes:
+    def test_happy_flow(self):
+        result = datetime_utils.iso_strings_to_datetimes(
+            [
+                "2024-02-06T17:20:32+01:00",
+                "2024-02-06T17:21:05+01:00",
+                "2024-02-06T17:22:00.5Z",
+                "xxx",
+                None,
+                "2024-13-06T17:20:32+01:00",
+            ]
+        )
+        assert result.values == [
+            datetime(2024, 2, 6, 17, 20, 32, tzinfo=CET),
+            datetime(2024, 2, 6, 17, 21, 5, tzinfo=CET),
+            datetime(2024, 2, 6, 17, 22, 0, 500000, tzinfo=timezone.utc),
+            None,
+            None,
+            None,
+        ]
+        assert result.invalid_positions == [3, 5]
+
+    def test_formats(self):
+        texts = [
+            "2024-02-06",
+            "2024-02-06 17:20",
+            "2024-02-06T17:20:32.1234567",
+            "2024-02-06T17:20:32,123z",
+            "2024-02-06T17:20:32-0530",
+            "2024-02-06T17:20:32+01",
+        ]
+        # Every format as the dominant one (the fast path) and as the minority one.
+        for text in texts:
+            values = [text] * 10 + texts
+            result = datetime_utils.iso_strings_to_datetimes(values)
+            assert result.invalid_positions == []
+            assert result.values[-6:] == [
+                datetime(2024, 2, 6),
+                datetime(2024, 2, 6, 17, 20),
+                datetime(2024, 2, 6, 17, 20, 32, 123456),
+                datetime(2024, 2, 6, 17, 20, 32, 123000, tzinfo=timezone.utc),
+                datetime(
+                    2024,
+                    2,
+                    6,
+                    17,
+                    20,
+                    32,
+                    tzinfo=timezone(-timedelta(hours=5, minutes=30)),
+                ),
+                datetime(2024, 2, 6, 17, 20, 32, tzinfo=CET),
+            ]
+            assert result.values[:10] == [result.values[10 + texts.index(text)]] * 10
+
+    def test_invalid(self):
+        values = ["2024-02-06T17:20:32Z"] * 3 + [
+            "2024-02-30T17:20:32Z",
+            "2024-02-06T17:20:32+25:00",
+            "2024-02-06T17:20:32Y",
+            "2024-02-06T17:20",
+            "",
+            123,
+        ]
+        result = datetime_utils.iso_strings_to_datetimes(values)
+        assert result.invalid_positions == [3, 4, 5, 7, 8]
+        assert result.values[6] == datetime(2024, 2, 6, 17, 20)
+
+    def test_shared_tzinfo(self):
+        values = [f"2024-02-06T17:20:{x:02}Z" for x in range(60)]
+        values += ["2024-02-06T17:20Z", "2024-02-06T17:20:32+00:00"]
+        result = datetime_utils.iso_strings_to_datetimes(values)
+        assert {id(x.tzinfo) for x in result.values} == {id(timezone.utc)}
+
+    def test_format_not_supported_by_fromisoformat(self, monkeypatch):
+        # "z" is not accepted by fromisoformat() on any Python version.
+        monkeypatch.setattr(bulk_parsing, "_CHUNK_SIZE", 4)
+        values = [f"2024-02-06T17:20:{x:02}z" for x in range(12)]
+        result = datetime_utils.iso_strings_to_datetimes(values)
+        assert result.values == [
+            datetime(2024, 2, 6, 17, 20, x, tzinfo=timezone.utc) for x in range(12)
+        ]
+        assert result.invalid_positions == []
+
+    def test_chunks(self, monkeypatch):
+        # Chunks all in the dominant format (parsed in bulk) and not.
+        monkeypatch.setattr(bulk_parsing, "_CHUNK_SIZE", 4)
+        minus_one = timezone(-timedelta(hours=1))
+        for suffix, tzinfo in (("", None), ("Z", timezone.utc), ("+01:00", CET)):
+            values = [f"2024-02-06T17:20:{x:02}{suffix}" for x in range(8)]
+            values += [f"2024-02-06T17:20:{x:02}-01:00" for x in range(3)] + [None]
+            values += [f"2024-02-06T17:20:{x:02}{suffix}" for x in range(4)]
+            values[10] = "2024-02-06T17:20:60-01:00"
+            result = datetime_utils.iso_strings_to_datetimes(values)
+            assert result.values == (
+                [datetime(2024, 2, 6, 17, 20, x, tzinfo=tzinfo) for x in range(8)]
+                + [datetime(2024, 2, 6, 17, 20, x, tzinfo=minus_one) for x in range(2)]
+                + [None, None]
+                + [datetime(2024, 2, 6, 17, 20, x, tzinfo=tzinfo) for x in range(4)]
+            )
+            assert result.invalid_positions == [10]
+            tzinfos = {x.tzinfo for x in result.values[:8] + result.values[-4:]}
+            assert len(tzinfos) == 1
+
+    def test_detect_format(self):
+        assert bulk_parsing._detect_format(["2024-02-06T17:20:32.123+01:00"]) == (
+            29,
+            23,
+        )
+        assert bulk_parsing._detect_format(["2024-02-06 17:20"]) == (16, 16)
+        assert bulk_parsing._detect_format(["xxx", "yyy"]) is None
+        assert bulk_parsing._detect_format([None]) is None
+
+    def test_iterator(self):
+        result = datetime_utils.iso_strings_to_datetimes(
+            x for x in ["2024-02-06", "xxx"]
+        )
+        assert result.values == [datetime(2024, 2, 6), None]
+
+    def test_empty(self):
+        result = datetime_utils.iso_strings_to_datetimes([])
+        assert result.values == []
+        assert result.invalid_positions == []
+
+
+class TestIsoStringsToDatetimesAsNdarray:
+    def test_happy_flow(self):
+        np = pytest.importorskip("numpy")
+        result = datetime_utils.iso_strings_to_datetimes(
+            [
+                "2024-02-06T17:20:32+01:00",
+                "2024-02-06T17:21:05.5-00:30",
+                "xxx",
+                None,
+                "2024-02-06",
+            ],
+            as_ndarray=True,
+        )
+        assert result.values.dtype == np.dtype("datetime64[us]")
+        assert result.values[0] == np.datetime64("2024-02-06T16:20:32")
+        assert result.values[1] == np.datetime64("2024-02-06T17:51:05.5")
+        assert np.isnat(result.values[2])
+        assert np.isnat(result.values[3])
+        assert result.values[4] == np.datetime64("2024-02-06")
+        assert result.invalid_positions == [2]
+
+    def test_same_as_list(self):
+        np = pytest.importorskip("numpy")
+        values = ["2024-02-06T17:20:32.123Z"] * 5 + [
+            "2024-02-06T17:20:32+0100",
+            "2024-02-30T17:20:32.123Z",
+            "2024-02-06T17:20:32.123+01:00",
+        ]
+        result = datetime_utils.iso_strings_to_datetimes(values)
+        result_array = datetime_utils.iso_strings_to_datetimes(values, as_ndarray=True)
+        assert result_array.invalid_positions == result.invalid_positions == [6]
+        expected = [
+            (
+                None
+                if x is None
+                else np.datetime64(
+                    x.astimezone(timezone.utc).replace(tzinfo=None), "us"
+                )
+            )
+            for x in result.values
+        ]
+        assert np.array_equal(
+            result_array.values,
+            np.array(expected, dtype="datetime64[us]"),
+            equal_nan=True,
+        )
+
+    def test_chunks(self, monkeypatch):
+        np = pytest.importorskip("numpy")
+        monkeypatch.setattr(bulk_parsing, "_CHUNK_SIZE", 4)
+        values = ["2024-02-06T17:20:32.5+01:00"] * 8 + ["2024-02-06", "xxx"]
+        result = datetime_utils.iso_strings_to_datetimes(values, as_ndarray=True)
+        assert list(result.values[:8]) == [np.datetime64("2024-02-06T16:20:32.5")] * 8
+        assert result.values[8] == np.datetime64("2024-02-06")
+        assert np.isnat(result.values[9])
+        assert result.invalid_positions == [9]
+
+    def test_empty(self):
+        np = pytest.importorskip("numpy")
+        result = datetime_utils.iso_strings_to_datetimes([], as_ndarray=True)
+        assert result.values.dtype == np.dtype("datetime64[us]")
+        assert len(result.values) == 0
+
+    def test_no_numpy_warnings(self):
+        pytest.importorskip("numpy")
+        values = ["2024-02-06T17:20:32,123z"] * 10
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            result = datetime_utils.iso_strings_to_datetimes(values, as_ndarray=True)
+        assert result.invalid_positions == []
+
+    def test_numpy_not_installed(self, monkeypatch):
+        monkeypatch.setattr(bulk_parsing, "np", None)
+        with pytest.raises(Exception):
+            datetime_utils.iso_strings_to_datetimes(["2024-02-06"], as_ndarray=True)
+        assert datetime_utils.iso_strings_to_datetimes(["2024-02-06"]).values
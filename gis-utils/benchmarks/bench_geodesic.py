@@ -0,0 +1,93 @@
+"""
+Benchmark: geodesic (Vincenty, WGS-84 ellipsoid) vs great circle (Haversine, sphere)
+ distances, in speed and in accuracy.
+
+Run it with:
+    $ make benchmark
+or:
+    $ python benchmarks/bench_geodesic.py --n-points 100000
+"""
+
+import argparse
+import random
+import time
+
+import gis_utils
+from gis_utils import _common
+
+
+def _time(fn, *args, n_repeats: int = 3) -> float:
+    # The best of n_repeats runs, in seconds.
+    best = float("inf")
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _print_row(name: str, seconds: float, n_points: int) -> None:
+    print(
+        f"{name:<52} {seconds * 1000:>10.1f} ms {seconds / n_points * 1e9:>10.0f} ns/pt"
+    )
+
+
+def main(n_points: int, seed: int) -> None:
+    rng = random.Random(seed)
+    # A random track with steps of ~100 m, and random points all over the world.
+    lat, lon = 46.46961, 10.36953
+    track = []
+    for _ in range(n_points):
+        lat += rng.uniform(-0.001, 0.001)
+        lon += rng.uniform(-0.001, 0.001)
+        track.append((lat, lon))
+    world = [(rng.uniform(-89, 89), rng.uniform(-180, 180)) for _ in range(n_points)]
+
+    print(f"n_points: {n_points}, numpy: {_common.np is not None}")
+    print("\nSpeed")
+    n_scalar = min(n_points, 10_000)
+    points = world[: n_scalar + 1]
+    for name, fn in (
+        (
+            "compute_great_circle_distance (scalar loop)",
+            gis_utils.compute_great_circle_distance,
+        ),
+        (
+            "compute_geodesic_distance (scalar loop)",
+            gis_utils.compute_geodesic_distance,
+        ),
+    ):
+        seconds = _time(
+            lambda: [fn(*points[i], *points[i + 1]) for i in range(n_scalar)]
+        )
+        _print_row(name, seconds, n_scalar)
+    for name, fn in (
+        (
+            "compute_great_circle_distances_along_track",
+            gis_utils.compute_great_circle_distances_along_track,
+        ),
+        (
+            "compute_geodesic_distances_along_track",
+            gis_utils.compute_geodesic_distances_along_track,
+        ),
+    ):
+        for label, coords in (("track", track), ("world", world)):
+            _print_row(f"{name} ({label})", _time(fn, coords), n_points)
+
+    print("\nAccuracy: great circle vs geodesic")
+    for label, coords in (("track", track), ("world", world)):
+        great_circle = gis_utils.compute_great_circle_distances_along_track(coords)
+        geodesic = gis_utils.compute_geodesic_distances_along_track(coords)
+        errors = [abs(x - y) / y for x, y in zip(great_circle, geodesic) if y]
+        print(
+            f"{label:<8} max relative error: {max(errors):.3%},"
+            f" mean: {sum(errors) / len(errors):.3%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-points", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.n_points, args.seed)
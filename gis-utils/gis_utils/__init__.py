@@ -1 +1,13 @@
+from .batch_distance import *
+from .geodesic import *
+from .geofence import *
 from .gis_utils import *
+from .heatmap import *
+from .polyline_utils import *
+from .segment_matching import *
+from .similarity import *
+from .simplify import *
+from .spatial_index import *
+from .tiling import *
+from .track import *
+from .track_utils import *
@@ -0,0 +1,69 @@
+"""
+Private helpers shared by the modules in gis_utils.
+"""
+
+import importlib
+from array import array
+from typing import Any
+
+try:
+    # NumPy is an optional extra: pip install "gis-utils[numpy]".
+    #  When it is not installed, the batch fns fall back to pure Python.
+    #  Note: the other modules must read it as `_common.np` (at call time), so that
+    #  tests can monkeypatch it to None to exercise the pure-Python code.
+    np = importlib.import_module("numpy")
+except ImportError:
+    np = None
+
+EARTH_RADIUS_KM = 6371  # Avg radius of Earth in km.
+
+
+def require_numpy(fn_name: str) -> None:
+    """
+    Raise if NumPy (the optional extra) is not installed.
+    """
+    if np is None:
+        msg = (
+            "The extra lib `numpy` is required in order to use"
+            f" `{fn_name}()`; you should: pip install gis-utils[numpy]"
+        )
+        raise Exception(msg)
+
+
+def split_coords(coords: Any) -> tuple:
+    """
+    Split coords into 2 sequences: latitudes and longitudes.
+
+    Args:
+        coords: any of:
+         - a sequence of (lat, lon) pairs, like the result of polyline_str_to_coords();
+         - an `array('d')` with interleaved lat, lon values;
+         - a NumPy N×2 array or a 1-d NumPy array with interleaved lat, lon values.
+
+    Returns: a tuple (lats, lons) of 2 float64 NumPy arrays or, without NumPy, of
+     2 lists of floats.
+    """
+    if np is not None:
+        # Note: an `array('d')` is wrapped without copying (buffer protocol).
+        arr = np.asarray(coords, dtype=np.float64)
+        if arr.size == 0:
+            empty = np.empty(0, dtype=np.float64)
+            return empty, empty
+        if arr.ndim == 1 and arr.shape[0] % 2 == 0:
+            return arr[0::2], arr[1::2]
+        if arr.ndim == 2 and arr.shape[1] == 2:
+            return arr[:, 0], arr[:, 1]
+        raise ValueError(f"coords must be N×2 or interleaved, not {arr.shape}")
+
+    if isinstance(coords, array) or (
+        coords.__class__.__name__ == "ndarray" and coords.ndim == 1
+    ):
+        if len(coords) % 2:
+            raise ValueError("interleaved coords must have an even length")
+        return [float(x) for x in coords[0::2]], [float(x) for x in coords[1::2]]
+    lats = []
+    lons = []
+    for lat, lon in coords:
+        lats.append(float(lat))
+        lons.append(float(lon))
+    return lats, lons
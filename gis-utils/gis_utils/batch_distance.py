@@ -0,0 +1,309 @@
+"""
+** GIS UTILS: BATCH DISTANCE **
+===============================
+
+Array-accepting counterparts of compute_great_circle_distance() and
+ compute_euclidean_distance(), vectorized with NumPy (optional extra:
+ pip install "gis-utils[numpy]") and with a pure-Python fallback.
+
+Coords can be given as a sequence of (lat, lon) pairs (like the result of
+ polyline_str_to_coords()), as an `array('d')` with interleaved lat, lon values
+ or as a NumPy N×2 array.
+All distances are in km; the result is a float64 NumPy array or, without NumPy,
+ a list of floats.
+
+```py
+import gis_utils
+
+coords = gis_utils.polyline_str_to_coords(polyline)
+# Distance between each point and the next one.
+dists = gis_utils.compute_great_circle_distances_along_track(coords)
+# Distance between Bormio and each point.
+dists = gis_utils.compute_great_circle_distances_to_point(46.46961, 10.36953, coords)
+# All-pairs distances.
+matrix = gis_utils.compute_distance_matrix(coords1, coords2)
+```
+"""
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "compute_great_circle_distances_along_track",
+    "compute_euclidean_distances_along_track",
+    "compute_great_circle_distances_to_point",
+    "compute_euclidean_distances_to_point",
+    "compute_distance_matrix",
+    "iter_distance_matrix_chunks",
+]
+
+from typing import Any, Iterator
+
+from . import _common
+from .gis_utils import compute_euclidean_distance, compute_great_circle_distance
+
+# Max number of cells computed at once in a chunk of a distance matrix: it bounds
+#  the size of the temporary arrays (each is 8 bytes * this = 8 MB).
+_MATRIX_CHUNK_MAX_CELLS = 2**20
+
+_METRICS = ("great_circle", "euclidean")
+
+
+def _np_great_circle(lat1, lon1, lat2, lon2, cos_lat1=None, cos_lat2=None):
+    # Same Haversine formula as compute_great_circle_distance(), but with NumPy
+    #  arrays (in radians) that can be broadcast together.
+    np = _common.np
+    if cos_lat1 is None:
+        cos_lat1 = np.cos(lat1)
+    if cos_lat2 is None:
+        cos_lat2 = np.cos(lat2)
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + cos_lat1 * cos_lat2 * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    # Clip as rounding errors can make `a` slightly >1 for antipodal points.
+    c = 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    return c * _common.EARTH_RADIUS_KM
+
+
+def _np_euclidean(lat1, lon1, lat2, lon2):
+    # Same formula as compute_euclidean_distance(), but with NumPy arrays (in
+    #  radians) that can be broadcast together.
+    np = _common.np
+    x = (lon2 - lon1) * np.cos((lat1 + lat2) / 2)
+    y = lat2 - lat1
+    return _common.EARTH_RADIUS_KM * np.sqrt(x**2 + y**2)
+
+
+def compute_great_circle_distances_along_track(coords: Any):
+    """
+    Compute the great circle distance in km between each point of a track and the
+     next one. See compute_great_circle_distance().
+
+    Args:
+        coords: the points of the track, see the top docstring.
+
+    Returns: N-1 distances in km, as a NumPy array (or a list without NumPy).
+
+    Example:
+        coords = gis_utils.polyline_str_to_coords(polyline)
+        dists = gis_utils.compute_great_circle_distances_along_track(coords)
+        assert len(dists) == len(coords) - 1
+    """
+    lats, lons = _common.split_coords(coords)
+    np = _common.np
+    if np is None:
+        return [
+            compute_great_circle_distance(lats[i], lons[i], lats[i + 1], lons[i + 1])
+            for i in range(len(lats) - 1)
+        ]
+
+    lats, lons = np.radians(lats), np.radians(lons)
+    return _np_great_circle(lats[:-1], lons[:-1], lats[1:], lons[1:])
+
+
+def compute_euclidean_distances_along_track(coords: Any):
+    """
+    Compute the Euclidean distance (flat-earth distance) in km between each point of
+     a track and the next one. See compute_euclidean_distance().
+
+    Args:
+        coords: the points of the track, see the top docstring.
+
+    Returns: N-1 distances in km, as a NumPy array (or a list without NumPy).
+    """
+    lats, lons = _common.split_coords(coords)
+    np = _common.np
+    if np is None:
+        return [
+            compute_euclidean_distance(lats[i], lons[i], lats[i + 1], lons[i + 1])
+            for i in range(len(lats) - 1)
+        ]
+
+    lats, lons = np.radians(lats), np.radians(lons)
+    return _np_euclidean(lats[:-1], lons[:-1], lats[1:], lons[1:])
+
+
+def compute_great_circle_distances_to_point(lat: float, lon: float, coords: Any):
+    """
+    Compute the great circle distance in km between one point and many points (one
+     to many). See compute_great_circle_distance().
+
+    Args:
+        lat: latitude of the single point.
+        lon: longitude of the single point.
+        coords: the many points, see the top docstring.
+
+    Returns: N distances in km, as a NumPy array (or a list without NumPy).
+
+    Example:
+        bormio = (46.46961, 10.36953)
+        dists = gis_utils.compute_great_circle_distances_to_point(*bormio, coords)
+    """
+    lats, lons = _common.split_coords(coords)
+    np = _common.np
+    if np is None:
+        return [
+            compute_great_circle_distance(lat, lon, lat2, lon2)
+            for lat2, lon2 in zip(lats, lons)
+        ]
+
+    return _np_great_circle(
+        np.radians(lat), np.radians(lon), np.radians(lats), np.radians(lons)
+    )
+
+
+def compute_euclidean_distances_to_point(lat: float, lon: float, coords: Any):
+    """
+    Compute the Euclidean distance (flat-earth distance) in km between one point and
+     many points (one to many). See compute_euclidean_distance().
+
+    Args:
+        lat: latitude of the single point.
+        lon: longitude of the single point.
+        coords: the many points, see the top docstring.
+
+    Returns: N distances in km, as a NumPy array (or a list without NumPy).
+    """
+    lats, lons = _common.split_coords(coords)
+    np = _common.np
+    if np is None:
+        return [
+            compute_euclidean_distance(lat, lon, lat2, lon2)
+            for lat2, lon2 in zip(lats, lons)
+        ]
+
+    return _np_euclidean(
+        np.radians(lat), np.radians(lon), np.radians(lats), np.radians(lons)
+    )
+
+
+def iter_distance_matrix_chunks(
+    coords1: Any,
+    coords2: Any | None = None,
+    metric: str = "great_circle",
+    chunk_size: int | None = None,
+) -> Iterator[tuple[int, Any]]:
+    """
+    Compute the distances in km between all the points in `coords1` and all the
+     points in `coords2` (many to many), one chunk of rows at a time.
+    Use it instead of compute_distance_matrix() when the full N×M matrix does not fit
+     in memory, fi. to reduce it on the fly: the memory footprint is bounded by the
+     chunk size.
+
+    Args:
+        coords1: the N points, on the rows, see the top docstring.
+        coords2: the M points, on the columns. Default: same as coords1.
+        metric: "great_circle" or "euclidean".
+        chunk_size: number of rows per chunk. Default: as many rows as required to
+         have ~1M cells per chunk.
+
+    Returns: an iterator of tuples (first row index, chunk) where chunk is a
+     chunk_size×M NumPy array (or a list of lists without NumPy).
+
+    Example:
+        nearest = []
+        for start, chunk in gis_utils.iter_distance_matrix_chunks(coords1, coords2):
+            nearest.extend(chunk.min(axis=1))
+    """
+    lats1, lons1, lats2, lons2 = _split_matrix_coords(coords1, coords2)
+    yield from _iter_distance_matrix_chunks(
+        lats1, lons1, lats2, lons2, metric, chunk_size
+    )
+
+
+def _split_matrix_coords(coords1: Any, coords2: Any | None) -> tuple:
+    lats1, lons1 = _common.split_coords(coords1)
+    if coords2 is None:
+        return lats1, lons1, lats1, lons1
+    return lats1, lons1, *_common.split_coords(coords2)
+
+
+def _iter_distance_matrix_chunks(
+    lats1: Any,
+    lons1: Any,
+    lats2: Any,
+    lons2: Any,
+    metric: str,
+    chunk_size: int | None,
+) -> Iterator[tuple[int, Any]]:
+    # See iter_distance_matrix_chunks(), with coords already split.
+    if metric not in _METRICS:
+        raise ValueError(f"metric must be one of {_METRICS}, not {metric}")
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError("chunk_size must be > 0")
+
+    n_rows = len(lats1)
+    n_cols = len(lats2)
+    if chunk_size is None:
+        chunk_size = max(1, _MATRIX_CHUNK_MAX_CELLS // max(1, n_cols))
+
+    np = _common.np
+    if np is None:
+        fn = (
+            compute_great_circle_distance
+            if metric == "great_circle"
+            else compute_euclidean_distance
+        )
+        for start in range(0, n_rows, chunk_size):
+            yield start, [
+                [fn(lats1[i], lons1[i], lat2, lon2) for lat2, lon2 in zip(lats2, lons2)]
+                for i in range(start, min(start + chunk_size, n_rows))
+            ]
+        return
+
+    lats1, lons1 = np.radians(lats1), np.radians(lons1)
+    lats2, lons2 = np.radians(lats2), np.radians(lons2)
+    cos_lats2 = np.cos(lats2)[np.newaxis, :]
+    lats2, lons2 = lats2[np.newaxis, :], lons2[np.newaxis, :]
+    for start in range(0, n_rows, chunk_size):
+        end = min(start + chunk_size, n_rows)
+        lat1 = lats1[start:end, np.newaxis]
+        lon1 = lons1[start:end, np.newaxis]
+        if metric == "great_circle":
+            chunk = _np_great_circle(lat1, lon1, lats2, lons2, cos_lat2=cos_lats2)
+        else:
+            chunk = _np_euclidean(lat1, lon1, lats2, lons2)
+        yield start, chunk
+
+
+def compute_distance_matrix(
+    coords1: Any,
+    coords2: Any | None = None,
+    metric: str = "great_circle",
+    chunk_size: int | None = None,
+):
+    """
+    Compute the N×M matrix of the distances in km between all the points in `coords1`
+     and all the points in `coords2` (many to many).
+    It is computed in chunks of rows (see iter_distance_matrix_chunks()), so the
+     temporary memory is bounded and only the result is N×M.
+
+    Args:
+        coords1: the N points, on the rows, see the top docstring.
+        coords2: the M points, on the columns. Default: same as coords1.
+        metric: "great_circle" or "euclidean".
+        chunk_size: number of rows per chunk, see iter_distance_matrix_chunks().
+
+    Returns: a N×M NumPy array (or a list of lists without NumPy).
+
+    Example:
+        matrix = gis_utils.compute_distance_matrix(coords1, coords2)
+        assert matrix[3, 5] == gis_utils.compute_great_circle_distance(
+            *coords1[3], *coords2[5]
+        )  # Approx.
+    """
+    # The coords are split once, here, and not again for the chunks.
+    lats1, lons1, lats2, lons2 = _split_matrix_coords(coords1, coords2)
+    chunks = _iter_distance_matrix_chunks(
+        lats1, lons1, lats2, lons2, metric, chunk_size
+    )
+    np = _common.np
+    if np is None:
+        matrix = []
+        for _, chunk in chunks:
+            matrix.extend(chunk)
+        return matrix
+
+    matrix = np.empty((len(lats1), len(lats2)), dtype=np.float64)
+    for start, chunk in chunks:
+        matrix[start : start + chunk.shape[0]] = chunk
+    return matrix
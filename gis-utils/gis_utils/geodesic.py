@@ -0,0 +1,265 @@
+"""
+** GIS UTILS: GEODESIC **
+=========================
+
+Distances on the WGS-84 ellipsoid (the one used by GPS), with Vincenty's inverse
+ formula: accurate to well below 1 mm, while compute_great_circle_distance() (a
+ sphere) can be off by up to ~0.5%.
+The batch fns iterate Vincenty's formula on all the points at once with NumPy
+ (optional extra: pip install "gis-utils[numpy]"), with a pure-Python fallback.
+See `benchmarks/bench_geodesic.py` for a comparison with the Haversine fns.
+
+```py
+import gis_utils
+
+white_house = (38.898, -77.037)
+eiffel_tower = (48.858, 2.294)
+dist = gis_utils.compute_geodesic_distance(*white_house, *eiffel_tower)
+
+coords = gis_utils.polyline_str_to_coords(polyline)
+dists = gis_utils.compute_geodesic_distances_along_track(coords)
+dists = gis_utils.compute_geodesic_distances_to_point(46.46961, 10.36953, coords)
+```
+"""
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "compute_geodesic_distance",
+    "compute_geodesic_distances_along_track",
+    "compute_geodesic_distances_to_point",
+]
+
+import math
+from typing import Any
+
+from . import _common
+from .batch_distance import _np_great_circle
+from .gis_utils import compute_great_circle_distance
+
+# WGS-84 ellipsoid.
+_A = 6378137.0  # Semi-major axis in m.
+_F = 1 / 298.257223563  # Flattening.
+_B = (1 - _F) * _A  # Semi-minor axis in m.
+
+# Vincenty's iteration stops when lambda changes less than this (~0.06 mm).
+_TOLERANCE = 1e-12
+_MAX_ITERATIONS = 200
+
+
+def compute_geodesic_distance(
+    lat1: float, lon1: float, lat2: float, lon2: float
+) -> float:
+    """
+    Compute the geodesic distance in km between two points on the WGS-84 ellipsoid
+     (specified in decimal degrees), with Vincenty's inverse formula.
+    For nearly antipodal points, where Vincenty's formula does not converge, it
+     falls back to compute_great_circle_distance().
+
+    Theory: https://en.wikipedia.org/wiki/Vincenty%27s_formulae
+
+    Args: lat and long of the 2 location, see compute_great_circle_distance().
+
+    Returns (float): distance in km.
+
+    Example:
+        # Flinders Peak -> Buninyong, the example in Vincenty's paper.
+        dist = gis_utils.compute_geodesic_distance(
+            -37.95103342, 144.42486789, -37.65282114, 143.92649554
+        )
+        assert round(dist, 4) == 54.9723
+    """
+    u1 = math.atan((1 - _F) * math.tan(math.radians(lat1)))
+    u2 = math.atan((1 - _F) * math.tan(math.radians(lat2)))
+    sin_u1, cos_u1 = math.sin(u1), math.cos(u1)
+    sin_u2, cos_u2 = math.sin(u2), math.cos(u2)
+    lon_diff = math.radians((lon2 - lon1 + 180) % 360 - 180)
+
+    lambda_ = lon_diff
+    for _ in range(_MAX_ITERATIONS):
+        sin_lambda, cos_lambda = math.sin(lambda_), math.cos(lambda_)
+        sin_sigma = math.hypot(
+            cos_u2 * sin_lambda, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lambda
+        )
+        if sin_sigma == 0:
+            return 0.0  # Same point.
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lambda
+        sigma = math.atan2(sin_sigma, cos_sigma)
+        sin_alpha = cos_u1 * cos_u2 * sin_lambda / sin_sigma
+        cos2_alpha = 1 - sin_alpha**2
+        # On the equator cos2_alpha is 0 (and cos_2sigma_m is irrelevant).
+        cos_2sigma_m = (
+            cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha if cos2_alpha else 0.0
+        )
+        c = _F / 16 * cos2_alpha * (4 + _F * (4 - 3 * cos2_alpha))
+        prev_lambda = lambda_
+        lambda_ = lon_diff + (1 - c) * _F * sin_alpha * (
+            sigma
+            + c
+            * sin_sigma
+            * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m**2))
+        )
+        if abs(lambda_ - prev_lambda) < _TOLERANCE:
+            break
+    else:
+        # Nearly antipodal points.
+        return compute_great_circle_distance(lat1, lon1, lat2, lon2)
+
+    u_sq = cos2_alpha * (_A**2 - _B**2) / _B**2
+    a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = (
+        b
+        * sin_sigma
+        * (
+            cos_2sigma_m
+            + b
+            / 4
+            * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                - b
+                / 6
+                * cos_2sigma_m
+                * (-3 + 4 * sin_sigma**2)
+                * (-3 + 4 * cos_2sigma_m**2)
+            )
+        )
+    )
+    return _B * a * (sigma - delta_sigma) / 1000
+
+
+def _np_geodesic(lats1, lons1, lats2, lons2):
+    # Same as compute_geodesic_distance(), but with NumPy arrays (in degrees) that
+    #  can be broadcast together: each iteration runs on all the points still not
+    #  converged.
+    np = _common.np
+    lats1, lons1, lats2, lons2 = np.broadcast_arrays(lats1, lons1, lats2, lons2)
+    u1 = np.arctan((1 - _F) * np.tan(np.radians(lats1)))
+    u2 = np.arctan((1 - _F) * np.tan(np.radians(lats2)))
+    sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+    sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+    lon_diff = np.radians((lons2 - lons1 + 180) % 360 - 180)
+
+    n = lon_diff.size
+    lambda_ = lon_diff.copy()
+    sin_sigma = np.empty(n)
+    cos_sigma = np.empty(n)
+    sigma = np.empty(n)
+    cos2_alpha = np.empty(n)
+    cos_2sigma_m = np.empty(n)
+    # The indexes of the points still not converged.
+    ixs = np.arange(n)
+    for _ in range(_MAX_ITERATIONS):
+        s_u1, c_u1, s_u2, c_u2 = sin_u1[ixs], cos_u1[ixs], sin_u2[ixs], cos_u2[ixs]
+        sin_lambda, cos_lambda = np.sin(lambda_[ixs]), np.cos(lambda_[ixs])
+        s_sigma = np.hypot(c_u2 * sin_lambda, c_u1 * s_u2 - s_u1 * c_u2 * cos_lambda)
+        c_sigma = s_u1 * s_u2 + c_u1 * c_u2 * cos_lambda
+        sig = np.arctan2(s_sigma, c_sigma)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Same point: sin_sigma is 0 (and the distance is 0 anyway).
+            sin_alpha = np.where(s_sigma == 0, 0, c_u1 * c_u2 * sin_lambda / s_sigma)
+            c2_alpha = 1 - sin_alpha**2
+            # On the equator cos2_alpha is 0 (and cos_2sigma_m is irrelevant).
+            c_2sigma_m = np.where(
+                c2_alpha == 0, 0, c_sigma - 2 * s_u1 * s_u2 / c2_alpha
+            )
+        c = _F / 16 * c2_alpha * (4 + _F * (4 - 3 * c2_alpha))
+        new_lambda = lon_diff[ixs] + (1 - c) * _F * sin_alpha * (
+            sig + c * s_sigma * (c_2sigma_m + c * c_sigma * (-1 + 2 * c_2sigma_m**2))
+        )
+        is_converged = np.abs(new_lambda - lambda_[ixs]) < _TOLERANCE
+        lambda_[ixs] = new_lambda
+        sin_sigma[ixs] = s_sigma
+        cos_sigma[ixs] = c_sigma
+        sigma[ixs] = sig
+        cos2_alpha[ixs] = c2_alpha
+        cos_2sigma_m[ixs] = c_2sigma_m
+        ixs = ixs[~is_converged]
+        if not len(ixs):
+            break
+
+    u_sq = cos2_alpha * (_A**2 - _B**2) / _B**2
+    a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = (
+        b
+        * sin_sigma
+        * (
+            cos_2sigma_m
+            + b
+            / 4
+            * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                - b
+                / 6
+                * cos_2sigma_m
+                * (-3 + 4 * sin_sigma**2)
+                * (-3 + 4 * cos_2sigma_m**2)
+            )
+        )
+    )
+    result = _B * a * (sigma - delta_sigma) / 1000
+    if len(ixs):
+        # Nearly antipodal points: fall back to the great circle distance.
+        lat1, lon1, lat2, lon2 = (
+            np.radians(x.ravel()[ixs]) for x in (lats1, lons1, lats2, lons2)
+        )
+        result[ixs] = _np_great_circle(lat1, lon1, lat2, lon2)
+    return result.reshape(lon_diff.shape)
+
+
+def compute_geodesic_distances_along_track(coords: Any):
+    """
+    Compute the geodesic distance in km between each point of a track and the next
+     one. See compute_geodesic_distance().
+
+    Args:
+        coords: a sequence of (lat, lon) pairs, an `array('d')` with interleaved lat,
+         lon values or a NumPy N×2 array.
+
+    Returns: N-1 distances in km, as a NumPy array (or a list without NumPy).
+
+    Example:
+        coords = gis_utils.polyline_str_to_coords(polyline)
+        dists = gis_utils.compute_geodesic_distances_along_track(coords)
+        assert len(dists) == len(coords) - 1
+    """
+    lats, lons = _common.split_coords(coords)
+    np = _common.np
+    if np is None:
+        return [
+            compute_geodesic_distance(lats[i], lons[i], lats[i + 1], lons[i + 1])
+            for i in range(len(lats) - 1)
+        ]
+
+    if len(lats) < 2:
+        return np.empty(0, dtype=np.float64)
+    return _np_geodesic(lats[:-1], lons[:-1], lats[1:], lons[1:])
+
+
+def compute_geodesic_distances_to_point(lat: float, lon: float, coords: Any):
+    """
+    Compute the geodesic distance in km between one point and many points (one to
+     many). See compute_geodesic_distance().
+
+    Args:
+        lat: the latitude of the point.
+        lon: the longitude of the point.
+        coords: the other points: a sequence of (lat, lon) pairs, an `array('d')`
+         with interleaved lat, lon values or a NumPy N×2 array.
+
+    Returns: N distances in km, as a NumPy array (or a list without NumPy).
+
+    Example:
+        dists = gis_utils.compute_geodesic_distances_to_point(46.46961, 10.36953, coords)
+    """
+    lats, lons = _common.split_coords(coords)
+    np = _common.np
+    if np is None:
+        return [
+            compute_geodesic_distance(lat, lon, lat2, lon2)
+            for lat2, lon2 in zip(lats, lons)
+        ]
+
+    if not len(lats):
+        return np.empty(0, dtype=np.float64)
+    return _np_geodesic(lat, lon, lats, lons)
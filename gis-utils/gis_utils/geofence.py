@@ -0,0 +1,185 @@
+"""
+** GIS UTILS: GEOFENCE **
+=========================
+
+Point-in-polygon tests for many points, fi. to check which points of a track are in
+ a park or in a city. A Geofence is prepared once (bbox and edge index) and then
+ reused for many tracks.
+Vectorized with NumPy (optional extra: pip install "gis-utils[numpy]"), with a
+ pure-Python fallback.
+
+```py
+import gis_utils
+
+park = gis_utils.Geofence([(46.5, 10.3), (46.5, 10.5), (46.4, 10.5), (46.4, 10.3)])
+assert park.contains(46.46961, 10.36953)
+for polyline in activity_polylines:
+    # A bool for each point.
+    is_inside = park.contains_many(gis_utils.polyline_str_to_ndarray(polyline))
+```
+"""
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "Geofence",
+]
+
+import math
+from typing import Any, Sequence
+
+from . import _common
+
+# The max number of cells (points × edges) of a temporary NumPy matrix.
+_MAX_CELLS = 2**20
+
+
+class Geofence:
+    """
+    A polygon (with optional holes), prepared for many point-in-polygon tests.
+
+    The test is ray casting (even-odd rule) in the lat, lon plane, which is fine for
+     geofences that do not cross the antimeridian or include a pole. Points exactly
+     on an edge can be either inside or outside.
+    The points outside the bbox of the polygon are discarded right away. Then each
+     point is tested only against the edges in its row of an index: the polygon
+     bbox split in horizontal rows (by latitude), each with the edges that span it.
+
+    Args:
+        polygon: the vertices of the outer ring, as (lat, lon) pairs (in any format
+         supported by the batch fns, like a NumPy N×2 array); the ring can be either
+         closed or not.
+        holes: the rings of the holes, in the same format of `polygon`.
+        n_index_rows: the number of rows of the edge index. Default: about 1 row
+         every 4 edges (1 row means no index, good for small polygons).
+    """
+
+    def __init__(
+        self,
+        polygon: Any,
+        holes: Sequence[Any] = (),
+        n_index_rows: int | None = None,
+    ):
+        # The edges, as 4 lists: (lat1, lon1) -> (lat2, lon2).
+        self._lats1, self._lons1, self._lats2, self._lons2 = [], [], [], []
+        for ring in (polygon, *holes):
+            lats, lons = _common.split_coords(ring)
+            lats = [float(x) for x in lats]
+            lons = [float(x) for x in lons]
+            if len(lats) < 3:
+                raise ValueError("a ring must have at least 3 vertices")
+            if lats[0] == lats[-1] and lons[0] == lons[-1]:
+                # The ring is closed: drop the duplicated vertex.
+                lats, lons = lats[:-1], lons[:-1]
+            self._lats1 += lats
+            self._lons1 += lons
+            self._lats2 += lats[1:] + lats[:1]
+            self._lons2 += lons[1:] + lons[:1]
+        self.n_edges = len(self._lats1)
+
+        lats, lons = _common.split_coords(polygon)
+        self.lat_min, self.lat_max = float(min(lats)), float(max(lats))
+        self.lon_min, self.lon_max = float(min(lons)), float(max(lons))
+
+        if n_index_rows is None:
+            n_index_rows = max(1, self.n_edges // 4)
+        if n_index_rows < 1:
+            raise ValueError("n_index_rows must be > 0")
+        self.n_index_rows = n_index_rows
+        self._row_height = (self.lat_max - self.lat_min) / n_index_rows or 1.0
+        # Row -> the indexes of the edges that span it (horizontal edges are never
+        #  crossed by a horizontal ray, so they are skipped).
+        self._rows = [[] for _ in range(n_index_rows)]
+        for ix in range(self.n_edges):
+            lat1, lat2 = self._lats1[ix], self._lats2[ix]
+            if lat1 == lat2:
+                continue
+            for row in range(
+                self._get_row(min(lat1, lat2)), self._get_row(max(lat1, lat2)) + 1
+            ):
+                self._rows[row].append(ix)
+
+        # The slope of each edge, in lon per lat (0 for horizontal edges).
+        self._slopes = [
+            (lon2 - lon1) / (lat2 - lat1) if lat1 != lat2 else 0.0
+            for lat1, lon1, lat2, lon2 in zip(
+                self._lats1, self._lons1, self._lats2, self._lons2
+            )
+        ]
+        np = _common.np
+        if np is not None:
+            self._np_edges = np.array(
+                [self._lats1, self._lons1, self._lats2, self._slopes], dtype=np.float64
+            )
+            self._np_rows = [np.array(x, dtype=np.int64) for x in self._rows]
+
+    def _get_row(self, lat: float) -> int:
+        row = math.floor((lat - self.lat_min) / self._row_height)
+        return min(max(row, 0), self.n_index_rows - 1)
+
+    def _is_in_bbox(self, lat: float, lon: float) -> bool:
+        return (
+            self.lat_min <= lat <= self.lat_max and self.lon_min <= lon <= self.lon_max
+        )
+
+    def contains(self, lat: float, lon: float) -> bool:
+        """
+        Check if a point is inside the polygon (and not in a hole).
+        """
+        if not self._is_in_bbox(lat, lon):
+            return False
+        # Count the edges crossed by a ray from the point towards east.
+        is_inside = False
+        for ix in self._rows[self._get_row(lat)]:
+            lat1 = self._lats1[ix]
+            if (lat1 > lat) != (self._lats2[ix] > lat):
+                if lon < self._lons1[ix] + (lat - lat1) * self._slopes[ix]:
+                    is_inside = not is_inside
+        return is_inside
+
+    def contains_many(self, coords: Any):
+        """
+        Check, for each point, if it is inside the polygon (and not in a hole).
+
+        Args:
+            coords: a sequence of (lat, lon) pairs, an `array('d')` with interleaved
+             lat, lon values or a NumPy N×2 array.
+
+        Returns: a NumPy bool array (or a list of bool without NumPy).
+        """
+        lats, lons = _common.split_coords(coords)
+        np = _common.np
+        if np is None:
+            return [self.contains(lat, lon) for lat, lon in zip(lats, lons)]
+
+        result = np.zeros(len(lats), dtype=bool)
+        # Bbox prefilter.
+        ixs = np.flatnonzero(
+            (lats >= self.lat_min)
+            & (lats <= self.lat_max)
+            & (lons >= self.lon_min)
+            & (lons <= self.lon_max)
+        )
+        if not len(ixs):
+            return result
+        rows = np.floor((lats[ixs] - self.lat_min) / self._row_height).astype(np.int64)
+        np.clip(rows, 0, self.n_index_rows - 1, out=rows)
+        # Group the points by row with a single sort.
+        order = np.argsort(rows, kind="stable")
+        ixs, rows = ixs[order], rows[order]
+        bounds = np.flatnonzero(np.diff(rows)) + 1
+        for group_start, group in zip(np.r_[0, bounds], np.split(ixs, bounds)):
+            edge_ixs = self._np_rows[rows[group_start]]
+            if not len(edge_ixs):
+                continue
+            lats1, lons1, lats2, slopes = self._np_edges[:, edge_ixs]
+            # Points × edges matrices, in chunks of points to bound the memory.
+            chunk_size = max(1, _MAX_CELLS // len(edge_ixs))
+            for start in range(0, len(group), chunk_size):
+                point_ixs = group[start : start + chunk_size]
+                lat = lats[point_ixs, np.newaxis]
+                lon = lons[point_ixs, np.newaxis]
+                is_crossed = ((lats1 > lat) != (lats2 > lat)) & (
+                    lon < lons1 + (lat - lats1) * slopes
+                )
+                result[point_ixs] = is_crossed.sum(axis=1) % 2 == 1
+        return result
@@ -156,6 +156,7 @@ def compute_great_circle_distance(
      precise. For an even more precise approximation use:
      https://en.wikipedia.org/wiki/Geodesics_on_an_ellipsoid
      which is included in geopy, see: https://github.com/geopy/geopy?tab=readme-ov-file#measuring-distance.
+     or compute_geodesic_distance() in geodesic.py (with a batch version).
 
     Source: https://stackoverflow.com/a/4913653/1969672
     Theory: https://en.wikipedia.org/wiki/Haversine_formula
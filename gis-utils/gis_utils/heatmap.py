@@ -0,0 +1,321 @@
+"""
+** GIS UTILS: HEATMAP **
+========================
+
+Rasterize many tracks into a density grid (a heatmap): each pixel counts the
+ tracks that pass through it. Consecutive points are joined with lines, so the
+ result does not depend on the sampling rate of the tracks.
+The grid is in the Web Mercator projection (like slippy-map tiles), so it can be
+ overlaid on a map.
+Requires NumPy (optional extra: pip install "gis-utils[numpy]").
+
+```py
+import gis_utils
+
+# A 1024×1024 grid over a bbox (lat_min, lon_min, lat_max, lon_max).
+heatmap = gis_utils.HeatmapGrid(46.3, 10.2, 46.7, 10.7, width=1024, height=1024)
+# Tracks are streamed in chunks: polyline strings, `array('d')` or NumPy arrays.
+heatmap.add_tracks(polyline for polyline in iter_activity_polylines())
+print(heatmap.grid.max())
+
+# Or the grid of a slippy-map tile.
+heatmap = gis_utils.HeatmapGrid.from_tile(zoom=12, x=2165, y=1449, size=256)
+
+# Or in parallel across processes (each worker rasterizes chunks of tracks, then
+#  the counts of the pixels hit are added).
+heatmap = gis_utils.rasterize_tracks(
+    iter_activity_polylines(), 46.3, 10.2, 46.7, 10.7, width=1024, height=1024,
+    workers=4,
+)
+```
+"""
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "HeatmapGrid",
+    "rasterize_tracks",
+]
+
+import functools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Any, Iterable
+
+from . import _common
+from .polyline_utils import polyline_str_to_ndarray
+from .tiling import _MAX_MERCATOR_LAT, tiles_to_coords
+
+
+def _mercator_y(lats):
+    np = _common.np
+    lats = np.radians(np.clip(lats, -_MAX_MERCATOR_LAT, _MAX_MERCATOR_LAT))
+    return np.arcsinh(np.tan(lats))
+
+
+class HeatmapGrid:
+    """
+    A density grid over a bbox, in the Web Mercator projection.
+
+    Args:
+        lat_min, lon_min: the south-west corner of the bbox.
+        lat_max, lon_max: the north-east corner of the bbox.
+        width: the number of columns (pixels along the longitude).
+        height: the number of rows (pixels along the latitude); row 0 is the north.
+        do_count_once_per_track: True to count a track once per pixel (the value
+         of a pixel is the number of tracks through it), False to count every line
+         that passes through a pixel.
+    """
+
+    # int32 halves the memory of the grid wrt int64, and it is plenty for counts.
+    dtype = "int32"
+
+    def __init__(
+        self,
+        lat_min: float,
+        lon_min: float,
+        lat_max: float,
+        lon_max: float,
+        width: int,
+        height: int,
+        do_count_once_per_track: bool = True,
+    ):
+        _common.require_numpy("HeatmapGrid")
+        if lat_min >= lat_max or lon_min >= lon_max:
+            raise ValueError("the bbox must have lat_min < lat_max, lon_min < lon_max")
+        if width < 1 or height < 1:
+            raise ValueError("width and height must be > 0")
+        self.lat_min = lat_min
+        self.lon_min = lon_min
+        self.lat_max = lat_max
+        self.lon_max = lon_max
+        self.width = width
+        self.height = height
+        self.do_count_once_per_track = do_count_once_per_track
+        self.grid = _common.np.zeros((height, width), dtype=self.dtype)
+        self.n_tracks = 0
+
+        self._y_max = float(_mercator_y(lat_max))
+        self._y_min = float(_mercator_y(lat_min))
+
+    @classmethod
+    def from_tile(
+        cls, zoom: int, x: int, y: int, size: int = 256, **kwargs
+    ) -> "HeatmapGrid":
+        """
+        Create the grid of a slippy-map tile (z/x/y), with size×size pixels.
+        """
+        nw, se = tiles_to_coords([x, x + 1], [y, y + 1], zoom)
+        lat_min, lon_max = (float(x) for x in se)
+        lat_max, lon_min = (float(x) for x in nw)
+        return cls(lat_min, lon_min, lat_max, lon_max, size, size, **kwargs)
+
+    def get_params(self) -> tuple:
+        """
+        Return the args to create an empty copy of this grid (fi. in a worker).
+        """
+        return (
+            self.lat_min,
+            self.lon_min,
+            self.lat_max,
+            self.lon_max,
+            self.width,
+            self.height,
+            self.do_count_once_per_track,
+        )
+
+    def _to_pixels(self, track: Any) -> tuple:
+        # Project the points of a track to (float) pixel coords.
+        np = _common.np
+        if isinstance(track, (str, bytes)):
+            track = polyline_str_to_ndarray(track)
+        lats, lons = _common.split_coords(track)
+        xs = (lons - self.lon_min) / (self.lon_max - self.lon_min) * self.width
+        ys = (
+            (self._y_max - _mercator_y(lats))
+            / (self._y_max - self._y_min)
+            * self.height
+        )
+        # Note: a jump across the antimeridian must not become a line across the
+        #  whole grid: it is marked to break the line there.
+        is_jump = np.zeros(len(lons), dtype=bool)
+        is_jump[1:] = np.abs(np.diff(lons)) > 180
+        return xs, ys, is_jump
+
+    def _rasterize_track(self, track: Any):
+        # The flat indexes (row * width + col) of the pixels crossed by the track.
+        np = _common.np
+        xs, ys, is_jump = self._to_pixels(track)
+        if not len(xs):
+            return np.empty(0, dtype=np.int64)
+        if len(xs) == 1:
+            x0, y0 = xs, ys
+            dx = dy = np.zeros(1)
+        else:
+            x0, y0 = xs[:-1], ys[:-1]
+            dx, dy = np.diff(xs), np.diff(ys)
+            keep = ~is_jump[1:]
+            x0, y0, dx, dy = x0[keep], y0[keep], dx[keep], dy[keep]
+
+        # Clip the segments to the grid (Liang-Barsky), so that segments far out of
+        #  the grid cost nothing.
+        t0 = np.zeros(len(x0))
+        t1 = np.ones(len(x0))
+        is_visible = np.ones(len(x0), dtype=bool)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for p, q in (
+                (-dx, x0),
+                (dx, self.width - x0),
+                (-dy, y0),
+                (dy, self.height - y0),
+            ):
+                is_visible &= (p != 0) | (q >= 0)
+                ratio = q / p
+                t0 = np.where(p < 0, np.maximum(t0, ratio), t0)
+                t1 = np.where(p > 0, np.minimum(t1, ratio), t1)
+        is_visible &= t0 <= t1
+        t0, t1 = t0[is_visible], t1[is_visible]
+        x0, y0, dx, dy = x0[is_visible], y0[is_visible], dx[is_visible], dy[is_visible]
+        x0, y0, x1, y1 = x0 + t0 * dx, y0 + t0 * dy, x0 + t1 * dx, y0 + t1 * dy
+
+        # The pixels of the segment ends, then an integer DDA (like Bresenham's line)
+        #  between them, all at once: 1 step per pixel along the major axis, so no
+        #  pixel is skipped (float steps would floor fi. 28.999 to 28).
+        # Note: the ends are clipped to the grid; a point exactly on the right or
+        #  bottom border is in the last pixel.
+        c0 = np.clip(np.floor(x0), 0, self.width - 1).astype(np.int64)
+        c1 = np.clip(np.floor(x1), 0, self.width - 1).astype(np.int64)
+        r0 = np.clip(np.floor(y0), 0, self.height - 1).astype(np.int64)
+        r1 = np.clip(np.floor(y1), 0, self.height - 1).astype(np.int64)
+        dc, dr = c1 - c0, r1 - r0
+        n_steps = np.maximum(np.abs(dc), np.abs(dr))
+        n_samples = n_steps + 1
+        seg_ixs = np.repeat(np.arange(len(x0)), n_samples)
+        starts = np.cumsum(n_samples) - n_samples
+        steps = np.arange(len(seg_ixs)) - np.repeat(starts, n_samples)
+        # Rounded integer division: (2 * d * step + n) // (2 * n).
+        n = np.maximum(n_steps, 1)[seg_ixs]
+        cols = c0[seg_ixs] + (2 * dc[seg_ixs] * steps + n) // (2 * n)
+        rows = r0[seg_ixs] + (2 * dr[seg_ixs] * steps + n) // (2 * n)
+        flat_ixs = rows * self.width + cols
+        if self.do_count_once_per_track:
+            return np.unique(flat_ixs)
+        # Count a shared segment end once (it belongs to both the segments).
+        is_new = np.ones(len(flat_ixs), dtype=bool)
+        is_new[1:] = flat_ixs[1:] != flat_ixs[:-1]
+        return flat_ixs[is_new]
+
+    def add_track(self, track: Any) -> None:
+        """
+        Add a track: a polyline string, a sequence of (lat, lon) pairs, an
+         `array('d')` with interleaved lat, lon values or a NumPy N×2 array.
+        """
+        self.add_tracks([track])
+
+    def add_tracks(self, tracks: Iterable[Any], chunk_size: int = 256) -> None:
+        """
+        Add many tracks, streamed in chunks of `chunk_size` tracks: the memory is
+         bounded by the size of a chunk (not by the number of tracks).
+        """
+        tracks = iter(tracks)
+        while chunk := list(islice(tracks, chunk_size)):
+            self._add_counts(*self._count_pixels(chunk), len(chunk))
+
+    def _count_pixels(self, tracks: list) -> tuple:
+        # The pixels hit by the tracks, as sparse (sorted unique flat indexes,
+        #  counts), not a full grid of counts.
+        np = _common.np
+        flat_ixs = np.concatenate([self._rasterize_track(x) for x in tracks])
+        flat_ixs, counts = np.unique(flat_ixs, return_counts=True)
+        return flat_ixs, counts.astype(self.dtype)
+
+    def _add_counts(self, flat_ixs, counts, n_tracks: int) -> None:
+        # Note: the flat indexes are unique, so a plain fancy-indexed sum is enough.
+        self.grid.reshape(-1)[flat_ixs] += counts
+        self.n_tracks += n_tracks
+
+    def merge(self, other: "HeatmapGrid") -> None:
+        """
+        Add the counts of another grid with the same params (the reduce step, fi.
+         after rasterizing in many processes).
+        """
+        if other.get_params() != self.get_params():
+            raise ValueError("cannot merge grids with different params")
+        self.grid += other.grid
+        self.n_tracks += other.n_tracks
+
+
+@functools.lru_cache(maxsize=1)
+def _get_worker_heatmap(params: tuple) -> HeatmapGrid:
+    # 1 (empty) grid per worker process, only to rasterize: its grid is not used.
+    return HeatmapGrid(*params)
+
+
+def _rasterize_chunk(params: tuple, chunk: list) -> tuple:
+    # Run in a worker process: only the sparse counts of the pixels hit are sent
+    #  back to the parent (not a full grid per chunk).
+    flat_ixs, counts = _get_worker_heatmap(params)._count_pixels(chunk)
+    return flat_ixs, counts, len(chunk)
+
+
+def rasterize_tracks(
+    tracks: Iterable[Any],
+    lat_min: float,
+    lon_min: float,
+    lat_max: float,
+    lon_max: float,
+    width: int,
+    height: int,
+    do_count_once_per_track: bool = True,
+    workers: int | None = None,
+    chunk_size: int = 256,
+) -> HeatmapGrid:
+    """
+    Rasterize many tracks into a HeatmapGrid, in parallel across processes.
+
+    The tracks are streamed in chunks of `chunk_size`; each chunk is rasterized in
+     a worker process and the counts of its pixels (sparse, not a full grid) are
+     added to the result. At most 2 chunks per
+     worker are in flight, so the memory is bounded even with a huge iterable.
+
+    Args:
+        tracks: an iterable of polyline strings, sequences of (lat, lon) pairs,
+         `array('d')` with interleaved lat, lon values or NumPy N×2 arrays.
+        lat_min, lon_min, lat_max, lon_max, width, height, do_count_once_per_track:
+         see HeatmapGrid.
+        workers: the number of processes; default: the number of CPUs. With 1, it
+         runs in the current process.
+        chunk_size: the number of tracks sent to a worker at once.
+
+    Returns: a HeatmapGrid.
+
+    Example:
+        heatmap = gis_utils.rasterize_tracks(
+            polylines, 46.3, 10.2, 46.7, 10.7, width=1024, height=1024, workers=4
+        )
+        image = heatmap.grid
+    """
+    heatmap = HeatmapGrid(
+        lat_min, lon_min, lat_max, lon_max, width, height, do_count_once_per_track
+    )
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        heatmap.add_tracks(tracks, chunk_size=chunk_size)
+        return heatmap
+
+    params = heatmap.get_params()
+    tracks = iter(tracks)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = set()
+        while True:
+            while len(futures) < workers * 2:
+                chunk = list(islice(tracks, chunk_size))
+                if not chunk:
+                    break
+                futures.add(executor.submit(_rasterize_chunk, params, chunk))
+            if not futures:
+                break
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                heatmap._add_counts(*future.result())
+    return heatmap
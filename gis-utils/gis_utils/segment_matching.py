@@ -0,0 +1,262 @@
+"""
+** GIS UTILS: SEGMENT MATCHING **
+=================================
+
+Find every traversal of a (Strava-like) segment in an activity track.
+
+```py
+import gis_utils
+
+# Strava segment Re Stelvio Mapei, segment-id 15104529341.
+segment_polyline = r"abszGqhh~@s@nD{F~I{HbE_@AQeAzBqIYk@..."
+matches = gis_utils.match_segment(segment_polyline, activity_polyline)
+for match in matches:
+    print(match.start_index, match.end_index, match.distance_km)
+```
+"""
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "SegmentMatch",
+    "match_segment",
+]
+
+import math
+from bisect import bisect_left
+from typing import Any, NamedTuple
+
+from . import _common
+from .batch_distance import compute_great_circle_distances_along_track
+from .polyline_utils import polyline_str_to_array
+from .spatial_index import GridSpatialIndex
+from .track_utils import cumulative_distance
+
+# 1 degree of latitude in km.
+_KM_PER_DEG = math.pi * _common.EARTH_RADIUS_KM / 180
+
+
+class SegmentMatch(NamedTuple):
+    # Index of the track point where the segment starts.
+    start_index: int
+    # Index of the track point where the segment ends.
+    end_index: int
+    # The distance along the track between start_index and end_index.
+    distance_km: float
+
+
+def _to_lats_lons(coords_or_polyline: Any) -> tuple:
+    if isinstance(coords_or_polyline, (str, bytes)):
+        coords_or_polyline = polyline_str_to_array(coords_or_polyline)
+    return _common.split_coords(coords_or_polyline)
+
+
+def _to_local_km(lat0: float, lon0: float, lat: float, lon: float) -> tuple:
+    # The (x, y) position in km of a point wrt (lat0, lon0), in a local
+    #  equirectangular projection (accurate for the short distances of a tolerance).
+    dlon = (lon - lon0 + 180) % 360 - 180
+    return dlon * _KM_PER_DEG * math.cos(math.radians(lat0)), (lat - lat0) * _KM_PER_DEG
+
+
+def _get_near_positions(
+    lat: float, lon: float, ixs: list[int], lats: Any, lons: Any, tolerance_km: float
+) -> dict[float, float]:
+    # The positions along the track (a track point index + the fraction of the next
+    #  track segment) nearest to (lat, lon), 1 for each track segment (between the
+    #  track points ix and ix + 1) within tolerance, and their distances in km.
+    np = _common.np
+    if np is None:
+        positions = dict()
+        for ix in ixs:
+            ax, ay = _to_local_km(lat, lon, lats[ix], lons[ix])
+            bx, by = _to_local_km(lat, lon, lats[ix + 1], lons[ix + 1])
+            dx, dy = bx - ax, by - ay
+            length2 = dx * dx + dy * dy
+            t = (
+                0.0
+                if length2 == 0
+                else min(1.0, max(0.0, -(ax * dx + ay * dy) / length2))
+            )
+            dist = math.hypot(ax + t * dx, ay + t * dy)
+            if dist <= tolerance_km:
+                positions[ix + t] = dist
+        return positions
+
+    ixs = np.asarray(ixs, dtype=np.int64)
+    ax, ay = _to_local_km(lat, lon, lats[ixs], lons[ixs])
+    bx, by = _to_local_km(lat, lon, lats[ixs + 1], lons[ixs + 1])
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.clip(-(ax * dx + ay * dy) / length2, 0.0, 1.0)
+    t = np.where(length2 == 0, 0.0, t)
+    dists = np.hypot(ax + t * dx, ay + t * dy)
+    is_near = dists <= tolerance_km
+    return dict(zip((ixs[is_near] + t[is_near]).tolist(), dists[is_near].tolist()))
+
+
+def match_segment(
+    segment: Any,
+    track: Any,
+    tolerance_m: float = 30,
+    max_distance_ratio: float = 1.5,
+) -> list[SegmentMatch]:
+    """
+    Find every traversal of a segment in a track.
+
+    A traversal is valid when the track passes, in order, within `tolerance_m` from
+     every point of the segment. The distance is measured to the track line (point
+     to segment, between consecutive track points), so a sparse track (fi. a point
+     every 100 m) matches as well as a dense one, as long as its straight lines do
+     not cut the bends of the segment by more than the tolerance (fi. a track with
+     a point every 80 m or more on hairpin bends). It runs in near-linear time:
+     - the track segments outside the bounding box of the segment are pruned;
+     - the remaining track segments are sampled (every `tolerance_m` at most) and
+       the samples are indexed in a grid (GridSpatialIndex), so each segment point
+       finds its near track segments without a full scan;
+     - each traversal is matched greedily (the earliest near position along the
+       track for each segment point, in order), so a failed start ends the search;
+     - the elapsed distance comes from the cumulative distances along the track.
+
+    Args:
+        segment: the segment: a polyline string, a sequence of (lat, lon) pairs, an
+         `array('d')` with interleaved lat, lon values or a NumPy N×2 array.
+        track: the activity track, in any of the formats of `segment`.
+        tolerance_m: the max distance in meters between a segment point and the
+         track (GPS noise).
+        max_distance_ratio: the max ratio between the distance along the track and
+         the length of the segment, to discard traversals that wander off.
+
+    Returns: a list of SegmentMatch, sorted by start_index. The start and end
+     indexes are the track points nearest to where the track passes by the first
+     and the last segment points.
+
+    Example:
+        matches = gis_utils.match_segment(segment_polyline, activity_polyline)
+        for match in matches:
+            print(match.start_index, match.end_index, match.distance_km)
+    """
+    seg_lats, seg_lons = _to_lats_lons(segment)
+    lats, lons = _to_lats_lons(track)
+    if len(seg_lats) < 2 or len(lats) < 2:
+        return []
+    seg_lats = [float(x) for x in seg_lats]
+    seg_lons = [float(x) for x in seg_lons]
+    tolerance_km = tolerance_m / 1000
+
+    # Prune the track segments (between the track points ix and ix + 1) whose
+    #  bounding box is outside the bounding box of the segment (+ tolerance).
+    dlat = tolerance_km / _KM_PER_DEG
+    max_abs_lat = min(89.0, max(abs(x) for x in seg_lats) + dlat)
+    dlon = dlat / math.cos(math.radians(max_abs_lat))
+    lat_min, lat_max = min(seg_lats) - dlat, max(seg_lats) + dlat
+    lon_min, lon_max = min(seg_lons) - dlon, max(seg_lons) + dlon
+    # Then sample the remaining track segments, so that every point of a track
+    #  segment is within tolerance / 2 from a sample: a track segment within
+    #  tolerance from a point has a sample within tolerance * 1.5.
+    np = _common.np
+    if np is None:
+        track_ixs = [
+            ix
+            for ix in range(len(lats) - 1)
+            if max(lats[ix], lats[ix + 1]) >= lat_min
+            and min(lats[ix], lats[ix + 1]) <= lat_max
+            and max(lons[ix], lons[ix + 1]) >= lon_min
+            and min(lons[ix], lons[ix + 1]) <= lon_max
+        ]
+        sample_coords = []
+        sample_track_ixs = []
+        for ix in track_ixs:
+            lat1, lon1, lat2, lon2 = lats[ix], lons[ix], lats[ix + 1], lons[ix + 1]
+            x, y = _to_local_km(lat1, lon1, lat2, lon2)
+            n_samples = max(1, math.ceil(math.hypot(x, y) / tolerance_km))
+            dlon_ix = (lon2 - lon1 + 180) % 360 - 180
+            for i in range(n_samples + 1):
+                t = i / n_samples
+                sample_coords.append((lat1 + (lat2 - lat1) * t, lon1 + dlon_ix * t))
+                sample_track_ixs.append(ix)
+    else:
+        is_inside = (
+            (np.maximum(lats[:-1], lats[1:]) >= lat_min)
+            & (np.minimum(lats[:-1], lats[1:]) <= lat_max)
+            & (np.maximum(lons[:-1], lons[1:]) >= lon_min)
+            & (np.minimum(lons[:-1], lons[1:]) <= lon_max)
+        )
+        ixs = np.flatnonzero(is_inside)
+        track_ixs = ixs.tolist()
+        lats1, lons1 = lats[ixs], lons[ixs]
+        dlats = lats[ixs + 1] - lats1
+        dlons = (lons[ixs + 1] - lons1 + 180) % 360 - 180
+        lengths = np.hypot(dlons * np.cos(np.radians(lats1)), dlats) * _KM_PER_DEG
+        n_samples = np.maximum(1, np.ceil(lengths / tolerance_km)).astype(np.int64)
+        # The samples of all the track segments at once: `rep` is the (pruned) track
+        #  segment of each sample, and `t` its position along the track segment.
+        rep = np.repeat(np.arange(len(ixs)), n_samples + 1)
+        firsts = np.cumsum(n_samples + 1) - (n_samples + 1)
+        t = (np.arange(len(rep)) - firsts[rep]) / n_samples[rep]
+        sample_coords = np.column_stack(
+            (lats1[rep] + dlats[rep] * t, lons1[rep] + dlons[rep] * t)
+        )
+        sample_track_ixs = ixs[rep].tolist()
+    if not track_ixs:
+        return []
+    index = GridSpatialIndex(sample_coords, cell_size_km=tolerance_km)
+
+    # For each segment point: the sorted positions along the track nearest to it.
+    near_positions = []
+    start_dists = None
+    for lat, lon in zip(seg_lats, seg_lons):
+        hits = index.query_radius(lat, lon, tolerance_km * 1.5)
+        ixs = list({sample_track_ixs[sample_ix] for sample_ix, _ in hits})
+        dists = _get_near_positions(lat, lon, ixs, lats, lons, tolerance_km)
+        if not dists:
+            # A segment point is never reached.
+            return []
+        if start_dists is None:
+            # The distances between the segment start and the track near it.
+            start_dists = dists
+        near_positions.append(sorted(dists))
+
+    segment_km = sum(
+        compute_great_circle_distances_along_track(list(zip(seg_lats, seg_lons)))
+    )
+    cumulative_km = cumulative_distance(
+        list(zip(lats, lons)) if np is None else np.column_stack((lats, lons))
+    )
+
+    def get_cumulative_km(position: float) -> float:
+        ix = min(int(position), len(lats) - 2)
+        t = position - ix
+        return float(
+            cumulative_km[ix] + (cumulative_km[ix + 1] - cumulative_km[ix]) * t
+        )
+
+    matches = []
+    last_end = -1.0
+    for start in near_positions[0]:
+        if start <= last_end:
+            continue
+        # Greedy in-order matching of the other segment points.
+        pos = start
+        first_pos = None
+        for positions in near_positions[1:]:
+            i = bisect_left(positions, pos)
+            if i == len(positions):
+                break
+            pos = positions[i]
+            if first_pos is None:
+                first_pos = pos
+        else:
+            # The best start is the position nearest to the segment start, before
+            #  reaching the 2nd segment point.
+            start = min(
+                (x for x in near_positions[0] if start <= x <= first_pos),
+                key=lambda x: (start_dists[x], x),
+            )
+            distance_km = get_cumulative_km(pos) - get_cumulative_km(start)
+            if distance_km <= segment_km * max_distance_ratio + tolerance_km * 2:
+                matches.append(SegmentMatch(round(start), round(pos), distance_km))
+                last_end = pos
+            continue
+        # The greedy matching failed: it would fail for any later start as well.
+        break
+    return matches
@@ -0,0 +1,208 @@
+"""
+** GIS UTILS: SIMILARITY **
+===========================
+
+Similarity between tracks, fi. to deduplicate and cluster activities: Hausdorff
+ distance and discrete Fréchet distance, both in km (great circle distances, like
+ compute_great_circle_distance()).
+Vectorized with NumPy (optional extra: pip install "gis-utils[numpy]"), with a
+ pure-Python fallback.
+
+```py
+import gis_utils
+
+coords1 = gis_utils.polyline_str_to_coords(polyline1)
+coords2 = gis_utils.polyline_str_to_coords(polyline2)
+dist = gis_utils.hausdorff_distance(coords1, coords2)
+# Early stop: math.inf as soon as the distance is known to be > 0.1 km.
+dist = gis_utils.frechet_distance(coords1, coords2, threshold_km=0.1)
+is_same_route = dist <= 0.1
+```
+"""
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "hausdorff_distance",
+    "frechet_distance",
+]
+
+import math
+from typing import Any
+
+from . import _common
+from .batch_distance import _np_great_circle, iter_distance_matrix_chunks
+from .gis_utils import compute_great_circle_distance
+from .track_utils import cumulative_distance, resample_by_distance
+
+
+def _downsample(coords: Any, max_points: int | None) -> Any:
+    # Resample a track with at most ~max_points points, evenly spaced along the
+    #  track: the error on the distances is at most about half a step.
+    lats, lons = _common.split_coords(coords)
+    if not len(lats):
+        raise ValueError("coords must not be empty")
+    if max_points is None or len(lats) <= max_points:
+        return coords
+    if max_points < 2:
+        raise ValueError("max_points must be >= 2")
+    total_km = cumulative_distance(coords)[-1]
+    if total_km == 0:
+        return [(lats[0], lons[0])]
+    return resample_by_distance(coords, step_m=total_km * 1000 / (max_points - 1))
+
+
+def hausdorff_distance(
+    coords1: Any,
+    coords2: Any,
+    threshold_km: float | None = None,
+    max_points: int | None = 2000,
+) -> float:
+    """
+    Compute the (symmetric) Hausdorff distance in km between 2 tracks: the max
+     distance between a point of a track and the nearest point of the other track.
+    It does not care about the order of the points (see frechet_distance()).
+    The distances are computed in chunks of a distance matrix (see
+     iter_distance_matrix_chunks()), so the memory is bounded.
+
+    Args:
+        coords1: a track: a sequence of (lat, lon) pairs, an `array('d')` with
+         interleaved lat, lon values or a NumPy N×2 array.
+        coords2: the other track, in any of the formats of `coords1`.
+        threshold_km: if given, the result is math.inf as soon as the distance is
+         known to be > threshold_km (early stop).
+        max_points: longer tracks are downsampled to ~max_points points (evenly
+         spaced along the track) to bound the O(n·m) cost; None to never downsample.
+
+    Returns: the distance in km (or math.inf, see `threshold_km`).
+
+    Example:
+        dist = gis_utils.hausdorff_distance(coords1, coords2, threshold_km=0.1)
+    """
+    coords1 = _downsample(coords1, max_points)
+    coords2 = _downsample(coords2, max_points)
+    np = _common.np
+    threshold = math.inf if threshold_km is None else threshold_km
+
+    result = 0.0
+    # The min distance from each point of coords2 to coords1, updated chunk by chunk.
+    col_mins = None
+    for _, chunk in iter_distance_matrix_chunks(coords1, coords2):
+        if np is None:
+            row_max = max(min(row) for row in chunk)
+            mins = [min(col) for col in zip(*chunk)]
+            col_mins = mins if col_mins is None else list(map(min, col_mins, mins))
+        else:
+            row_max = float(chunk.min(axis=1).max())
+            mins = chunk.min(axis=0)
+            col_mins = mins if col_mins is None else np.minimum(col_mins, mins)
+        result = max(result, row_max)
+        if result > threshold:
+            return math.inf
+    result = max(result, float(max(col_mins)))
+    return math.inf if result > threshold else result
+
+
+def frechet_distance(
+    coords1: Any,
+    coords2: Any,
+    threshold_km: float | None = None,
+    max_points: int | None = 1000,
+) -> float:
+    """
+    Compute the discrete Fréchet distance in km between 2 tracks: the min, over all
+     the ways to walk both tracks forward (without going back), of the max distance
+     between the 2 walkers. Unlike hausdorff_distance(), it cares about the order of
+     the points: fi. a track and its reverse are far apart.
+    Theory: https://en.wikipedia.org/wiki/Fr%C3%A9chet_distance
+
+    It is a O(n·m) dynamic programming. With NumPy, it is vectorized one
+     anti-diagonal at a time, computing the distances on the fly, so the memory is
+     O(n + m). With `threshold_km`, it stops as soon as every walk is known to get
+     farther than the threshold.
+
+    Args:
+        coords1: a track: a sequence of (lat, lon) pairs, an `array('d')` with
+         interleaved lat, lon values or a NumPy N×2 array.
+        coords2: the other track, in any of the formats of `coords1`.
+        threshold_km: if given, the result is math.inf as soon as the distance is
+         known to be > threshold_km (early stop).
+        max_points: longer tracks are downsampled to ~max_points points (evenly
+         spaced along the track) to bound the O(n·m) cost; None to never downsample.
+
+    Returns: the distance in km (or math.inf, see `threshold_km`).
+
+    Example:
+        dist = gis_utils.frechet_distance(coords1, coords2, threshold_km=0.1)
+        is_same_route = dist <= 0.1
+    """
+    lats1, lons1 = _common.split_coords(_downsample(coords1, max_points))
+    lats2, lons2 = _common.split_coords(_downsample(coords2, max_points))
+    n = len(lats1)
+    m = len(lats2)
+    threshold = math.inf if threshold_km is None else threshold_km
+
+    # Cheap lower bound: every walk starts at the 2 starts and ends at the 2 ends.
+    bound = max(
+        compute_great_circle_distance(lats1[0], lons1[0], lats2[0], lons2[0]),
+        compute_great_circle_distance(lats1[-1], lons1[-1], lats2[-1], lons2[-1]),
+    )
+    if bound > threshold:
+        return math.inf
+
+    np = _common.np
+    if np is None:
+        # Row by row: every walk goes through every row, so a row that is all above
+        #  the threshold ends the search.
+        prev = None
+        for i in range(n):
+            row = []
+            for j in range(m):
+                dist = compute_great_circle_distance(
+                    lats1[i], lons1[i], lats2[j], lons2[j]
+                )
+                if i == 0 and j == 0:
+                    best = 0.0
+                elif i == 0:
+                    best = row[j - 1]
+                elif j == 0:
+                    best = prev[0]
+                else:
+                    best = min(prev[j], prev[j - 1], row[j - 1])
+                row.append(max(dist, best))
+            if min(row) > threshold:
+                return math.inf
+            prev = row
+        result = prev[-1]
+        return math.inf if result > threshold else result
+
+    lats1, lons1 = np.radians(lats1), np.radians(lons1)
+    lats2, lons2 = np.radians(lats2), np.radians(lons2)
+    cos_lats1, cos_lats2 = np.cos(lats1), np.cos(lats2)
+    # The values on the last 2 anti-diagonals (i + j == k), indexed by i + 1: the
+    #  item 0 (i == -1) and the cells out of the matrix are inf.
+    prev2 = np.full(n + 1, np.inf)
+    prev1 = np.full(n + 1, np.inf)
+    for k in range(n + m - 1):
+        rows = np.arange(max(0, k - m + 1), min(k, n - 1) + 1)
+        cols = k - rows
+        dists = _np_great_circle(
+            lats1[rows],
+            lons1[rows],
+            lats2[cols],
+            lons2[cols],
+            cos_lats1[rows],
+            cos_lats2[cols],
+        )
+        cur = np.full(n + 1, np.inf)
+        if k == 0:
+            cur[1] = dists[0]
+        else:
+            # From (i-1, j), (i-1, j-1) and (i, j-1).
+            best = np.minimum(np.minimum(prev1[rows], prev2[rows]), prev1[rows + 1])
+            cur[rows + 1] = np.maximum(dists, best)
+        # A walk can skip an anti-diagonal (with a diagonal step), but not 2.
+        if cur.min() > threshold and prev1.min() > threshold:
+            return math.inf
+        prev2, prev1 = prev1, cur
+    result = float(prev1[n])
+    return math.inf if result > threshold else result
@@ -0,0 +1,322 @@
+"""
+** GIS UTILS: SIMPLIFY **
+=========================
+
+Track simplification, to reduce dense tracks (like those decoded with
+ polyline_str_to_coords()) for rendering or storage.
+Both algorithms are iterative (no recursion) and vectorized with NumPy (optional
+ extra: pip install "gis-utils[numpy]"), with a pure-Python fallback.
+
+```py
+import gis_utils
+
+coords = gis_utils.polyline_str_to_coords(polyline)
+# Drop the points that are closer than 10 m to the simplified track.
+simple = gis_utils.simplify_douglas_peucker(coords, tolerance_m=10)
+# Keep the 100 most significant points.
+simple = gis_utils.simplify_douglas_peucker(coords, max_points=100)
+simple = gis_utils.simplify_visvalingam(coords, max_points=100)
+```
+"""
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "simplify_douglas_peucker",
+    "simplify_visvalingam",
+]
+
+import heapq
+import math
+from typing import Any
+
+from . import _common
+
+
+def _validate_args(tolerance_m: float | None, max_points: int | None) -> None:
+    if tolerance_m is None and max_points is None:
+        raise ValueError("tolerance_m or max_points is required")
+    if tolerance_m is not None and tolerance_m < 0:
+        raise ValueError("tolerance_m must be >= 0")
+    if max_points is not None and max_points < 2:
+        raise ValueError("max_points must be >= 2")
+
+
+def _project_to_meters(lats, lons) -> tuple:
+    # Local equirectangular projection, in meters, centered on the mean latitude.
+    #  It is accurate enough for tracks up to a few hundreds km.
+    r = _common.EARTH_RADIUS_KM * 1000
+    np = _common.np
+    if np is None:
+        lat0 = sum(lats) / len(lats)
+        lon0 = lons[0]
+        k = r * math.cos(math.radians(lat0))
+        # Note: lons are wrapped around lon0 to handle tracks across the antimeridian.
+        xs = [k * math.radians((lon - lon0 + 180) % 360 - 180) for lon in lons]
+        ys = [r * math.radians(lat) for lat in lats]
+        return xs, ys
+    k = r * math.cos(math.radians(float(lats.mean())))
+    xs = k * np.radians((lons - lons[0] + 180) % 360 - 180)
+    ys = r * np.radians(lats)
+    return xs, ys
+
+
+def _build_result(lats, lons, ixs: list[int], do_return_indexes: bool):
+    if do_return_indexes:
+        return ixs
+    np = _common.np
+    if np is None:
+        return tuple((lats[ix], lons[ix]) for ix in ixs)
+    return np.column_stack((lats[ixs], lons[ixs]))
+
+
+def _get_farthest_point(xs, ys, start: int, end: int) -> tuple[float, int]:
+    # The point in (start, end) farthest from the segment start-end.
+    np = _common.np
+    ax, ay = xs[start], ys[start]
+    dx, dy = xs[end] - ax, ys[end] - ay
+    length2 = dx * dx + dy * dy
+    if np is None:
+        best_dist2, best_ix = -1.0, start + 1
+        for ix in range(start + 1, end):
+            px, py = xs[ix] - ax, ys[ix] - ay
+            t = (
+                0.0
+                if length2 == 0
+                else min(1.0, max(0.0, (px * dx + py * dy) / length2))
+            )
+            dist2 = (px - t * dx) ** 2 + (py - t * dy) ** 2
+            if dist2 > best_dist2:
+                best_dist2, best_ix = dist2, ix
+        return math.sqrt(best_dist2), best_ix
+
+    px = xs[start + 1 : end] - ax
+    py = ys[start + 1 : end] - ay
+    if length2 == 0:
+        t = 0.0
+    else:
+        t = np.clip((px * dx + py * dy) / length2, 0.0, 1.0)
+    dists2 = (px - t * dx) ** 2 + (py - t * dy) ** 2
+    ix = int(dists2.argmax())
+    return math.sqrt(float(dists2[ix])), start + 1 + ix
+
+
+def _douglas_peucker_in_rounds(xs, ys, tolerance_m: float) -> list[int]:
+    # NumPy Douglas-Peucker with a tolerance: in each round all the segments that
+    #  still need a split are processed together, in bulk. So the number of rounds
+    #  is the depth of the recursion in the classic algorithm, about log(N).
+    np = _common.np
+    n_points = len(xs)
+    kept = [np.array([0, n_points - 1])]
+    starts = np.array([0])
+    ends = np.array([n_points - 1])
+    while len(starts):
+        lengths = ends - starts - 1
+        is_long = lengths > 0
+        starts, ends, lengths = starts[is_long], ends[is_long], lengths[is_long]
+        if not len(starts):
+            break
+        # The interior points of all the segments, concatenated.
+        offsets = np.zeros(len(starts), dtype=np.int64)
+        offsets[1:] = np.cumsum(lengths)[:-1]
+        seg_ixs = np.repeat(np.arange(len(starts)), lengths)
+        ixs = np.arange(lengths.sum()) - offsets[seg_ixs] + starts[seg_ixs] + 1
+        ax, ay = xs[starts][seg_ixs], ys[starts][seg_ixs]
+        dx, dy = xs[ends][seg_ixs] - ax, ys[ends][seg_ixs] - ay
+        px, py = xs[ixs] - ax, ys[ixs] - ay
+        length2 = dx * dx + dy * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(length2 > 0, (px * dx + py * dy) / length2, 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        dists2 = (px - t * dx) ** 2 + (py - t * dy) ** 2
+        # The farthest point in each segment.
+        max_dists2 = np.maximum.reduceat(dists2, offsets)
+        is_max = dists2 == max_dists2[seg_ixs]
+        _, first = np.unique(seg_ixs[is_max], return_index=True)
+        farthest = ixs[is_max][first]
+
+        is_split = max_dists2 > tolerance_m**2
+        farthest = farthest[is_split]
+        kept.append(farthest)
+        starts, ends = (
+            np.concatenate((starts[is_split], farthest)),
+            np.concatenate((farthest, ends[is_split])),
+        )
+    return np.unique(np.concatenate(kept)).tolist()
+
+
+def simplify_douglas_peucker(
+    coords: Any,
+    tolerance_m: float | None = None,
+    max_points: int | None = None,
+    do_return_indexes: bool = False,
+):
+    """
+    Simplify a track with the Douglas-Peucker algorithm: it drops all the points
+     that are within `tolerance_m` from the simplified track.
+    Theory: https://en.wikipedia.org/wiki/Ramer%E2%80%93Douglas%E2%80%93Peucker_algorithm
+
+    It is iterative and the result is the same as the classic recursive algorithm:
+     - with `tolerance_m` only (and NumPy), all the segments that need a split are
+       processed in bulk, in about log(N) rounds;
+     - with `max_points`, a heap of segments where the segment with the farthest
+       point is split first, until `max_points` are kept (so the tolerance is picked
+       automatically). The distances for a segment are computed in bulk with NumPy,
+       so the Python overhead is per kept point, not per point.
+
+    Args:
+        coords: the track: a sequence of (lat, lon) pairs, an `array('d')` with
+         interleaved lat, lon values or a NumPy N×2 array.
+        tolerance_m: the max distance in meters between a dropped point and the
+         simplified track.
+        max_points: the max number of points to keep (at least 2).
+        do_return_indexes: True to return the indexes of the kept points.
+
+    Returns: the simplified track, as a NumPy N×2 array (or a tuple of (lat, lon)
+     without NumPy), or the sorted list of the indexes of the kept points.
+
+    Example:
+        coords = gis_utils.polyline_str_to_coords(polyline)
+        simple = gis_utils.simplify_douglas_peucker(coords, tolerance_m=10)
+    """
+    _validate_args(tolerance_m, max_points)
+    lats, lons = _common.split_coords(coords)
+    n_points = len(lats)
+    if n_points <= 2:
+        return _build_result(lats, lons, list(range(n_points)), do_return_indexes)
+    xs, ys = _project_to_meters(lats, lons)
+    if max_points is None:
+        if _common.np is not None:
+            ixs = _douglas_peucker_in_rounds(xs, ys, tolerance_m)
+            return _build_result(lats, lons, ixs, do_return_indexes)
+        max_points = n_points
+
+    kept = [0, n_points - 1]
+    # Heap of segments: (-distance of the farthest point, start, end, farthest point).
+    heap = []
+
+    def push_segment(start: int, end: int):
+        if end - start >= 2:
+            dist, ix = _get_farthest_point(xs, ys, start, end)
+            heapq.heappush(heap, (-dist, start, end, ix))
+
+    push_segment(0, n_points - 1)
+    while heap and len(kept) < max_points:
+        neg_dist, start, end, ix = heapq.heappop(heap)
+        if tolerance_m is not None and -neg_dist <= tolerance_m:
+            break
+        kept.append(ix)
+        push_segment(start, ix)
+        push_segment(ix, end)
+
+    return _build_result(lats, lons, sorted(kept), do_return_indexes)
+
+
+def _get_areas(xs, ys, ixs):
+    # The area of the triangle of each interior point of `ixs` with its neighbors.
+    np = _common.np
+    if np is None:
+        areas = []
+        for i in range(1, len(ixs) - 1):
+            a, b, c = ixs[i - 1], ixs[i], ixs[i + 1]
+            areas.append(
+                abs(
+                    (xs[b] - xs[a]) * (ys[c] - ys[a])
+                    - (xs[c] - xs[a]) * (ys[b] - ys[a])
+                )
+                / 2
+            )
+        return areas
+    ax, ay = xs[ixs[:-2]], ys[ixs[:-2]]
+    bx, by = xs[ixs[1:-1]], ys[ixs[1:-1]]
+    cx, cy = xs[ixs[2:]], ys[ixs[2:]]
+    return np.abs((bx - ax) * (cy - ay) - (cx - ax) * (by - ay)) / 2
+
+
+def _drop_adjacent(positions: list[int]) -> list[int]:
+    # From a sorted list of positions, drop every other position in each run of
+    #  consecutive ones, so that no 2 neighbors are removed in the same round.
+    result = []
+    last = -2
+    for pos in positions:
+        if pos != last + 1:
+            result.append(pos)
+            last = pos
+        else:
+            last = -2
+    return result
+
+
+def simplify_visvalingam(
+    coords: Any,
+    tolerance_m: float | None = None,
+    max_points: int | None = None,
+    do_return_indexes: bool = False,
+):
+    """
+    Simplify a track with the Visvalingam-Whyatt algorithm: it drops the points that
+     form, with their neighbors, a triangle with an area below `tolerance_m`² (the
+     area of a square with side `tolerance_m`).
+    Theory: https://en.wikipedia.org/wiki/Visvalingam%E2%80%93Whyatt_algorithm
+
+    It is a batched variant: instead of dropping one point at a time (which means
+     Python overhead per point), each round drops in bulk all the smallest triangles,
+     but never 2 neighbors at once. So the number of rounds is about log(N).
+
+    Args:
+        coords: the track: a sequence of (lat, lon) pairs, an `array('d')` with
+         interleaved lat, lon values or a NumPy N×2 array.
+        tolerance_m: the side in meters of the square with the min area.
+        max_points: the max number of points to keep (at least 2).
+        do_return_indexes: True to return the indexes of the kept points.
+
+    Returns: the simplified track, as a NumPy N×2 array (or a tuple of (lat, lon)
+     without NumPy), or the sorted list of the indexes of the kept points.
+
+    Example:
+        coords = gis_utils.polyline_str_to_coords(polyline)
+        simple = gis_utils.simplify_visvalingam(coords, max_points=100)
+    """
+    _validate_args(tolerance_m, max_points)
+    lats, lons = _common.split_coords(coords)
+    n_points = len(lats)
+    if n_points <= 2:
+        return _build_result(lats, lons, list(range(n_points)), do_return_indexes)
+    # Note: with no tolerance, no area is below the min area.
+    min_area = 0 if tolerance_m is None else tolerance_m**2
+    if max_points is None:
+        max_points = n_points
+
+    xs, ys = _project_to_meters(lats, lons)
+    np = _common.np
+    ixs = list(range(n_points)) if np is None else np.arange(n_points)
+    while len(ixs) > 2:
+        areas = _get_areas(xs, ys, ixs)
+        n_to_drop = len(ixs) - max_points
+        if n_to_drop <= 0 and tolerance_m is None:
+            break
+
+        # Candidates (positions in `areas`): the triangles below the min area, or,
+        #  when there are too many points, the smallest n_to_drop triangles.
+        if np is None:
+            order = sorted(range(len(areas)), key=areas.__getitem__)
+            candidates = [pos for pos in order if areas[pos] < min_area]
+            if n_to_drop > 0:
+                candidates = order[: max(n_to_drop, len(candidates))]
+            positions = _drop_adjacent(sorted(candidates))
+        else:
+            candidates = np.flatnonzero(areas < min_area)
+            if n_to_drop > len(candidates):
+                candidates = np.argpartition(areas, n_to_drop - 1)[:n_to_drop]
+            positions = _drop_adjacent(np.sort(candidates).tolist())
+        if not positions:
+            break
+        # Positions in `areas` are shifted by 1 wrt `ixs` (the 1st point has no area).
+        drop = [pos + 1 for pos in positions]
+        if np is None:
+            drop = set(drop)
+            ixs = [ix for i, ix in enumerate(ixs) if i not in drop]
+        else:
+            ixs = np.delete(ixs, drop)
+
+    ixs = list(ixs) if np is None else ixs.tolist()
+    return _build_result(lats, lons, ixs, do_return_indexes)
@@ -0,0 +1,208 @@
+"""
+** GIS UTILS: SPATIAL INDEX **
+==============================
+
+A uniform grid (bucket) index over coordinates, for nearest-neighbour (k-NN) and
+ radius queries without a O(n) loop over compute_great_circle_distance().
+Candidates are pruned with the grid cells, then distances are exact (Haversine,
+ like compute_great_circle_distance()).
+
+```py
+import gis_utils
+
+index = gis_utils.GridSpatialIndex(activity_start_coords, cell_size_km=2)
+# Points within 2 km of Bormio, as a list of (point index, distance in km).
+hits = index.query_radius(46.46961, 10.36953, radius_km=2)
+# The 3 points nearest to Bormio.
+hits = index.query_nearest(46.46961, 10.36953, k=3)
+# Incremental insert: it returns the index of the new point.
+ix = index.insert(46.5, 10.4)
+```
+"""
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "GridSpatialIndex",
+]
+
+import math
+from array import array
+from typing import Any
+
+from . import _common
+from .batch_distance import compute_great_circle_distances_to_point
+
+# 1 degree of latitude in km.
+_KM_PER_DEG = math.pi * _common.EARTH_RADIUS_KM / 180
+
+
+class GridSpatialIndex:
+    """
+    Spatial index that buckets points in a uniform grid of lat, lon cells.
+
+    Args:
+        coords: the points to bulk-load: a sequence of (lat, lon) pairs, an
+         `array('d')` with interleaved lat, lon values or a NumPy N×2 array.
+         Default: no points.
+        cell_size_km: the size of a cell (along a meridian). The best value is
+         about the typical query radius.
+    """
+
+    def __init__(self, coords: Any = None, cell_size_km: float = 1.0):
+        if cell_size_km <= 0:
+            raise ValueError("cell_size_km must be > 0")
+        self.cell_size_deg = cell_size_km / _KM_PER_DEG
+        self.n_rows = math.ceil(180 / self.cell_size_deg)
+        self.n_cols = math.ceil(360 / self.cell_size_deg)
+        # The width of a column is snapped so that the columns divide 360 exactly
+        #  (no partial column at the antimeridian).
+        self.col_size_deg = 360 / self.n_cols
+        # The points, stored compactly; a point index is its position here.
+        self.lats = array("d")
+        self.lons = array("d")
+        # Cell key -> point indexes.
+        self.cells: dict[int, list[int]] = dict()
+        if coords is not None:
+            self.bulk_insert(coords)
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def _get_row(self, lat: float) -> int:
+        return min(int((lat + 90) // self.cell_size_deg), self.n_rows - 1)
+
+    def _get_col(self, lon: float) -> int:
+        # Note: `lon` is normalized to [-180, 180) first, as it can be out of range
+        #  (fi. lon + dlon in a query).
+        return min(int((lon + 180) % 360 // self.col_size_deg), self.n_cols - 1)
+
+    def insert(self, lat: float, lon: float) -> int:
+        """
+        Insert a single point.
+
+        Returns: the index of the new point.
+        """
+        ix = len(self.lats)
+        self.lats.append(lat)
+        self.lons.append(lon)
+        key = self._get_row(lat) * self.n_cols + self._get_col(lon)
+        self.cells.setdefault(key, []).append(ix)
+        return ix
+
+    def bulk_insert(self, coords: Any) -> range:
+        """
+        Insert many points; with NumPy, the cells are computed in bulk.
+
+        Returns: the range of indexes of the new points.
+        """
+        lats, lons = _common.split_coords(coords)
+        first_ix = len(self.lats)
+        np = _common.np
+        if np is None:
+            for lat, lon in zip(lats, lons):
+                self.insert(lat, lon)
+            return range(first_ix, len(self.lats))
+
+        if not len(lats):
+            return range(first_ix, first_ix)
+        self.lats.frombytes(np.ascontiguousarray(lats).tobytes())
+        self.lons.frombytes(np.ascontiguousarray(lons).tobytes())
+        rows = np.minimum((lats + 90) // self.cell_size_deg, self.n_rows - 1)
+        cols = np.minimum((lons + 180) % 360 // self.col_size_deg, self.n_cols - 1)
+        keys = rows.astype(np.int64) * self.n_cols + cols.astype(np.int64)
+        # Group the points by cell with a single sort.
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        bounds = np.flatnonzero(np.diff(sorted_keys)) + 1
+        ixs = (order + first_ix).tolist()
+        starts = [0] + bounds.tolist()
+        ends = bounds.tolist() + [len(ixs)]
+        for key, start, end in zip(sorted_keys[starts].tolist(), starts, ends):
+            self.cells.setdefault(key, []).extend(ixs[start:end])
+        return range(first_ix, len(self.lats))
+
+    def _get_candidates(self, lat: float, lon: float, radius_km: float) -> list[int]:
+        # All the points in the cells that intersect the bounding box of the circle.
+        #  Note: a tiny margin is added to be safe wrt rounding errors.
+        dlat = radius_km / _KM_PER_DEG + 1e-9
+        row_min = self._get_row(max(lat - dlat, -90))
+        row_max = self._get_row(min(lat + dlat, 90))
+
+        angle = radius_km / _common.EARTH_RADIUS_KM
+        cols = None  # None means all the columns (all longitudes).
+        if lat + dlat < 90 and lat - dlat > -90 and angle < math.pi / 2:
+            # The circle does not include a pole: the max longitude difference is
+            #  the one of a spherical cap.
+            ratio = math.sin(angle) / math.cos(math.radians(lat))
+            if ratio < 1:
+                dlon = math.degrees(math.asin(ratio)) + 1e-9
+                col_min = self._get_col(lon - dlon)
+                n_cols = (self._get_col(lon + dlon) - col_min) % self.n_cols + 1
+                if 2 * dlon + self.col_size_deg < 360:
+                    cols = [(col_min + i) % self.n_cols for i in range(n_cols)]
+
+        n_cells = (row_max - row_min + 1) * (len(cols) if cols else self.n_cols)
+        candidates = []
+        if n_cells > len(self.cells):
+            # Cheaper to scan all the non-empty cells.
+            col_set = set(cols) if cols else None
+            for key, ixs in self.cells.items():
+                row, col = divmod(key, self.n_cols)
+                if row_min <= row <= row_max and (col_set is None or col in col_set):
+                    candidates.extend(ixs)
+            return candidates
+
+        for row in range(row_min, row_max + 1):
+            for col in cols if cols else range(self.n_cols):
+                ixs = self.cells.get(row * self.n_cols + col)
+                if ixs:
+                    candidates.extend(ixs)
+        return candidates
+
+    def _get_distances(self, lat: float, lon: float, ixs: list[int]) -> list:
+        np = _common.np
+        if np is None:
+            coords = [(self.lats[ix], self.lons[ix]) for ix in ixs]
+            return compute_great_circle_distances_to_point(lat, lon, coords)
+        lats = np.frombuffer(self.lats, dtype=np.float64)
+        lons = np.frombuffer(self.lons, dtype=np.float64)
+        ixs = np.asarray(ixs, dtype=np.int64)
+        coords = np.column_stack((lats[ixs], lons[ixs]))
+        return compute_great_circle_distances_to_point(lat, lon, coords).tolist()
+
+    def query_radius(
+        self, lat: float, lon: float, radius_km: float
+    ) -> list[tuple[int, float]]:
+        """
+        Find all the points within `radius_km` from the given point.
+
+        Returns: a list of tuples (point index, distance in km), sorted by distance.
+        """
+        ixs = self._get_candidates(lat, lon, radius_km)
+        if not ixs:
+            return []
+        dists = self._get_distances(lat, lon, ixs)
+        hits = [(ix, dist) for ix, dist in zip(ixs, dists) if dist <= radius_km]
+        hits.sort(key=lambda x: (x[1], x[0]))
+        return hits
+
+    def query_nearest(
+        self, lat: float, lon: float, k: int = 1
+    ) -> list[tuple[int, float]]:
+        """
+        Find the k points nearest to the given point (k-NN).
+
+        Returns: a list of (at most k) tuples (point index, distance in km), sorted by
+         distance.
+        """
+        if k < 1:
+            raise ValueError("k must be > 0")
+        # Radius queries with a growing radius: as soon as a radius query finds at
+        #  least k points, the k nearest are the first k (the result is exact).
+        radius_km = self.cell_size_deg * _KM_PER_DEG
+        max_radius_km = math.pi * _common.EARTH_RADIUS_KM
+        while True:
+            hits = self.query_radius(lat, lon, radius_km)
+            if len(hits) >= k or radius_km >= max_radius_km:
+                return hits[:k]
+            radius_km *= 2
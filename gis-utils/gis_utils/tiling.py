@@ -0,0 +1,335 @@
+"""
+** GIS UTILS: TILING **
+=======================
+
+Batch encoding and decoding of geohashes and slippy-map tiles (z/x/y, like in
+ OpenStreetMap and Google Maps), to bucket many points for aggregation and caching.
+Vectorized with NumPy (optional extra: pip install "gis-utils[numpy]"), with a
+ pure-Python fallback.
+
+```py
+import gis_utils
+
+coords = gis_utils.polyline_str_to_coords(polyline)
+geohashes = gis_utils.encode_geohashes(coords, precision=7)
+xs, ys = gis_utils.coords_to_tiles(coords, zoom=14)
+tiles = gis_utils.bbox_to_tile_cover(46.4, 10.3, 46.5, 10.4, zoom=14)
+# Points grouped by tile: {(14, x, y): [point index, ...]}.
+groups = gis_utils.group_by_tile(coords, zoom=14)
+```
+"""
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "encode_geohashes",
+    "decode_geohashes",
+    "coords_to_tiles",
+    "tiles_to_coords",
+    "bbox_to_tile_cover",
+    "group_by_tile",
+]
+
+import math
+from typing import Any, Iterable
+
+from . import _common
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+_GEOHASH_DECODE_MAP = {char: i for i, char in enumerate(_GEOHASH_ALPHABET)}
+
+# The max latitude of the Web Mercator projection (used by slippy-map tiles).
+_MAX_MERCATOR_LAT = 85.0511287798066
+
+
+def _interleave_bits(lat_bits: int, lon_bits: int, n_bits: int) -> int:
+    # Interleave the bits of lon (even positions, starting from the most significant)
+    #  and lat (odd positions), like in a geohash.
+    n_lon_bits = (n_bits + 1) // 2
+    n_lat_bits = n_bits // 2
+    value = 0
+    for i in range(n_bits):
+        if i % 2 == 0:
+            bit = (lon_bits >> (n_lon_bits - 1 - i // 2)) & 1
+        else:
+            bit = (lat_bits >> (n_lat_bits - 1 - i // 2)) & 1
+        value = (value << 1) | bit
+    return value
+
+
+def encode_geohashes(coords: Any, precision: int = 9) -> list[str]:
+    """
+    Encode many points into geohashes.
+    Theory: https://en.wikipedia.org/wiki/Geohash
+
+    Args:
+        coords: a sequence of (lat, lon) pairs, an `array('d')` with interleaved lat,
+         lon values or a NumPy N×2 array.
+        precision: the number of chars of each geohash (1 to 12): fi. 5 is ~5 km,
+         7 is ~150 m, 9 is ~5 m.
+
+    Returns: a list of geohash strings.
+
+    Example:
+        geohashes = gis_utils.encode_geohashes([(46.46961, 10.36953)], precision=7)
+        assert geohashes == ["u0r27gw"]
+    """
+    if not 1 <= precision <= 12:
+        raise ValueError("precision must be between 1 and 12")
+    lats, lons = _common.split_coords(coords)
+    n_bits = precision * 5
+    n_lon_bits = (n_bits + 1) // 2
+    n_lat_bits = n_bits // 2
+
+    np = _common.np
+    if np is None:
+        result = []
+        for lat, lon in zip(lats, lons):
+            lat_bits = min(
+                int((lat + 90) / 180 * (1 << n_lat_bits)), (1 << n_lat_bits) - 1
+            )
+            lon_bits = min(
+                int((lon + 180) / 360 * (1 << n_lon_bits)), (1 << n_lon_bits) - 1
+            )
+            value = _interleave_bits(lat_bits, lon_bits, n_bits)
+            result.append(
+                "".join(
+                    _GEOHASH_ALPHABET[(value >> (5 * (precision - 1 - i))) & 0x1F]
+                    for i in range(precision)
+                )
+            )
+        return result
+
+    if not len(lats):
+        return []
+    lat_bits = np.minimum(
+        ((lats + 90) / 180 * (1 << n_lat_bits)).astype(np.int64), (1 << n_lat_bits) - 1
+    )
+    lon_bits = np.minimum(
+        ((lons + 180) / 360 * (1 << n_lon_bits)).astype(np.int64), (1 << n_lon_bits) - 1
+    )
+    # Interleave the bits, one bit position at a time for all the points at once.
+    values = np.zeros(len(lats), dtype=np.int64)
+    for i in range(n_bits):
+        if i % 2 == 0:
+            bit = (lon_bits >> (n_lon_bits - 1 - i // 2)) & 1
+        else:
+            bit = (lat_bits >> (n_lat_bits - 1 - i // 2)) & 1
+        values = (values << 1) | bit
+    # Split in 5-bit chars and map them to the alphabet with a lookup table.
+    shifts = 5 * np.arange(precision - 1, -1, -1, dtype=np.int64)
+    char_ixs = (values[:, np.newaxis] >> shifts) & 0x1F
+    alphabet = np.frombuffer(_GEOHASH_ALPHABET.encode(), dtype=np.uint8)
+    chars = alphabet[char_ixs]
+    return chars.view(f"S{precision}").ravel().astype(str).tolist()
+
+
+def decode_geohashes(geohashes: Iterable[str]):
+    """
+    Decode many geohashes into the coords of the centers of their cells.
+
+    Args:
+        geohashes: an iterable of geohash strings, all with the same length.
+
+    Returns: a NumPy N×2 array of (lat, lon) (or a tuple of (lat, lon) without NumPy).
+
+    Example:
+        coords = gis_utils.decode_geohashes(["u0r27gw"])
+    """
+    geohashes = list(geohashes)
+    precision = len(geohashes[0]) if geohashes else 0
+    if any(len(x) != precision for x in geohashes):
+        raise ValueError("all geohashes must have the same length")
+    n_bits = precision * 5
+    n_lon_bits = (n_bits + 1) // 2
+    n_lat_bits = n_bits // 2
+
+    np = _common.np
+    if np is None:
+        result = []
+        for geohash in geohashes:
+            value = 0
+            for char in geohash:
+                if char not in _GEOHASH_DECODE_MAP:
+                    raise ValueError("invalid geohash char")
+                value = (value << 5) | _GEOHASH_DECODE_MAP[char]
+            lat_bits = lon_bits = 0
+            for i in range(n_bits):
+                bit = (value >> (n_bits - 1 - i)) & 1
+                if i % 2 == 0:
+                    lon_bits = (lon_bits << 1) | bit
+                else:
+                    lat_bits = (lat_bits << 1) | bit
+            result.append(
+                (
+                    (lat_bits + 0.5) / (1 << n_lat_bits) * 180 - 90,
+                    (lon_bits + 0.5) / (1 << n_lon_bits) * 360 - 180,
+                )
+            )
+        return tuple(result)
+
+    if not geohashes:
+        return np.empty((0, 2), dtype=np.float64)
+    # Map the chars to their values with a lookup table (invalid chars -> 255).
+    table = np.full(256, 255, dtype=np.uint8)
+    table[np.frombuffer(_GEOHASH_ALPHABET.encode(), dtype=np.uint8)] = np.arange(32)
+    chars = np.frombuffer("".join(geohashes).encode("ascii"), dtype=np.uint8)
+    char_values = table[chars].reshape(len(geohashes), precision)
+    if (char_values == 255).any():
+        raise ValueError("invalid geohash char")
+    values = np.zeros(len(geohashes), dtype=np.int64)
+    for i in range(precision):
+        values = (values << 5) | char_values[:, i]
+    lat_bits = np.zeros(len(geohashes), dtype=np.int64)
+    lon_bits = np.zeros(len(geohashes), dtype=np.int64)
+    for i in range(n_bits):
+        bit = (values >> (n_bits - 1 - i)) & 1
+        if i % 2 == 0:
+            lon_bits = (lon_bits << 1) | bit
+        else:
+            lat_bits = (lat_bits << 1) | bit
+    return np.column_stack(
+        (
+            (lat_bits + 0.5) / (1 << n_lat_bits) * 180 - 90,
+            (lon_bits + 0.5) / (1 << n_lon_bits) * 360 - 180,
+        )
+    )
+
+
+def coords_to_tiles(coords: Any, zoom: int) -> tuple:
+    """
+    Compute the slippy-map tile (x, y) that contains each point, at the given zoom.
+    Theory: https://wiki.openstreetmap.org/wiki/Slippy_map_tilenames
+
+    Args:
+        coords: a sequence of (lat, lon) pairs, an `array('d')` with interleaved lat,
+         lon values or a NumPy N×2 array.
+        zoom: the zoom level (0 to 30).
+
+    Returns: a tuple (xs, ys) of 2 NumPy int64 arrays (or 2 lists of int without
+     NumPy).
+
+    Example:
+        xs, ys = gis_utils.coords_to_tiles([(46.46961, 10.36953)], zoom=14)
+        assert (xs[0], ys[0]) == (8663, 5797)
+    """
+    if not 0 <= zoom <= 30:
+        raise ValueError("zoom must be between 0 and 30")
+    lats, lons = _common.split_coords(coords)
+    n = 1 << zoom
+
+    np = _common.np
+    if np is None:
+        xs = []
+        ys = []
+        for lat, lon in zip(lats, lons):
+            lat = math.radians(max(-_MAX_MERCATOR_LAT, min(_MAX_MERCATOR_LAT, lat)))
+            xs.append(min(int((lon + 180) / 360 * n), n - 1))
+            y = (1 - math.asinh(math.tan(lat)) / math.pi) / 2 * n
+            ys.append(min(max(int(y), 0), n - 1))
+        return xs, ys
+
+    lats = np.radians(np.clip(lats, -_MAX_MERCATOR_LAT, _MAX_MERCATOR_LAT))
+    xs = np.minimum(((lons + 180) / 360 * n).astype(np.int64), n - 1)
+    ys = (1 - np.arcsinh(np.tan(lats)) / math.pi) / 2 * n
+    ys = np.clip(ys.astype(np.int64), 0, n - 1)
+    return xs, ys
+
+
+def tiles_to_coords(xs: Any, ys: Any, zoom: int):
+    """
+    Compute the coords of the north-west corner of each slippy-map tile.
+    Tip: use x+1, y+1 to get the south-east corner.
+
+    Args:
+        xs: the x of the tiles (a sequence or a NumPy array).
+        ys: the y of the tiles (a sequence or a NumPy array).
+        zoom: the zoom level.
+
+    Returns: a NumPy N×2 array of (lat, lon) (or a tuple of (lat, lon) without NumPy).
+    """
+    n = 1 << zoom
+    np = _common.np
+    if np is None:
+        return tuple(
+            (
+                math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n)))),
+                x / n * 360 - 180,
+            )
+            for x, y in zip(xs, ys)
+        )
+
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    lats = np.degrees(np.arctan(np.sinh(math.pi * (1 - 2 * ys / n))))
+    return np.column_stack((lats, xs / n * 360 - 180))
+
+
+def bbox_to_tile_cover(
+    lat_min: float, lon_min: float, lat_max: float, lon_max: float, zoom: int
+) -> list[tuple[int, int, int]]:
+    """
+    Compute all the slippy-map tiles that cover a bounding box.
+    A bbox that crosses the antimeridian has lon_min > lon_max.
+
+    Args:
+        lat_min, lon_min: the south-west corner.
+        lat_max, lon_max: the north-east corner.
+        zoom: the zoom level.
+
+    Returns: a list of tuples (zoom, x, y).
+
+    Example:
+        tiles = gis_utils.bbox_to_tile_cover(46.4, 10.3, 46.5, 10.4, zoom=12)
+    """
+    if lat_min > lat_max:
+        raise ValueError("lat_min must be <= lat_max")
+    xs, ys = coords_to_tiles([(lat_max, lon_min), (lat_min, lon_max)], zoom)
+    x_min, x_max = int(xs[0]), int(xs[1])
+    y_min, y_max = int(ys[0]), int(ys[1])
+    n = 1 << zoom
+    if lon_min <= lon_max:
+        x_range = range(x_min, x_max + 1)
+    else:
+        # Across the antimeridian.
+        x_range = list(range(x_min, n)) + list(range(0, x_max + 1))
+    return [(zoom, x, y) for x in x_range for y in range(y_min, y_max + 1)]
+
+
+def group_by_tile(coords: Any, zoom: int) -> dict[tuple[int, int, int], list[int]]:
+    """
+    Group the points by the slippy-map tile that contains them.
+    With NumPy, it is a single sort of the tile keys (not a Python loop per point).
+
+    Args:
+        coords: a sequence of (lat, lon) pairs, an `array('d')` with interleaved lat,
+         lon values or a NumPy N×2 array.
+        zoom: the zoom level.
+
+    Returns: a dict {(zoom, x, y): [point index, ...]}.
+
+    Example:
+        coords = gis_utils.polyline_str_to_ndarray(polyline)
+        for (zoom, x, y), ixs in gis_utils.group_by_tile(coords, zoom=14).items():
+            tile_coords = coords[ixs]
+    """
+    xs, ys = coords_to_tiles(coords, zoom)
+    np = _common.np
+    if np is None:
+        groups = dict()
+        for ix, (x, y) in enumerate(zip(xs, ys)):
+            groups.setdefault((zoom, x, y), []).append(ix)
+        return groups
+
+    n = 1 << zoom
+    if not len(xs):
+        return dict()
+    keys = xs * n + ys
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    bounds = np.flatnonzero(np.diff(sorted_keys)) + 1
+    groups = dict()
+    for key, ixs in zip(
+        sorted_keys[np.r_[0, bounds]].tolist(), np.split(order, bounds)
+    ):
+        groups[(zoom, *divmod(key, n))] = ixs.tolist()
+    return groups
@@ -0,0 +1,270 @@
+"""
+** GIS UTILS: TRACK **
+======================
+
+A compact in-memory track: the coords are stored as int32 deltas (in units of
+ 1e-5 or 1e-6 degrees, like in a polyline) in a single buffer, so a point takes
+ 8 bytes (vs. 100+ bytes for a tuple of 2 floats, like in the result of
+ polyline_str_to_coords()).
+Floats are computed only when requested, slices share the buffer (no copies) and
+ pickling sends the buffer as raw bytes (out-of-band, with pickle protocol 5).
+
+```py
+import gis_utils
+
+track = gis_utils.Track.from_polyline(polyline)
+track = gis_utils.Track(coords, precision=6)
+lat, lon = track[0]
+climb = track[100:200]  # A view: no copies.
+coords = climb.to_ndarray()  # NumPy N×2 array (or climb.to_array(), climb.to_coords()).
+data = pickle.dumps(track, protocol=5)
+```
+"""
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "Track",
+]
+
+import pickle
+from array import array
+from typing import Any, Iterator
+
+from . import _common
+from .polyline_utils import _round, polyline_str_to_array
+
+# An absolute (cumulative) point is stored every _CHECKPOINT_STEP points, so that a
+#  random access sums at most _CHECKPOINT_STEP deltas (instead of all of them).
+_CHECKPOINT_STEP = 256
+
+
+class Track:
+    """
+    Compact track of (lat, lon) points, stored as int32 deltas.
+
+    Args:
+        coords: a sequence of (lat, lon) pairs, an `array('d')` with interleaved lat,
+         lon values or a NumPy N×2 array.
+        precision: the number of decimal digits to keep: 5 (~1 m, like Google Maps
+         and Strava polylines) or 6 (~0.1 m). Max 6, so that deltas fit in int32.
+    """
+
+    def __init__(self, coords: Any = (), precision: int = 5):
+        if not 0 <= precision <= 6:
+            raise ValueError("precision must be between 0 and 6")
+        self.precision = precision
+        self.factor = 10**precision
+        lats, lons = _common.split_coords(coords)
+        deltas = array("i")
+        np = _common.np
+        if np is None:
+            last_lat = last_lon = 0
+            for lat, lon in zip(lats, lons):
+                lat = _round(lat * self.factor)
+                lon = _round(lon * self.factor)
+                try:
+                    deltas.append(lat - last_lat)
+                    deltas.append(lon - last_lon)
+                except OverflowError as exc:
+                    raise ValueError("coords out of range") from exc
+                last_lat = lat
+                last_lon = lon
+        elif len(lats):
+            values = np.empty((len(lats), 2), dtype=np.int64)
+            values[:, 0] = np.copysign(np.floor(np.abs(lats * self.factor) + 0.5), lats)
+            values[:, 1] = np.copysign(np.floor(np.abs(lons * self.factor) + 0.5), lons)
+            values = np.diff(values, axis=0, prepend=0)
+            if np.abs(values).max() > np.iinfo(np.int32).max:
+                raise ValueError("coords out of range")
+            deltas.frombytes(values.astype(np.int32).tobytes())
+        self._set_buffer(memoryview(deltas))
+
+    @classmethod
+    def from_polyline(cls, polyline_str: str | bytes, precision: int = 5) -> "Track":
+        """
+        Create a track from a polyline string (encoded with the same precision).
+        """
+        return cls(polyline_str_to_array(polyline_str, precision), precision)
+
+    def _set_buffer(self, deltas: memoryview) -> None:
+        # The interleaved lat, lon deltas; the 1st point is a delta from (0, 0).
+        self._deltas = deltas
+        self._start = 0
+        self._stop = len(deltas) // 2
+        # The checkpoints: the cumulative sums of the deltas of the points before
+        #  point 0, _CHECKPOINT_STEP, 2*_CHECKPOINT_STEP, ... (interleaved lat, lon).
+        checkpoints = array("q", [0, 0])
+        np = _common.np
+        if np is None:
+            lat = lon = 0
+            for i in range(self._stop):
+                lat += deltas[2 * i]
+                lon += deltas[2 * i + 1]
+                if (i + 1) % _CHECKPOINT_STEP == 0:
+                    checkpoints.append(lat)
+                    checkpoints.append(lon)
+        elif self._stop:
+            sums = np.cumsum(
+                np.frombuffer(deltas, dtype=np.int32).reshape(-1, 2),
+                axis=0,
+                dtype=np.int64,
+            )
+            checkpoints.frombytes(
+                sums[_CHECKPOINT_STEP - 1 :: _CHECKPOINT_STEP].tobytes()
+            )
+        self._checkpoints = checkpoints
+
+    def _get_base(self, ix: int) -> tuple[int, int]:
+        # The sum of the deltas of the points before point `ix` (of the buffer): it
+        #  is the int value of point `ix - 1`.
+        i_checkpoint = ix // _CHECKPOINT_STEP
+        lat = self._checkpoints[2 * i_checkpoint]
+        lon = self._checkpoints[2 * i_checkpoint + 1]
+        for i in range(i_checkpoint * _CHECKPOINT_STEP, ix):
+            lat += self._deltas[2 * i]
+            lon += self._deltas[2 * i + 1]
+        return lat, lon
+
+    def _get_values(self) -> tuple:
+        # The int values of all the points, as 2 int64 NumPy arrays (or 2 lists).
+        lat, lon = self._get_base(self._start)
+        deltas = self._deltas[2 * self._start : 2 * self._stop]
+        np = _common.np
+        if np is None:
+            lats = []
+            lons = []
+            for i in range(0, len(deltas), 2):
+                lat += deltas[i]
+                lon += deltas[i + 1]
+                lats.append(lat)
+                lons.append(lon)
+            return lats, lons
+
+        sums = np.cumsum(
+            np.frombuffer(deltas, dtype=np.int32).reshape(-1, 2),
+            axis=0,
+            dtype=np.int64,
+        )
+        return sums[:, 0] + lat, sums[:, 1] + lon
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The size in bytes of the buffers (shared with the slices of this track).
+        """
+        return self._deltas.nbytes + self._checkpoints.itemsize * len(self._checkpoints)
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __repr__(self) -> str:
+        return f"<Track n_points={len(self)} precision={self.precision}>"
+
+    def __getitem__(self, key: int | slice):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                # Not contiguous: it is a copy.
+                coords = self.to_coords() if _common.np is None else self.to_ndarray()
+                return Track(coords[key], self.precision)
+            track = object.__new__(Track)
+            track.precision = self.precision
+            track.factor = self.factor
+            track._deltas = self._deltas
+            track._checkpoints = self._checkpoints
+            track._start = self._start + start
+            track._stop = self._start + max(start, stop)
+            return track
+
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("Track index out of range")
+        lat, lon = self._get_base(self._start + key + 1)
+        return lat / self.factor, lon / self.factor
+
+    def __iter__(self) -> Iterator[tuple[float, float]]:
+        lat, lon = self._get_base(self._start)
+        deltas = self._deltas
+        for i in range(2 * self._start, 2 * self._stop, 2):
+            lat += deltas[i]
+            lon += deltas[i + 1]
+            yield lat / self.factor, lon / self.factor
+
+    @property
+    def lats(self):
+        """
+        The lats, computed on access (not stored): a NumPy array (or a list).
+        """
+        lats, _ = self._get_values()
+        if _common.np is None:
+            return [x / self.factor for x in lats]
+        return lats / self.factor
+
+    @property
+    def lons(self):
+        """
+        The lons, computed on access (not stored): a NumPy array (or a list).
+        """
+        _, lons = self._get_values()
+        if _common.np is None:
+            return [x / self.factor for x in lons]
+        return lons / self.factor
+
+    def to_ndarray(self):
+        """
+        Return the coords as a NumPy N×2 array of (lat, lon).
+        This fn is available only if pip-installed with the extra:
+         pip install gis-utils[numpy]
+        """
+        _common.require_numpy("Track.to_ndarray")
+        lats, lons = self._get_values()
+        return _common.np.column_stack((lats, lons)) / self.factor
+
+    def to_array(self) -> array:
+        """
+        Return the coords as an `array('d')` with interleaved lat, lon values (like
+         polyline_str_to_array()).
+        """
+        result = array("d")
+        if _common.np is None:
+            for lat, lon in self:
+                result.append(lat)
+                result.append(lon)
+            return result
+        result.frombytes(self.to_ndarray().tobytes())
+        return result
+
+    def to_coords(self) -> tuple[tuple[float, float]]:
+        """
+        Return the coords as a tuple of (lat, lon) (like polyline_str_to_coords()).
+        """
+        return tuple(self)
+
+    def _get_deltas_to_pickle(self):
+        if self._start == 0:
+            return self._deltas[: 2 * self._stop]
+        # A slice: its 1st delta must become the absolute value of its 1st point.
+        deltas = array("i", self._deltas[2 * self._start : 2 * self._stop])
+        lat, lon = self._get_base(self._start)
+        deltas[0] += lat
+        deltas[1] += lon
+        return memoryview(deltas)
+
+    def __reduce_ex__(self, protocol: int):
+        deltas = self._get_deltas_to_pickle()
+        if protocol >= 5:
+            # Zero-copy: the buffer is pickled as it is (or sent out-of-band).
+            data = pickle.PickleBuffer(deltas)
+        else:
+            data = deltas.tobytes()
+        return _unpickle_track, (self.precision, data)
+
+
+def _unpickle_track(precision: int, data: Any) -> Track:
+    track = object.__new__(Track)
+    track.precision = precision
+    track.factor = 10**precision
+    # Note: no copy, the buffer is wrapped as it is.
+    track._set_buffer(memoryview(data).cast("B").cast("i"))
+    return track
@@ -0,0 +1,126 @@
+"""
+** GIS UTILS: TRACK UTILS **
+============================
+
+Distances along a track and resampling at fixed distances, fi. for splits, charts
+ and comparisons between tracks.
+Vectorized with NumPy (optional extra: pip install "gis-utils[numpy]"), with a
+ pure-Python fallback; both run in O(n).
+
+```py
+import gis_utils
+
+coords = gis_utils.polyline_str_to_coords(polyline)
+# The distance in km of each point from the start of the track.
+dists = gis_utils.cumulative_distance(coords)
+# A point every 100 m.
+points = gis_utils.resample_by_distance(coords, step_m=100)
+```
+"""
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "cumulative_distance",
+    "resample_by_distance",
+]
+
+from itertools import accumulate
+from typing import Any
+
+from . import _common
+from .batch_distance import compute_great_circle_distances_along_track
+
+
+def cumulative_distance(coords: Any):
+    """
+    Compute the distance in km of each point of a track from the start of the track,
+     along the track (great circle distances, see compute_great_circle_distance()).
+
+    Args:
+        coords: the track: a sequence of (lat, lon) pairs, an `array('d')` with
+         interleaved lat, lon values or a NumPy N×2 array.
+
+    Returns: N distances in km (the 1st is 0, none for an empty track), as a NumPy
+     array (or a list without NumPy).
+
+    Example:
+        coords = gis_utils.polyline_str_to_coords(polyline)
+        dists = gis_utils.cumulative_distance(coords)
+        assert dists[0] == 0
+        assert len(dists) == len(coords)
+    """
+    np = _common.np
+    if len(coords) == 0:
+        return [] if np is None else np.empty(0, dtype=np.float64)
+
+    dists = compute_great_circle_distances_along_track(coords)
+    if np is None:
+        return list(accumulate(dists, initial=0.0))
+
+    result = np.empty(len(dists) + 1, dtype=np.float64)
+    result[0] = 0
+    np.cumsum(dists, out=result[1:])
+    return result
+
+
+def resample_by_distance(coords: Any, step_m: float):
+    """
+    Resample a track with a point every `step_m` meters along the track, starting
+     from the 1st point. The last point of the track is always included.
+    The new points are linearly interpolated between the 2 original points around
+     them (fine as long as the original points are not too far apart).
+
+    Args:
+        coords: the track: a sequence of (lat, lon) pairs, an `array('d')` with
+         interleaved lat, lon values or a NumPy N×2 array.
+        step_m: the distance in meters between 2 consecutive new points.
+
+    Returns: the new points as a NumPy N×2 array (or a tuple of (lat, lon) without
+     NumPy).
+
+    Example:
+        coords = gis_utils.polyline_str_to_coords(polyline)
+        points = gis_utils.resample_by_distance(coords, step_m=100)
+    """
+    if step_m <= 0:
+        raise ValueError("step_m must be > 0")
+    lats, lons = _common.split_coords(coords)
+    cum_km = cumulative_distance(coords)
+    step_km = step_m / 1000
+
+    np = _common.np
+    if np is None:
+        if not lats:
+            return tuple()
+        n_steps = int(cum_km[-1] // step_km)
+        result = []
+        ix = 0
+        for i in range(n_steps + 1):
+            target = i * step_km
+            # Move to the original segment that contains the target distance.
+            while ix < len(cum_km) - 2 and cum_km[ix + 1] < target:
+                ix += 1
+            if ix == len(cum_km) - 1:
+                result.append((lats[ix], lons[ix]))
+                continue
+            seg_km = cum_km[ix + 1] - cum_km[ix]
+            ratio = 0.0 if seg_km == 0 else (target - cum_km[ix]) / seg_km
+            # Note: lons are interpolated the short way, across the antimeridian.
+            dlon = (lons[ix + 1] - lons[ix] + 180) % 360 - 180
+            lon = (lons[ix] + dlon * ratio + 180) % 360 - 180
+            result.append((lats[ix] + (lats[ix + 1] - lats[ix]) * ratio, lon))
+        if cum_km[-1] - n_steps * step_km > 1e-9 or len(result) == 0:
+            result.append((lats[-1], lons[-1]))
+        return tuple(result)
+
+    if not len(lats):
+        return np.empty((0, 2), dtype=np.float64)
+    targets = np.arange(0, cum_km[-1], step_km)
+    if not len(targets) or cum_km[-1] - targets[-1] > 1e-9:
+        targets = np.append(targets, cum_km[-1])
+    # Note: lons are unwrapped so they are interpolated the short way, across the
+    #  antimeridian, then wrapped back.
+    lons = np.unwrap(lons, period=360)
+    new_lats = np.interp(targets, cum_km, lats)
+    new_lons = (np.interp(targets, cum_km, lons) + 180) % 360 - 180
+    return np.column_stack((new_lats, new_lons))
@@ -0,0 +1,13 @@
+import pytest
+
+from gis_utils import _common
+
+
+@pytest.fixture(params=["numpy", "pure-python"])
+def numpy_or_pure_python(request, monkeypatch):
+    """
+    Run a test twice: with NumPy and with the pure-Python fallback.
+    """
+    if request.param == "pure-python":
+        monkeypatch.setattr(_common, "np", None)
+    return request.param
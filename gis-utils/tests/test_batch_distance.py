@@ -0,0 +1,115 @@
+from array import array
+
+import pytest
+
+import gis_utils
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestComputeDistancesAlongTrack:
+    def setup_method(self):
+        self.coords = (
+            (46.46961, 10.36953),
+            (46.47961, 10.37953),
+            (46.48961, 10.36953),
+            (46.48961, 10.35953),
+        )
+
+    def test_great_circle(self):
+        dists = gis_utils.compute_great_circle_distances_along_track(self.coords)
+        assert len(dists) == 3
+        for i, dist in enumerate(dists):
+            assert dist == pytest.approx(
+                gis_utils.compute_great_circle_distance(
+                    *self.coords[i], *self.coords[i + 1]
+                ),
+                rel=1e-12,
+            )
+
+    def test_euclidean(self):
+        dists = gis_utils.compute_euclidean_distances_along_track(self.coords)
+        assert len(dists) == 3
+        for i, dist in enumerate(dists):
+            assert dist == pytest.approx(
+                gis_utils.compute_euclidean_distance(
+                    *self.coords[i], *self.coords[i + 1]
+                ),
+                rel=1e-12,
+            )
+
+    def test_interleaved_array(self):
+        flat = array("d", [x for point in self.coords for x in point])
+        dists = gis_utils.compute_great_circle_distances_along_track(flat)
+        expected = gis_utils.compute_great_circle_distances_along_track(self.coords)
+        assert list(dists) == pytest.approx(list(expected), rel=1e-12)
+
+    def test_single_point(self):
+        dists = gis_utils.compute_great_circle_distances_along_track(self.coords[:1])
+        assert len(dists) == 0
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestComputeDistancesToPoint:
+    def test_great_circle(self):
+        white_house = (38.898, -77.037)
+        eiffel_tower = (48.858, 2.294)
+        dists = gis_utils.compute_great_circle_distances_to_point(
+            *white_house, [eiffel_tower, white_house]
+        )
+        assert dists[0] == pytest.approx(6161.438034825137, rel=1e-12)
+        assert dists[1] == 0
+
+    def test_euclidean(self):
+        white_house = (38.898, -77.037)
+        eiffel_tower = (48.858, 2.294)
+        dists = gis_utils.compute_euclidean_distances_to_point(
+            *white_house, [eiffel_tower, white_house]
+        )
+        assert dists[0] == pytest.approx(6454.2071214371235, rel=1e-12)
+        assert dists[1] == 0
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestComputeDistanceMatrix:
+    def setup_method(self):
+        self.coords1 = [(38.898, -77.037), (48.858, 2.294), (-34.83333, -58.5166646)]
+        self.coords2 = [(49.0083899664, 2.53844117956), (41.49008, -71.312796)]
+
+    def test_happy_flow(self):
+        matrix = gis_utils.compute_distance_matrix(self.coords1, self.coords2)
+        assert len(matrix) == 3
+        for i, p1 in enumerate(self.coords1):
+            assert len(matrix[i]) == 2
+            for j, p2 in enumerate(self.coords2):
+                assert matrix[i][j] == pytest.approx(
+                    gis_utils.compute_great_circle_distance(*p1, *p2), rel=1e-12
+                )
+
+    def test_euclidean(self):
+        matrix = gis_utils.compute_distance_matrix(
+            self.coords1, self.coords2, metric="euclidean"
+        )
+        assert matrix[0][1] == pytest.approx(
+            gis_utils.compute_euclidean_distance(*self.coords1[0], *self.coords2[1]),
+            rel=1e-12,
+        )
+
+    def test_square(self):
+        matrix = gis_utils.compute_distance_matrix(self.coords1, chunk_size=2)
+        for i in range(3):
+            assert matrix[i][i] == 0
+            for j in range(3):
+                assert matrix[i][j] == pytest.approx(matrix[j][i], rel=1e-12)
+
+    def test_chunks(self):
+        chunks = list(
+            gis_utils.iter_distance_matrix_chunks(
+                self.coords1, self.coords2, chunk_size=2
+            )
+        )
+        assert [start for start, _ in chunks] == [0, 2]
+        assert [len(chunk) for _, chunk in chunks] == [2, 1]
+
+    def test_invalid_metric(self):
+        with pytest.raises(ValueError):
+            gis_utils.compute_distance_matrix(self.coords1, metric="manhattan")
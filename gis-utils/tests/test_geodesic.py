@@ -0,0 +1,91 @@
+import pytest
+
+import gis_utils
+
+
+class TestComputeGeodesicDistance:
+    def test_happy_flow(self):
+        # Flinders Peak -> Buninyong, the example in Vincenty's paper: 54972.271 m.
+        dist = gis_utils.compute_geodesic_distance(
+            -37.95103342, 144.42486789, -37.65282114, 143.92649554
+        )
+        assert dist == pytest.approx(54.972271, abs=1e-6)
+
+    def test_equator(self):
+        # A quarter of the equator: pi/2 * the semi-major axis.
+        dist = gis_utils.compute_geodesic_distance(0, 0, 0, 90)
+        assert dist == pytest.approx(10018.754171, abs=1e-6)
+
+    def test_meridian(self):
+        # A quarter of a meridian (equator -> pole): 10001.965729 km.
+        dist = gis_utils.compute_geodesic_distance(0, 0, 90, 0)
+        assert dist == pytest.approx(10001.965729, abs=1e-6)
+
+    def test_same_point(self):
+        assert (
+            gis_utils.compute_geodesic_distance(46.46961, 10.36953, 46.46961, 10.36953)
+            == 0
+        )
+
+    def test_antimeridian(self):
+        dist1 = gis_utils.compute_geodesic_distance(10, 179.9, 10, -179.9)
+        dist2 = gis_utils.compute_geodesic_distance(10, -0.1, 10, 0.1)
+        assert dist1 == pytest.approx(dist2)
+
+    def test_nearly_antipodal(self):
+        # Vincenty's formula does not converge: the great circle distance instead.
+        dist = gis_utils.compute_geodesic_distance(0, 0, 0.5, 179.7)
+        assert dist == pytest.approx(
+            gis_utils.compute_great_circle_distance(0, 0, 0.5, 179.7)
+        )
+
+    def test_close_to_great_circle(self):
+        white_house = (38.898, -77.037)
+        eiffel_tower = (48.858, 2.294)
+        dist = gis_utils.compute_geodesic_distance(*white_house, *eiffel_tower)
+        assert dist == pytest.approx(
+            gis_utils.compute_great_circle_distance(*white_house, *eiffel_tower),
+            rel=0.005,
+        )
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestComputeGeodesicDistancesAlongTrack:
+    def test_happy_flow(self):
+        coords = [
+            (-37.95103342, 144.42486789),
+            (-37.65282114, 143.92649554),
+            (0, 0),
+            (0, 90),
+            (0, 90),
+            (0.5, -90.3),
+        ]
+        dists = gis_utils.compute_geodesic_distances_along_track(coords)
+        assert len(dists) == 5
+        for i, dist in enumerate(dists):
+            assert dist == pytest.approx(
+                gis_utils.compute_geodesic_distance(*coords[i], *coords[i + 1]),
+                abs=1e-9,
+            )
+
+    def test_short(self):
+        assert len(gis_utils.compute_geodesic_distances_along_track([(0, 0)])) == 0
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestComputeGeodesicDistancesToPoint:
+    def test_happy_flow(self):
+        coords = [(-37.65282114, 143.92649554), (0, 0), (-37.95103342, 144.42486789)]
+        dists = gis_utils.compute_geodesic_distances_to_point(
+            -37.95103342, 144.42486789, coords
+        )
+        assert len(dists) == 3
+        assert dists[0] == pytest.approx(54.972271, abs=1e-6)
+        assert dists[1] == pytest.approx(
+            gis_utils.compute_geodesic_distance(-37.95103342, 144.42486789, 0, 0),
+            abs=1e-9,
+        )
+        assert dists[2] == 0
+
+    def test_empty(self):
+        assert len(gis_utils.compute_geodesic_distances_to_point(0, 0, [])) == 0
@@ -0,0 +1,78 @@
+import math
+
+import pytest
+
+import gis_utils
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestGeofence:
+    def setup_method(self):
+        # A square with a square hole in the middle.
+        self.square = [(46.5, 10.3), (46.5, 10.5), (46.3, 10.5), (46.3, 10.3)]
+        self.hole = [(46.42, 10.38), (46.42, 10.42), (46.38, 10.42), (46.38, 10.38)]
+        # A U shape (concave).
+        self.u_shape = [
+            (46.0, 10.0),
+            (46.0, 10.3),
+            (46.3, 10.3),
+            (46.3, 10.2),
+            (46.1, 10.2),
+            (46.1, 10.1),
+            (46.3, 10.1),
+            (46.3, 10.0),
+        ]
+
+    def test_happy_flow(self):
+        geofence = gis_utils.Geofence(self.square)
+        assert geofence.contains(46.46961, 10.36953)
+        assert not geofence.contains(46.6, 10.36953)
+        assert not geofence.contains(46.46961, 10.6)
+
+    def test_closed_ring(self):
+        geofence = gis_utils.Geofence(self.square + self.square[:1])
+        assert geofence.n_edges == 4
+        assert geofence.contains(46.46961, 10.36953)
+
+    def test_hole(self):
+        geofence = gis_utils.Geofence(self.square, holes=[self.hole])
+        assert not geofence.contains(46.4, 10.4)
+        assert geofence.contains(46.4, 10.35)
+
+    def test_concave(self):
+        geofence = gis_utils.Geofence(self.u_shape)
+        assert geofence.contains(46.2, 10.05)
+        assert geofence.contains(46.2, 10.25)
+        assert geofence.contains(46.05, 10.15)
+        assert not geofence.contains(46.2, 10.15)
+
+    def test_contains_many(self):
+        geofence = gis_utils.Geofence(self.u_shape)
+        coords = [(46.2, 10.05), (46.2, 10.25), (46.05, 10.15), (46.2, 10.15), (0, 0)]
+        assert list(geofence.contains_many(coords)) == [True, True, True, False, False]
+        assert len(geofence.contains_many([])) == 0
+
+    @pytest.mark.parametrize("n_index_rows", [1, 3, 1000])
+    def test_edge_index(self, n_index_rows):
+        # A star polygon with many edges.
+        n_vertices = 200
+        polygon = []
+        for i in range(n_vertices):
+            angle = 2 * math.pi * i / n_vertices
+            radius = 0.1 * (1 + 0.3 * math.sin(7 * angle))
+            polygon.append(
+                (46 + radius * math.sin(angle), 10 + radius * math.cos(angle))
+            )
+        coords = [
+            (46 + (i % 37 - 18) / 140, 10 + (i % 41 - 20) / 150) for i in range(2000)
+        ]
+        geofence = gis_utils.Geofence(polygon, n_index_rows=n_index_rows)
+        expected = gis_utils.Geofence(polygon, n_index_rows=1).contains_many(coords)
+        is_inside = geofence.contains_many(coords)
+        assert list(is_inside) == list(expected)
+        assert list(is_inside) == [geofence.contains(*x) for x in coords]
+        assert 0 < sum(is_inside) < len(coords)
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            gis_utils.Geofence(self.square[:2])
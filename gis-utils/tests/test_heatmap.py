@@ -0,0 +1,123 @@
+import pytest
+
+import gis_utils
+from gis_utils import _common
+from gis_utils import heatmap as heatmap_module
+
+pytestmark = pytest.mark.skipif(_common.np is None, reason="numpy is not installed")
+
+
+class TestHeatmapGrid:
+    def setup_method(self):
+        self.heatmap = gis_utils.HeatmapGrid(0, 0, 1, 1, width=10, height=10)
+
+    def test_happy_flow(self):
+        # A diagonal from the south-west to the north-east corner.
+        self.heatmap.add_track([(0.05, 0.05), (0.95, 0.95)])
+        assert self.heatmap.grid.sum() == 10
+        for i in range(10):
+            assert self.heatmap.grid[9 - i, i] == 1
+        assert self.heatmap.n_tracks == 1
+
+    def test_count_once_per_track(self):
+        # A track that goes back and forth on the same row.
+        track = [(0.55, 0.05), (0.55, 0.95), (0.55, 0.05)]
+        self.heatmap.add_track(track)
+        assert self.heatmap.grid[4].tolist() == [1] * 10
+        heatmap = gis_utils.HeatmapGrid(
+            0, 0, 1, 1, width=10, height=10, do_count_once_per_track=False
+        )
+        heatmap.add_track(track)
+        assert heatmap.grid[4].tolist() == [2] * 9 + [1]
+
+    def test_clipping(self):
+        # A segment that crosses the grid, with both ends far outside.
+        self.heatmap.add_track([(0.55, -50), (0.55, 50)])
+        assert self.heatmap.grid[4].tolist() == [1] * 10
+        assert self.heatmap.grid.sum() == 10
+
+    @pytest.mark.parametrize("width", [100, 300])
+    def test_no_skipped_pixels(self, width):
+        # A track across the whole width: float steps used to skip some columns.
+        heatmap = gis_utils.HeatmapGrid(0, 0, 1, 1, width=width, height=7)
+        heatmap.add_track([(0.5, 0), (0.5, 1)])
+        heatmap.add_track([(0.1, 0), (0.9, 1)])
+        assert heatmap.grid.sum(axis=0).tolist() == [2] * width
+        assert heatmap.grid.sum() == 2 * width
+
+    def test_outside(self):
+        self.heatmap.add_track([(5, 5), (6, 6)])
+        self.heatmap.add_track([])
+        assert self.heatmap.grid.sum() == 0
+        assert self.heatmap.n_tracks == 2
+
+    def test_polyline(self):
+        coords = [(0.05, 0.05), (0.95, 0.95)]
+        heatmap = gis_utils.HeatmapGrid(0, 0, 1, 1, width=10, height=10)
+        heatmap.add_track(gis_utils.coords_to_polyline_str(coords))
+        self.heatmap.add_track(coords)
+        assert (heatmap.grid == self.heatmap.grid).all()
+
+    def test_add_tracks_in_chunks(self):
+        tracks = [[(0.05, 0.05), (0.95, 0.95)]] * 5
+        self.heatmap.add_tracks(iter(tracks), chunk_size=2)
+        assert self.heatmap.grid.max() == 5
+        assert self.heatmap.n_tracks == 5
+
+    def test_merge(self):
+        other = gis_utils.HeatmapGrid(0, 0, 1, 1, width=10, height=10)
+        other.add_track([(0.05, 0.05), (0.95, 0.95)])
+        self.heatmap.add_track([(0.05, 0.05), (0.95, 0.95)])
+        self.heatmap.merge(other)
+        assert self.heatmap.grid.max() == 2
+        assert self.heatmap.n_tracks == 2
+        with pytest.raises(ValueError):
+            self.heatmap.merge(gis_utils.HeatmapGrid(0, 0, 1, 1, width=5, height=5))
+
+    def test_from_tile(self):
+        heatmap = gis_utils.HeatmapGrid.from_tile(zoom=14, x=8663, y=5797, size=256)
+        heatmap.add_track([(46.46961, 10.36953)])
+        assert heatmap.grid.sum() == 1
+
+    def test_numpy_not_installed(self, monkeypatch):
+        monkeypatch.setattr(_common, "np", None)
+        with pytest.raises(Exception):
+            gis_utils.HeatmapGrid(0, 0, 1, 1, width=10, height=10)
+
+
+class TestRasterizeTracks:
+    def setup_method(self):
+        self.tracks = [
+            [(0.05, 0.05), (0.95, 0.95)],
+            [(0.55, 0.05), (0.55, 0.95)],
+        ] * 5
+
+    def test_happy_flow(self):
+        heatmap = gis_utils.rasterize_tracks(
+            self.tracks, 0, 0, 1, 1, width=10, height=10, workers=1
+        )
+        assert heatmap.grid.max() == 10
+        assert heatmap.n_tracks == 10
+
+    def test_workers(self):
+        expected = gis_utils.rasterize_tracks(
+            self.tracks, 0, 0, 1, 1, width=10, height=10, workers=1
+        )
+        heatmap = gis_utils.rasterize_tracks(
+            iter(self.tracks), 0, 0, 1, 1, width=10, height=10, workers=2, chunk_size=3
+        )
+        assert (heatmap.grid == expected.grid).all()
+        assert heatmap.n_tracks == 10
+
+    def test_rasterize_chunk_is_sparse(self):
+        # A worker sends back the counts of the pixels hit, not a full grid.
+        params = gis_utils.HeatmapGrid(0, 0, 1, 1, width=1000, height=1000).get_params()
+        flat_ixs, counts, n_tracks = heatmap_module._rasterize_chunk(
+            params, self.tracks[:2]
+        )
+        assert len(flat_ixs) == len(counts) < 2000
+        expected = gis_utils.HeatmapGrid(*params)
+        expected.add_tracks(self.tracks[:2])
+        assert (expected.grid.reshape(-1)[flat_ixs] == counts).all()
+        assert counts.sum() == expected.grid.sum()
+        assert n_tracks == 2
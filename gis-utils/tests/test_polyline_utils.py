@@ -0,0 +1,204 @@
+import io
+import random
+
+import pytest
+
+import gis_utils
+from gis_utils import _common
+
+# Strava segment Re Stelvio Mapei, segment-id 15104529341.
+STELVIO_POLYLINE = r"abszGqhh~@s@nD{F~I{HbE_@AQeAzBqIYk@qGpEiEn@sPmBlG{EeGeAmBiCqIdF{IAgCdBwAdDeEdC}A~CiEi@cC_BwKpHqPlC}CvDuAdDgC`@gB~CBlC]bA{DbCuDbEcBXmA~AoBEkNxAqClCiCt@}GQqDpAuAc@uEoNoGiLVSfEtEwDeIaE}OeGcMNQ|D`FyDsJAwE}@kED}AcC}EmAc@}BsD_@yIeC_IUqDfBvEk@eF^lB`AhBZAqAoEQoEHeBvAqAPkSdAgH[_Lf@cDmBoQ@uDf@uBuAgCGyEoB_Ja@mJsCwD}AuEoCcEeDyLwEaH?e@l@BlD`DXOoBmCcA}CkByAxBj@nAvBR[yGiMgDCzByByEp@zFmFyFt@aCjB~AmD`EmCG[gGlAyCxFpBeJbFqCf@eAkInCoAbCsF|DSg@bA}F`EsCcL|B}LwB{BoA}D|CiCs@sLlBuAOiFwD{CMqElAqKw@aKuEkDeG{FOyCmDwE}@cKeQsA_EgDex@f@oJx@_GtBoGhIsI}GhAdJeKgE`@kCrAtAaEfHeEjByFdGmFs@{BjNyAdHiDgFaMC{AbBgDtEyB`AiDu@y@kGv@Wa@LkAdDcIb@iGzE\jC~CZcAsAyEpGeAy@gLuA[tGeJ~EE@cC}@}BtAwKFjA{ApIv@~APxBu@rAmDs@kHzIzAt@`AnKuGhAjAtEWbAcCwCaFg@c@pGgDjIIfAZj@dGw@r@h@aAhD_FjCuAxCNpBtElLmGzC{N|Al@fCcGbFcBzFcHbE}BlETd@hCqBjEi@iJzJTd@lGeBsIvIwAzDmAzGi@`MpCvt@x@dEdLpSjFhA`DvDvFJdDtFtKjF~Jj@`FoAtCPvGjEhMyBhCx@`E_D|AlAlMtBbLiCuDzAuAzHVn@rFoDvBmDnGcBaG|DqBxI`@TpCsFzFwAoE~CyAfCDl@dKcDcGnFbFi@}BrB~DXpGpLyAiBmCc@hBhB|@rCvBtCqDuCw@IKj@`FhH~DnNjBpBhBnF`ChCTfJdAjC~DfT_ArAApB`AtM?hLx@vEa@hEy@zAc@hMcBhNNdDxAdFaCaFr@dFkBwETxE|BlGb@bJdCfE`GrBaAfB?bBdAxEAfEzD|JsDeFYVpG`NdDxMlEjJkEyEU^lElHpFzMp@zC|Ad@hDwA~GL`Cu@dCoCrNwAlBNrD{B|JyIJsDpB_EzBSlFwIhPiC|K{HxCfBzDf@dBmDfEcChAmCtBeBjJIfH}ElAJjAdB~FlAyBxBiC`APz@pSpAdCs@lF_EJx@yBfIN|@n@@hGsCjGiJbAwBl@sIxBsDbD]fIfFk@qCv@_FtHeB"
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestPolylineStrToArray:
+    def test_happy_flow(self):
+        flat = gis_utils.polyline_str_to_array(STELVIO_POLYLINE)
+        assert flat.typecode == "d"
+        assert len(flat) == 349 * 2
+        assert (flat[0], flat[1]) == (46.46961, 10.36953)
+        assert (flat[696], flat[697]) == (46.46477, 10.37296)
+
+    def test_same_as_polyline_str_to_coords(self):
+        flat = gis_utils.polyline_str_to_array(STELVIO_POLYLINE)
+        coords = gis_utils.polyline_str_to_coords(STELVIO_POLYLINE)
+        assert list(flat) == [x for point in coords for x in point]
+
+    def test_bytes(self):
+        flat = gis_utils.polyline_str_to_array(STELVIO_POLYLINE.encode())
+        assert flat == gis_utils.polyline_str_to_array(STELVIO_POLYLINE)
+
+    def test_precision_6(self):
+        # Src: https://developers.google.com/maps/documentation/utilities/polylinealgorithm
+        flat = gis_utils.polyline_str_to_array(r"_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+        assert list(flat) == [38.5, -120.2, 40.7, -120.95, 43.252, -126.453]
+        flat = gis_utils.polyline_str_to_array(
+            r"_p~iF~ps|U_ulLnnqC_mqNvxq`@", precision=6
+        )
+        assert list(flat) == [3.85, -12.02, 4.07, -12.095, 4.3252, -12.6453]
+
+    def test_empty(self):
+        assert len(gis_utils.polyline_str_to_array("")) == 0
+
+    def test_not_a_str(self):
+        with pytest.raises(TypeError):
+            gis_utils.polyline_str_to_array(123)
+
+    def test_invalid_chars(self):
+        with pytest.raises(ValueError):
+            gis_utils.polyline_str_to_array("u{~vF vyys@")
+
+    def test_truncated(self):
+        with pytest.raises(ValueError):
+            gis_utils.polyline_str_to_array(STELVIO_POLYLINE[:-1])
+
+
+@pytest.mark.skipif(_common.np is None, reason="numpy is not installed")
+class TestPolylineStrToNdarray:
+    def test_happy_flow(self):
+        coords = gis_utils.polyline_str_to_ndarray(STELVIO_POLYLINE)
+        assert coords.shape == (349, 2)
+        assert tuple(coords[0]) == (46.46961, 10.36953)
+        assert tuple(coords[348]) == (46.46477, 10.37296)
+        assert [tuple(x) for x in coords.tolist()] == list(
+            gis_utils.polyline_str_to_coords(STELVIO_POLYLINE)
+        )
+
+    def test_empty(self):
+        assert gis_utils.polyline_str_to_ndarray("").shape == (0, 2)
+
+    def test_numpy_not_installed(self, monkeypatch):
+        monkeypatch.setattr(gis_utils._common, "np", None)
+        with pytest.raises(Exception):
+            gis_utils.polyline_str_to_ndarray(STELVIO_POLYLINE)
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestDecodeMany:
+    def setup_method(self):
+        self.polylines = [STELVIO_POLYLINE, "", "_p~iF~ps|U_ulLnnqC_mqNvxq`@"] * 5
+
+    def test_happy_flow(self):
+        flats = gis_utils.decode_many(self.polylines)
+        assert flats == [gis_utils.polyline_str_to_array(x) for x in self.polylines]
+
+    def test_workers(self, monkeypatch):
+        # Force the process pool, also for a small batch.
+        monkeypatch.setattr(gis_utils.polyline_utils, "_MIN_PARALLEL_SIZE", 0)
+        flats = gis_utils.decode_many(self.polylines, workers=2, chunksize=4)
+        assert flats == [gis_utils.polyline_str_to_array(x) for x in self.polylines]
+
+    def test_invalid(self, monkeypatch):
+        monkeypatch.setattr(gis_utils.polyline_utils, "_MIN_PARALLEL_SIZE", 0)
+        with pytest.raises(ValueError):
+            gis_utils.decode_many(["_p~iF~ps|U", "_p~iF~ps|"], workers=2)
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestPolylineView:
+    def setup_method(self):
+        self.coords = gis_utils.polyline_str_to_coords(STELVIO_POLYLINE)
+
+    def test_happy_flow(self):
+        view = gis_utils.PolylineView(STELVIO_POLYLINE)
+        assert len(view) == 349
+        assert view[0] == (46.46961, 10.36953)
+        assert view[-1] == (46.46477, 10.37296)
+        assert view[:10] == self.coords[:10]
+        assert tuple(view) == self.coords
+
+    @pytest.mark.parametrize("checkpoint_step", [1, 7, 256, 1000])
+    def test_random_access(self, checkpoint_step):
+        view = gis_utils.PolylineView(STELVIO_POLYLINE, checkpoint_step=checkpoint_step)
+        for ix in (300, 0, 7, 348, -349, 100):
+            assert view[ix] == self.coords[ix]
+        for key in (
+            slice(None),
+            slice(10, 20),
+            slice(-2, None),
+            slice(5, 300, 7),
+            slice(300, 5, -3),
+            slice(None, None, -1),
+            slice(None, None, -2),
+            slice(4, 0, -2),
+            slice(8, None, -3),
+            slice(-1, -50, -7),
+            slice(None, 3, -5),
+            slice(2, 10, -1),
+            slice(10, 5),
+        ):
+            assert view[key] == self.coords[key]
+        assert tuple(view) == self.coords
+
+    def test_lazy(self):
+        view = gis_utils.PolylineView(STELVIO_POLYLINE, checkpoint_step=16)
+        view[:10]
+        assert len(view._checkpoints) == 1
+        view[40]
+        assert len(view._checkpoints) >= 3
+
+    def test_empty(self):
+        view = gis_utils.PolylineView("")
+        assert len(view) == 0
+        assert view[:] == tuple()
+        with pytest.raises(IndexError):
+            view[0]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            gis_utils.PolylineView("_p~iF~ps|")
+        with pytest.raises(ValueError):
+            gis_utils.PolylineView("_p~iF~ps|U _ulLnnqC")
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestCoordsToPolylineStr:
+    def test_happy_flow(self):
+        # Src: https://developers.google.com/maps/documentation/utilities/polylinealgorithm
+        polyline = gis_utils.coords_to_polyline_str(
+            [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+        )
+        assert polyline == r"_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+    def test_round_trip_stelvio(self):
+        coords = gis_utils.polyline_str_to_coords(STELVIO_POLYLINE)
+        assert gis_utils.coords_to_polyline_str(coords) == STELVIO_POLYLINE
+        flat = gis_utils.polyline_str_to_array(STELVIO_POLYLINE)
+        assert gis_utils.coords_to_polyline_str(flat) == STELVIO_POLYLINE
+
+    @pytest.mark.parametrize("precision", [5, 6])
+    def test_round_trip(self, precision):
+        rnd = random.Random(precision)
+        coords = [(rnd.uniform(-90, 90), rnd.uniform(-180, 180)) for _ in range(500)]
+        polyline = gis_utils.coords_to_polyline_str(coords, precision=precision)
+        flat = gis_utils.polyline_str_to_array(polyline, precision=precision)
+        expected = [round(x, precision) for point in coords for x in point]
+        assert list(flat) == pytest.approx(expected, abs=10**-precision / 2)
+        assert gis_utils.coords_to_polyline_str(flat, precision=precision) == polyline
+
+    def test_empty(self):
+        assert gis_utils.coords_to_polyline_str([]) == ""
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestPolylineEncoder:
+    def test_add(self):
+        encoder = gis_utils.PolylineEncoder()
+        for lat, lon in gis_utils.polyline_str_to_coords(STELVIO_POLYLINE):
+            encoder.add(lat, lon)
+        assert encoder.n_points == 349
+        assert encoder.getvalue() == STELVIO_POLYLINE
+
+    def test_add_and_extend(self):
+        coords = gis_utils.polyline_str_to_coords(STELVIO_POLYLINE)
+        encoder = gis_utils.PolylineEncoder()
+        encoder.add(*coords[0])
+        encoder.extend(coords[1:100])
+        encoder.extend(coords[100:])
+        assert encoder.getvalue() == STELVIO_POLYLINE
+
+    def test_fp(self):
+        fp = io.StringIO()
+        encoder = gis_utils.PolylineEncoder(fp=fp)
+        encoder.extend(gis_utils.polyline_str_to_coords(STELVIO_POLYLINE))
+        assert fp.getvalue() == STELVIO_POLYLINE
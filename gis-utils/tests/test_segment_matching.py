@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+import gis_utils
+
+# Strava segment Re Stelvio Mapei, segment-id 15104529341.
+STELVIO_POLYLINE = r"abszGqhh~@s@nD{F~I{HbE_@AQeAzBqIYk@qGpEiEn@sPmBlG{EeGeAmBiCqIdF{IAgCdBwAdDeEdC}A~CiEi@cC_BwKpHqPlC}CvDuAdDgC`@gB~CBlC]bA{DbCuDbEcBXmA~AoBEkNxAqClCiCt@}GQqDpAuAc@uEoNoGiLVSfEtEwDeIaE}OeGcMNQ|D`FyDsJAwE}@kED}AcC}EmAc@}BsD_@yIeC_IUqDfBvEk@eF^lB`AhBZAqAoEQoEHeBvAqAPkSdAgH[_Lf@cDmBoQ@uDf@uBuAgCGyEoB_Ja@mJsCwD}AuEoCcEeDyLwEaH?e@l@BlD`DXOoBmCcA}CkByAxBj@nAvBR[yGiMgDCzByByEp@zFmFyFt@aCjB~AmD`EmCG[gGlAyCxFpBeJbFqCf@eAkInCoAbCsF|DSg@bA}F`EsCcL|B}LwB{BoA}D|CiCs@sLlBuAOiFwD{CMqElAqKw@aKuEkDeG{FOyCmDwE}@cKeQsA_EgDex@f@oJx@_GtBoGhIsI}GhAdJeKgE`@kCrAtAaEfHeEjByFdGmFs@{BjNyAdHiDgFaMC{AbBgDtEyB`AiDu@y@kGv@Wa@LkAdDcIb@iGzE\jC~CZcAsAyEpGeAy@gLuA[tGeJ~EE@cC}@}BtAwKFjA{ApIv@~APxBu@rAmDs@kHzIzAt@`AnKuGhAjAtEWbAcCwCaFg@c@pGgDjIIfAZj@dGw@r@h@aAhD_FjCuAxCNpBtElLmGzC{N|Al@fCcGbFcBzFcHbE}BlETd@hCqBjEi@iJzJTd@lGeBsIvIwAzDmAzGi@`MpCvt@x@dEdLpSjFhA`DvDvFJdDtFtKjF~Jj@`FoAtCPvGjEhMyBhCx@`E_D|AlAlMtBbLiCuDzAuAzHVn@rFoDvBmDnGcBaG|DqBxI`@TpCsFzFwAoE~CyAfCDl@dKcDcGnFbFi@}BrB~DXpGpLyAiBmCc@hBhB|@rCvBtCqDuCw@IKj@`FhH~DnNjBpBhBnF`ChCTfJdAjC~DfT_ArAApB`AtM?hLx@vEa@hEy@zAc@hMcBhNNdDxAdFaCaFr@dFkBwETxE|BlGb@bJdCfE`GrBaAfB?bBdAxEAfEzD|JsDeFYVpG`NdDxMlEjJkEyEU^lElHpFzMp@zC|Ad@hDwA~GL`Cu@dCoCrNwAlBNrD{B|JyIJsDpB_EzBSlFwIhPiC|K{HxCfBzDf@dBmDfEcChAmCtBeBjJIfH}ElAJjAdB~FlAyBxBiC`APz@pSpAdCs@lF_EJx@yBfIN|@n@@hGsCjGiJbAwBl@sIxBsDbD]fIfFk@qCv@_FtHeB"
+
+
+def _line(start, end, n_points):
+    return [
+        (
+            start[0] + (end[0] - start[0]) * i / n_points,
+            start[1] + (end[1] - start[1]) * i / n_points,
+        )
+        for i in range(n_points)
+    ]
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestMatchSegment:
+    def setup_method(self):
+        self.segment = gis_utils.polyline_str_to_coords(STELVIO_POLYLINE)
+        rnd = random.Random(1)
+        # The segment with GPS noise (~5 m).
+        self.noisy_segment = [
+            (lat + rnd.gauss(0, 0.00003), lon + rnd.gauss(0, 0.00003))
+            for lat, lon in self.segment
+        ]
+        self.segment_km = sum(
+            gis_utils.compute_great_circle_distances_along_track(self.segment)
+        )
+        self.home = (46.40, 10.30)
+
+    def test_one_traversal(self):
+        approach = _line(self.home, self.segment[0], 100)
+        way_back = _line(self.segment[-1], self.home, 100)
+        track = approach + self.noisy_segment + way_back
+
+        matches = gis_utils.match_segment(STELVIO_POLYLINE, track)
+        assert len(matches) == 1
+        assert matches[0].start_index == 100
+        assert matches[0].end_index == 100 + len(self.segment) - 1
+        assert matches[0].distance_km == pytest.approx(self.segment_km, rel=0.1)
+
+    def test_two_traversals(self):
+        track = (
+            _line(self.home, self.segment[0], 100)
+            + self.noisy_segment
+            + _line(self.segment[-1], self.segment[0], 50)
+            + self.noisy_segment
+        )
+        matches = gis_utils.match_segment(self.segment, track)
+        assert [(m.start_index, m.end_index) for m in matches] == [
+            (100, 448),
+            (499, 847),
+        ]
+
+    def test_reverse_direction(self):
+        track = list(reversed(self.noisy_segment))
+        assert gis_utils.match_segment(STELVIO_POLYLINE, track) == []
+
+    def test_partial_traversal(self):
+        track = self.noisy_segment[:200]
+        assert gis_utils.match_segment(STELVIO_POLYLINE, track) == []
+
+    def test_far_away(self):
+        track = _line((38.898, -77.037), (38.9, -77.0), 100)
+        assert gis_utils.match_segment(STELVIO_POLYLINE, track) == []
+
+    def test_detour_too_long(self):
+        # The track leaves the segment halfway for a long detour, then completes it.
+        detour = _line(self.segment[174], (46.0, 9.0), 100) + _line(
+            (46.0, 9.0), self.segment[175], 100
+        )
+        track = self.noisy_segment[:175] + detour + self.noisy_segment[175:]
+        assert gis_utils.match_segment(STELVIO_POLYLINE, track) == []
+        matches = gis_utils.match_segment(
+            STELVIO_POLYLINE, track, max_distance_ratio=100
+        )
+        assert len(matches) == 1
+
+    def test_sparse_track(self):
+        # A straight segment with a point every ~20 m, and a track along the same
+        #  line with a point every ~200 m: most segment points are far from the
+        #  track points, but not from the track.
+        end = (46.05, 10.0)
+        segment = _line((46.0, 10.0), end, 250) + [end]
+        track = _line((46.0, 10.0), end, 28) + [end]
+        matches = gis_utils.match_segment(segment, track)
+        assert [(m.start_index, m.end_index) for m in matches] == [(0, 28)]
+        assert matches[0].distance_km == pytest.approx(5.56, abs=0.01)
@@ -0,0 +1,102 @@
+import math
+
+import pytest
+
+import gis_utils
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestHausdorffDistance:
+    def setup_method(self):
+        self.coords1 = [(46.0, 10.0), (46.01, 10.0), (46.02, 10.0)]
+        # Same line, with the middle point shifted east.
+        self.coords2 = [(46.0, 10.0), (46.01, 10.01), (46.02, 10.0)]
+
+    def test_happy_flow(self):
+        dist = gis_utils.hausdorff_distance(self.coords1, self.coords2)
+        assert dist == pytest.approx(
+            gis_utils.compute_great_circle_distance(46.01, 10.0, 46.01, 10.01)
+        )
+
+    def test_same(self):
+        assert gis_utils.hausdorff_distance(self.coords1, self.coords1) == 0
+
+    def test_order_does_not_matter(self):
+        dist = gis_utils.hausdorff_distance(self.coords1, self.coords2[::-1])
+        assert dist == gis_utils.hausdorff_distance(self.coords1, self.coords2)
+
+    def test_threshold(self):
+        dist = gis_utils.hausdorff_distance(self.coords1, self.coords2)
+        assert gis_utils.hausdorff_distance(
+            self.coords1, self.coords2, threshold_km=1
+        ) == pytest.approx(dist)
+        assert (
+            gis_utils.hausdorff_distance(self.coords1, self.coords2, threshold_km=0.7)
+            == math.inf
+        )
+
+    def test_downsample(self):
+        coords1 = gis_utils.resample_by_distance(self.coords1, step_m=10)
+        coords2 = gis_utils.resample_by_distance(self.coords2, step_m=10)
+        dist = gis_utils.hausdorff_distance(coords1, coords2, max_points=50)
+        expected = gis_utils.hausdorff_distance(coords1, coords2, max_points=None)
+        assert dist == pytest.approx(expected, abs=0.03)
+
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            gis_utils.hausdorff_distance([], self.coords1)
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestFrechetDistance:
+    def setup_method(self):
+        self.coords1 = [(46.0, 10.0), (46.01, 10.0), (46.02, 10.0)]
+        self.coords2 = [(46.0, 10.0), (46.005, 10.001), (46.02, 10.001)]
+
+    def test_happy_flow(self):
+        # The best walk is farthest when the 2nd points are paired.
+        dist = gis_utils.frechet_distance(self.coords1, self.coords2)
+        assert dist == pytest.approx(
+            gis_utils.compute_great_circle_distance(46.01, 10.0, 46.005, 10.001)
+        )
+
+    def test_same(self):
+        assert gis_utils.frechet_distance(self.coords1, self.coords1) == 0
+
+    def test_order_matters(self):
+        dist = gis_utils.frechet_distance(self.coords1, self.coords1[::-1])
+        assert dist == pytest.approx(
+            gis_utils.compute_great_circle_distance(*self.coords1[0], *self.coords1[-1])
+        )
+        assert gis_utils.hausdorff_distance(self.coords1, self.coords1[::-1]) == 0
+
+    def test_different_lengths(self):
+        coords2 = gis_utils.resample_by_distance(self.coords1, step_m=100)
+        assert gis_utils.frechet_distance(self.coords1, coords2) == pytest.approx(
+            0.5 * gis_utils.compute_great_circle_distance(46.0, 10.0, 46.01, 10.0),
+            abs=0.06,
+        )
+
+    def test_threshold(self):
+        dist = gis_utils.frechet_distance(self.coords1, self.coords2)
+        assert gis_utils.frechet_distance(
+            self.coords1, self.coords2, threshold_km=dist * 1.01
+        ) == pytest.approx(dist)
+        assert (
+            gis_utils.frechet_distance(
+                self.coords1, self.coords2, threshold_km=dist * 0.99
+            )
+            == math.inf
+        )
+        # The starts are ~1 km apart.
+        assert (
+            gis_utils.frechet_distance(self.coords1, self.coords1[1:], threshold_km=0.5)
+            == math.inf
+        )
+
+    def test_downsample(self):
+        coords1 = gis_utils.resample_by_distance(self.coords1, step_m=10)
+        coords2 = gis_utils.resample_by_distance(self.coords2, step_m=10)
+        dist = gis_utils.frechet_distance(coords1, coords2, max_points=50)
+        expected = gis_utils.frechet_distance(coords1, coords2, max_points=None)
+        assert dist == pytest.approx(expected, abs=0.03)
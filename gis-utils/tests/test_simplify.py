@@ -0,0 +1,117 @@
+import math
+import random
+
+import pytest
+
+import gis_utils
+
+
+def _random_walk(n_points: int, seed: int = 0) -> list[tuple[float, float]]:
+    rnd = random.Random(seed)
+    lat, lon = 46.46961, 10.36953
+    coords = []
+    for _ in range(n_points):
+        lat += rnd.gauss(0, 0.00003)
+        lon += rnd.gauss(0, 0.00003)
+        coords.append((lat, lon))
+    return coords
+
+
+def _distance_to_track_m(point, track) -> float:
+    # Brute force: the min distance between a point and the segments of a track, in
+    #  the same local projection used by simplify.
+    r = 6371000
+    k = r * math.cos(math.radians(track[0][0]))
+    px, py = k * math.radians(point[1]), r * math.radians(point[0])
+    best = math.inf
+    for (lat1, lon1), (lat2, lon2) in zip(track[:-1], track[1:]):
+        ax, ay = k * math.radians(lon1), r * math.radians(lat1)
+        bx, by = k * math.radians(lon2), r * math.radians(lat2)
+        dx, dy = bx - ax, by - ay
+        length2 = dx * dx + dy * dy
+        t = 0 if length2 == 0 else ((px - ax) * dx + (py - ay) * dy) / length2
+        t = min(1, max(0, t))
+        best = min(best, math.hypot(px - ax - t * dx, py - ay - t * dy))
+    return best
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestSimplifyDouglasPeucker:
+    def setup_method(self):
+        self.coords = _random_walk(2000)
+
+    def test_tolerance(self):
+        ixs = gis_utils.simplify_douglas_peucker(
+            self.coords, tolerance_m=5, do_return_indexes=True
+        )
+        assert ixs[0] == 0 and ixs[-1] == len(self.coords) - 1
+        assert 2 < len(ixs) < len(self.coords)
+        track = [self.coords[ix] for ix in ixs]
+        for point in self.coords[::50]:
+            assert _distance_to_track_m(point, track) <= 5 + 0.01
+
+    def test_max_points(self):
+        simple = gis_utils.simplify_douglas_peucker(self.coords, max_points=50)
+        assert len(simple) == 50
+        assert tuple(simple[0]) == self.coords[0]
+        assert tuple(simple[-1]) == self.coords[-1]
+
+    def test_max_points_same_as_tolerance(self):
+        # The max_points mode picks the tolerance automatically, so its result is the
+        #  same as with the tolerance it picked.
+        ixs_tol = gis_utils.simplify_douglas_peucker(
+            self.coords, tolerance_m=8, do_return_indexes=True
+        )
+        ixs_max = gis_utils.simplify_douglas_peucker(
+            self.coords, max_points=len(ixs_tol), do_return_indexes=True
+        )
+        assert ixs_max == ixs_tol
+
+    def test_straight_line(self):
+        coords = [(46.0, 10.0 + i * 0.001) for i in range(100)]
+        simple = gis_utils.simplify_douglas_peucker(coords, tolerance_m=1)
+        assert [tuple(x) for x in simple] == [coords[0], coords[-1]]
+
+    def test_short_track(self):
+        ixs = gis_utils.simplify_douglas_peucker(
+            self.coords[:2], tolerance_m=5, do_return_indexes=True
+        )
+        assert ixs == [0, 1]
+
+    def test_missing_args(self):
+        with pytest.raises(ValueError):
+            gis_utils.simplify_douglas_peucker(self.coords)
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestSimplifyVisvalingam:
+    def setup_method(self):
+        self.coords = _random_walk(2000)
+
+    def test_tolerance(self):
+        ixs = gis_utils.simplify_visvalingam(
+            self.coords, tolerance_m=5, do_return_indexes=True
+        )
+        assert ixs[0] == 0 and ixs[-1] == len(self.coords) - 1
+        assert 2 < len(ixs) < len(self.coords)
+        assert ixs == sorted(ixs)
+
+    def test_greater_tolerance_fewer_points(self):
+        simple5 = gis_utils.simplify_visvalingam(self.coords, tolerance_m=5)
+        simple20 = gis_utils.simplify_visvalingam(self.coords, tolerance_m=20)
+        assert len(simple20) < len(simple5)
+
+    def test_max_points(self):
+        simple = gis_utils.simplify_visvalingam(self.coords, max_points=50)
+        assert len(simple) == 50
+        assert tuple(simple[0]) == self.coords[0]
+        assert tuple(simple[-1]) == self.coords[-1]
+
+    def test_straight_line(self):
+        coords = [(46.0, 10.0 + i * 0.001) for i in range(100)]
+        simple = gis_utils.simplify_visvalingam(coords, tolerance_m=1)
+        assert [tuple(x) for x in simple] == [coords[0], coords[-1]]
+
+    def test_invalid_max_points(self):
+        with pytest.raises(ValueError):
+            gis_utils.simplify_visvalingam(self.coords, max_points=1)
@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+import gis_utils
+
+
+def _brute_force(coords, lat, lon, radius_km=float("inf")):
+    hits = []
+    for ix, point in enumerate(coords):
+        dist = gis_utils.compute_great_circle_distance(lat, lon, *point)
+        if dist <= radius_km:
+            hits.append((ix, dist))
+    return [ix for ix, _ in sorted(hits, key=lambda x: (x[1], x[0]))]
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestGridSpatialIndex:
+    def setup_method(self):
+        rnd = random.Random(42)
+        self.coords = [(rnd.uniform(46, 47), rnd.uniform(10, 11)) for _ in range(2000)]
+        # Points near the poles and the antimeridian.
+        self.coords += [(89.99, 10), (89.99, -170), (0, 179.999), (0, -179.999)]
+        self.index = gis_utils.GridSpatialIndex(self.coords, cell_size_km=2)
+
+    def test_query_radius(self):
+        hits = self.index.query_radius(46.46961, 10.36953, radius_km=3)
+        assert len(hits) > 0
+        assert [ix for ix, _ in hits] == _brute_force(
+            self.coords, 46.46961, 10.36953, 3
+        )
+        for ix, dist in hits:
+            assert dist == pytest.approx(
+                gis_utils.compute_great_circle_distance(
+                    46.46961, 10.36953, *self.coords[ix]
+                ),
+                rel=1e-12,
+            )
+
+    def test_query_radius_no_hits(self):
+        assert self.index.query_radius(10, 10, radius_km=3) == []
+
+    def test_query_radius_antimeridian(self):
+        hits = self.index.query_radius(0, 179.99, radius_km=5)
+        assert [ix for ix, _ in hits] == [2002, 2003]
+
+    def test_query_radius_pole(self):
+        hits = self.index.query_radius(90, 0, radius_km=5)
+        assert sorted(ix for ix, _ in hits) == [2000, 2001]
+
+    def test_query_nearest(self):
+        hits = self.index.query_nearest(46.5, 10.5, k=10)
+        assert [ix for ix, _ in hits] == _brute_force(self.coords, 46.5, 10.5)[:10]
+
+    def test_query_nearest_far_away(self):
+        hits = self.index.query_nearest(-45, -60, k=2)
+        assert [ix for ix, _ in hits] == _brute_force(self.coords, -45, -60)[:2]
+
+    def test_query_nearest_k_greater_than_size(self):
+        index = gis_utils.GridSpatialIndex(self.coords[:3])
+        assert len(index.query_nearest(46.5, 10.5, k=10)) == 3
+
+    def test_insert(self):
+        ix = self.index.insert(46.46961, 10.36953)
+        assert ix == len(self.coords)
+        assert len(self.index) == len(self.coords) + 1
+        hits = self.index.query_nearest(46.46961, 10.36953, k=1)
+        assert hits == [(ix, 0.0)]
+
+    def test_bulk_insert(self):
+        index = gis_utils.GridSpatialIndex(cell_size_km=2)
+        assert index.bulk_insert(self.coords[:1000]) == range(0, 1000)
+        assert index.bulk_insert(self.coords[1000:]) == range(1000, len(self.coords))
+        hits = index.query_radius(46.46961, 10.36953, radius_km=3)
+        assert hits == self.index.query_radius(46.46961, 10.36953, radius_km=3)
+
+    @pytest.mark.parametrize("cell_size_km", [50, 500, 3000])
+    def test_brute_force_large_cells(self, cell_size_km):
+        # Points and queries all over the globe, and near the antimeridian.
+        rnd = random.Random(cell_size_km)
+        coords = [(rnd.uniform(-90, 90), rnd.uniform(-180, 180)) for _ in range(300)]
+        coords += [(rnd.uniform(-60, 60), rnd.uniform(178, 180)) for _ in range(50)]
+        coords += [(rnd.uniform(-60, 60), rnd.uniform(-180, -178)) for _ in range(50)]
+        index = gis_utils.GridSpatialIndex(coords, cell_size_km=cell_size_km)
+        for _ in range(100):
+            lat = rnd.uniform(-89, 89)
+            lon = rnd.choice([rnd.uniform(-180, 180), rnd.uniform(179, 180)])
+            radius_km = rnd.uniform(10, 2000)
+            hits = index.query_radius(lat, lon, radius_km)
+            assert [ix for ix, _ in hits] == _brute_force(coords, lat, lon, radius_km)
+            hits = index.query_nearest(lat, lon, k=5)
+            assert [ix for ix, _ in hits] == _brute_force(coords, lat, lon)[:5]
+
+    def test_invalid_cell_size(self):
+        with pytest.raises(ValueError):
+            gis_utils.GridSpatialIndex(cell_size_km=0)
@@ -0,0 +1,113 @@
+import pytest
+
+import gis_utils
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestEncodeGeohashes:
+    def test_happy_flow(self):
+        # Example from: https://en.wikipedia.org/wiki/Geohash
+        geohashes = gis_utils.encode_geohashes(
+            [(57.64911, 10.40744), (46.46961, 10.36953)], precision=11
+        )
+        assert geohashes == ["u4pruydqqvj", "u0r27gwc5e1"]
+
+    def test_precision(self):
+        geohashes = gis_utils.encode_geohashes([(46.46961, 10.36953)], precision=7)
+        assert geohashes == ["u0r27gw"]
+
+    def test_corners(self):
+        geohashes = gis_utils.encode_geohashes([(-90, -180), (90, 180)], precision=3)
+        assert geohashes == ["000", "zzz"]
+
+    def test_empty(self):
+        assert gis_utils.encode_geohashes([]) == []
+
+    def test_invalid_precision(self):
+        with pytest.raises(ValueError):
+            gis_utils.encode_geohashes([(46.46961, 10.36953)], precision=13)
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestDecodeGeohashes:
+    def test_happy_flow(self):
+        coords = gis_utils.decode_geohashes(["u4pruydqqvj", "u0r27gwc5e1"])
+        assert len(coords) == 2
+        assert tuple(coords[0]) == pytest.approx((57.64911, 10.40744), abs=1e-5)
+        assert tuple(coords[1]) == pytest.approx((46.46961, 10.36953), abs=1e-5)
+
+    def test_roundtrip(self):
+        coords = [(46.46961, 10.36953), (-33.8688, 151.2093), (40.7128, -74.006)]
+        geohashes = gis_utils.encode_geohashes(coords, precision=9)
+        assert (
+            gis_utils.encode_geohashes(
+                gis_utils.decode_geohashes(geohashes), precision=9
+            )
+            == geohashes
+        )
+
+    def test_empty(self):
+        assert len(gis_utils.decode_geohashes([])) == 0
+
+    def test_invalid_char(self):
+        with pytest.raises(ValueError):
+            gis_utils.decode_geohashes(["u0ra"])
+
+    def test_different_lengths(self):
+        with pytest.raises(ValueError):
+            gis_utils.decode_geohashes(["u0r", "u0r2"])
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestCoordsToTiles:
+    def test_happy_flow(self):
+        xs, ys = gis_utils.coords_to_tiles(
+            [(46.46961, 10.36953), (-33.8688, 151.2093)], zoom=14
+        )
+        assert list(xs) == [8663, 15073]
+        assert list(ys) == [5797, 9831]
+
+    def test_zoom_0(self):
+        xs, ys = gis_utils.coords_to_tiles([(89.9, 179.9), (-89.9, -180)], zoom=0)
+        assert list(xs) == [0, 0]
+        assert list(ys) == [0, 0]
+
+    def test_invalid_zoom(self):
+        with pytest.raises(ValueError):
+            gis_utils.coords_to_tiles([(46.46961, 10.36953)], zoom=31)
+
+    def test_tiles_to_coords(self):
+        xs, ys = gis_utils.coords_to_tiles([(46.46961, 10.36953)], zoom=14)
+        nw = gis_utils.tiles_to_coords(xs, ys, zoom=14)
+        se = gis_utils.tiles_to_coords([xs[0] + 1], [ys[0] + 1], zoom=14)
+        assert se[0][0] < 46.46961 < nw[0][0]
+        assert nw[0][1] < 10.36953 < se[0][1]
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestBboxToTileCover:
+    def test_happy_flow(self):
+        tiles = gis_utils.bbox_to_tile_cover(46.4, 10.3, 46.5, 10.4, zoom=12)
+        assert tiles == [
+            (12, 2165, 1448),
+            (12, 2165, 1449),
+            (12, 2165, 1450),
+            (12, 2166, 1448),
+            (12, 2166, 1449),
+            (12, 2166, 1450),
+        ]
+
+    def test_antimeridian(self):
+        tiles = gis_utils.bbox_to_tile_cover(-1, 179, 1, -179, zoom=2)
+        assert sorted({x for _, x, _ in tiles}) == [0, 3]
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestGroupByTile:
+    def test_happy_flow(self):
+        coords = [(46.46961, 10.36953), (0, 0), (46.46962, 10.36954)]
+        groups = gis_utils.group_by_tile(coords, zoom=14)
+        assert groups == {(14, 8663, 5797): [0, 2], (14, 8192, 8192): [1]}
+
+    def test_empty(self):
+        assert gis_utils.group_by_tile([], zoom=14) == dict()
@@ -0,0 +1,81 @@
+import pickle
+
+import pytest
+
+import gis_utils
+from gis_utils import track as track_module
+
+# Strava segment Re Stelvio Mapei, segment-id 15104529341.
+STELVIO_POLYLINE = r"abszGqhh~@s@nD{F~I{HbE_@AQeAzBqIYk@qGpEiEn@sPmBlG{EeGeAmBiCqIdF{IAgCdBwAdDeEdC}A~CiEi@cC_BwKpHqPlC}CvDuAdDgC`@gB~CBlC]bA{DbCuDbEcBXmA~AoBEkNxAqClCiCt@}GQqDpAuAc@uEoNoGiLVSfEtEwDeIaE}OeGcMNQ|D`FyDsJAwE}@kED}AcC}EmAc@}BsD_@yIeC_IUqDfBvEk@eF^lB`AhBZAqAoEQoEHeBvAqAPkSdAgH[_Lf@cDmBoQ@uDf@uBuAgCGyEoB_Ja@mJsCwD}AuEoCcEeDyLwEaH?e@l@BlD`DXOoBmCcA}CkByAxBj@nAvBR[yGiMgDCzByByEp@zFmFyFt@aCjB~AmD`EmCG[gGlAyCxFpBeJbFqCf@eAkInCoAbCsF|DSg@bA}F`EsCcL|B}LwB{BoA}D|CiCs@sLlBuAOiFwD{CMqElAqKw@aKuEkDeG{FOyCmDwE}@cKeQsA_EgDex@f@oJx@_GtBoGhIsI}GhAdJeKgE`@kCrAtAaEfHeEjByFdGmFs@{BjNyAdHiDgFaMC{AbBgDtEyB`AiDu@y@kGv@Wa@LkAdDcIb@iGzE\jC~CZcAsAyEpGeAy@gLuA[tGeJ~EE@cC}@}BtAwKFjA{ApIv@~APxBu@rAmDs@kHzIzAt@`AnKuGhAjAtEWbAcCwCaFg@c@pGgDjIIfAZj@dGw@r@h@aAhD_FjCuAxCNpBtElLmGzC{N|Al@fCcGbFcBzFcHbE}BlETd@hCqBjEi@iJzJTd@lGeBsIvIwAzDmAzGi@`MpCvt@x@dEdLpSjFhA`DvDvFJdDtFtKjF~Jj@`FoAtCPvGjEhMyBhCx@`E_D|AlAlMtBbLiCuDzAuAzHVn@rFoDvBmDnGcBaG|DqBxI`@TpCsFzFwAoE~CyAfCDl@dKcDcGnFbFi@}BrB~DXpGpLyAiBmCc@hBhB|@rCvBtCqDuCw@IKj@`FhH~DnNjBpBhBnF`ChCTfJdAjC~DfT_ArAApB`AtM?hLx@vEa@hEy@zAc@hMcBhNNdDxAdFaCaFr@dFkBwETxE|BlGb@bJdCfE`GrBaAfB?bBdAxEAfEzD|JsDeFYVpG`NdDxMlEjJkEyEU^lElHpFzMp@zC|Ad@hDwA~GL`Cu@dCoCrNwAlBNrD{B|JyIJsDpB_EzBSlFwIhPiC|K{HxCfBzDf@dBmDfEcChAmCtBeBjJIfH}ElAJjAdB~FlAyBxBiC`APz@pSpAdCs@lF_EJx@yBfIN|@n@@hGsCjGiJbAwBl@sIxBsDbD]fIfFk@qCv@_FtHeB"
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestTrack:
+    def setup_method(self):
+        self.coords = gis_utils.polyline_str_to_coords(STELVIO_POLYLINE)
+        self.track = gis_utils.Track.from_polyline(STELVIO_POLYLINE)
+
+    def test_happy_flow(self):
+        assert len(self.track) == 349
+        assert self.track.to_coords() == self.coords
+        assert self.track[0] == (46.46961, 10.36953)
+        assert self.track[-1] == (46.46477, 10.37296)
+        assert self.track[300] == self.coords[300]
+        assert list(self.track.lats) == [x[0] for x in self.coords]
+        assert list(self.track.lons) == [x[1] for x in self.coords]
+        assert list(self.track.to_array()) == [x for c in self.coords for x in c]
+
+    def test_from_coords(self):
+        track = gis_utils.Track(self.coords)
+        assert track.to_coords() == self.coords
+
+    def test_precision_6(self):
+        coords = [(46.469613, 10.369531), (-46.469614, -10.369532)]
+        track = gis_utils.Track(coords, precision=6)
+        assert track.to_coords() == tuple(coords)
+
+    def test_compact(self):
+        # 8 bytes per point, plus the checkpoints.
+        assert self.track.nbytes < 349 * 8 + 64
+
+    def test_index_error(self):
+        with pytest.raises(IndexError):
+            self.track[349]
+
+    def test_out_of_range(self):
+        with pytest.raises(ValueError):
+            gis_utils.Track([(0, 0), (5000, 0)], precision=6)
+
+    def test_slice(self, monkeypatch):
+        # Small checkpoint steps to also test the random access across checkpoints.
+        monkeypatch.setattr(track_module, "_CHECKPOINT_STEP", 16)
+        track = gis_utils.Track.from_polyline(STELVIO_POLYLINE)
+        view = track[100:300]
+        assert view._deltas is track._deltas
+        assert len(view) == 200
+        assert view.to_coords() == self.coords[100:300]
+        assert view[5:10].to_coords() == self.coords[105:110]
+        assert view[-1] == self.coords[299]
+        assert list(view.lats) == [x[0] for x in self.coords[100:300]]
+        assert track[::3].to_coords() == self.coords[::3]
+        assert len(track[300:100]) == 0
+
+    def test_empty(self):
+        track = gis_utils.Track()
+        assert len(track) == 0
+        assert track.to_coords() == tuple()
+
+    @pytest.mark.parametrize("protocol", [2, 4, 5])
+    def test_pickle(self, protocol):
+        track = pickle.loads(pickle.dumps(self.track, protocol=protocol))
+        assert track.to_coords() == self.coords
+        view = pickle.loads(pickle.dumps(self.track[100:300], protocol=protocol))
+        assert view.to_coords() == self.coords[100:300]
+
+    def test_pickle_out_of_band(self):
+        buffers = []
+        data = pickle.dumps(self.track, protocol=5, buffer_callback=buffers.append)
+        assert len(buffers) == 1
+        assert len(data) < 100
+        track = pickle.loads(data, buffers=buffers)
+        assert track.to_coords() == self.coords
@@ -0,0 +1,57 @@
+import pytest
+
+import gis_utils
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestCumulativeDistance:
+    def test_happy_flow(self):
+        coords = [(46.46961, 10.36953), (46.47961, 10.36953), (46.48961, 10.37953)]
+        dists = gis_utils.cumulative_distance(coords)
+        assert len(dists) == 3
+        assert dists[0] == 0
+        assert dists[1] == pytest.approx(
+            gis_utils.compute_great_circle_distance(*coords[0], *coords[1])
+        )
+        assert dists[2] == pytest.approx(
+            dists[1] + gis_utils.compute_great_circle_distance(*coords[1], *coords[2])
+        )
+
+    def test_single_point(self):
+        assert list(gis_utils.cumulative_distance([(46.46961, 10.36953)])) == [0]
+
+    def test_empty(self):
+        assert len(gis_utils.cumulative_distance([])) == 0
+
+
+@pytest.mark.usefixtures("numpy_or_pure_python")
+class TestResampleByDistance:
+    def setup_method(self):
+        # 2 straight lines going north, ~1.1 km each.
+        self.coords = [(46.0, 10.0), (46.01, 10.0), (46.02, 10.0)]
+
+    def test_happy_flow(self):
+        points = gis_utils.resample_by_distance(self.coords, step_m=100)
+        total_km = gis_utils.cumulative_distance(self.coords)[-1]
+        assert len(points) == int(total_km * 10) + 2
+        assert tuple(points[0]) == self.coords[0]
+        assert tuple(points[-1]) == self.coords[-1]
+        dists = gis_utils.compute_great_circle_distances_along_track(points)
+        for dist in dists[:-1]:
+            assert dist == pytest.approx(0.1, rel=1e-6)
+        assert dists[-1] < 0.1
+
+    def test_step_longer_than_track(self):
+        points = gis_utils.resample_by_distance(self.coords, step_m=10000)
+        assert [tuple(x) for x in points] == [self.coords[0], self.coords[-1]]
+
+    def test_antimeridian(self):
+        coords = [(0.0, 179.999), (0.0, -179.999)]
+        points = gis_utils.resample_by_distance(coords, step_m=100)
+        assert len(points) == 4
+        for point in points:
+            assert abs(point[1]) > 179.99
+
+    def test_invalid_step(self):
+        with pytest.raises(ValueError):
+            gis_utils.resample_by_distance(self.coords, step_m=0)
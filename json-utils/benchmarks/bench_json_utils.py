@@ -0,0 +1,173 @@
+"""
+Benchmark: to_json_string(), CustomJsonEncoder and prettify_to_non_json_string()
+ across payload shapes (wide flat dicts, deep nesting, datetime-heavy records, large
+ byte strings, lists of many records), with the std lib json.dumps() as a baseline.
+The results are printed and written to a JSON file, to compare runs over time (fi.
+ before and after an optimization, or with and without the orjson backend).
+
+Run it with:
+    $ make benchmark
+or:
+    $ python benchmarks/bench_json_utils.py --n-records 100000 --output results.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import string
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from importlib import metadata
+from uuid import UUID
+
+import json_utils
+
+
+def _time(fn, n_repeats: int) -> float:
+    # The best of n_repeats runs, in seconds.
+    best = float("inf")
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _make_payloads(n_records: int, seed: int) -> dict:
+    rng = random.Random(seed)
+
+    def text(n: int) -> str:
+        return "".join(rng.choices(string.ascii_letters + " ", k=n))
+
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    deep = {"value": 0}
+    for i in range(1, 200):
+        deep = {"level": i, "name": text(8), "child": deep, "siblings": [i, i + 1]}
+
+    return {
+        # Only types supported by the std lib, so json.dumps() is a fair baseline.
+        "wide_flat_dict": {f"key_{i}": rng.random() for i in range(n_records // 10)},
+        "deep_nesting": deep,
+        "records": [
+            {
+                "id": i,
+                "name": text(12),
+                "distance": rng.uniform(1, 200),
+                "is_race": rng.random() < 0.1,
+                "tags": [text(5) for _ in range(3)],
+            }
+            for i in range(n_records)
+        ],
+        # Types that need the custom encoder.
+        "datetime_records": [
+            {
+                "id": i,
+                "uuid": UUID(int=rng.getrandbits(128)),
+                "start": start + timedelta(seconds=i),
+                "end": start + timedelta(seconds=i + 3600),
+                "laps": [start + timedelta(seconds=i + x * 60) for x in range(5)],
+            }
+            for i in range(n_records // 10)
+        ],
+        "large_bytes": [
+            text(1_000_000).encode() for _ in range(max(1, n_records // 10_000))
+        ],
+    }
+
+
+def _get_benchmarks(payload) -> dict:
+    # Name -> fn; the std lib baseline only for the payloads it can encode.
+    benchmarks = dict()
+    try:
+        json.dumps(payload)
+    except TypeError:
+        pass
+    else:
+        benchmarks["json.dumps"] = lambda: json.dumps(payload)
+    benchmarks["json.dumps(cls=CustomJsonEncoder)"] = lambda: json.dumps(
+        payload, cls=json_utils.CustomJsonEncoder
+    )
+    benchmarks["to_json_string"] = lambda: json_utils.to_json_string(payload)
+    benchmarks["to_json_string(indent=4)"] = lambda: json_utils.to_json_string(
+        payload, indent=4
+    )
+    benchmarks["to_json_string(compact)"] = lambda: json_utils.to_json_string(
+        payload, separators=(",", ":"), ensure_ascii=False
+    )
+    benchmarks["to_json_string(compact, backend=auto)"] = (
+        lambda: json_utils.to_json_string(
+            payload, separators=(",", ":"), ensure_ascii=False, backend="auto"
+        )
+    )
+    text = json_utils.to_json_string(payload, indent=4)
+    benchmarks["prettify_to_non_json_string"] = (
+        lambda: json_utils.prettify_to_non_json_string(text)
+    )
+    return benchmarks
+
+
+def _get_version(lib: str) -> str | None:
+    try:
+        return metadata.version(lib)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def main(n_records: int, n_repeats: int, seed: int, output: str | None) -> None:
+    payloads = _make_payloads(n_records, seed)
+    results = []
+    print(f"n_records: {n_records}, orjson: {_get_version('orjson')}")
+    for payload_name, payload in payloads.items():
+        size = len(json_utils.to_json_string(payload))
+        print(f"\n{payload_name} ({size / 1e6:.1f} MB of JSON)")
+        timings = dict()
+        for name, fn in _get_benchmarks(payload).items():
+            seconds = timings[name] = _time(fn, n_repeats)
+            mb_per_s = size / seconds / 1e6
+            print(f"  {name:<42} {seconds * 1000:>10.1f} ms {mb_per_s:>8.0f} MB/s")
+            results.append(
+                {
+                    "payload": payload_name,
+                    "benchmark": name,
+                    "seconds": seconds,
+                    "json_size": size,
+                    "mb_per_s": mb_per_s,
+                }
+            )
+        # The orjson backend must be faster than the std lib for the same output
+        #  (or about the same, when it falls back to the std lib).
+        speedup = (
+            timings["to_json_string(compact)"]
+            / timings["to_json_string(compact, backend=auto)"]
+        )
+        print(f"  backend=auto speedup: {speedup:.1f}x")
+
+    if output:
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version,
+            "platform": platform.platform(),
+            "orjson": _get_version("orjson"),
+            "n_records": n_records,
+            "n_repeats": n_repeats,
+            "seed": seed,
+            "results": results,
+        }
+        with open(output, "w") as fp:
+            json.dump(report, fp, indent=2)
+        print(f"\nResults written to: {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-records", type=int, default=100_000)
+    parser.add_argument("--n-repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", default="benchmarks/results.json", help="the JSON results file"
+    )
+    args = parser.parse_args()
+    main(args.n_records, args.n_repeats, args.seed, args.output)
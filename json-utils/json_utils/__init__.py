@@ -1 +1,5 @@
+from .compact_decoder import *
+from .compression import *
 from .json_utils import *
+from .lazy_json import *
+from .streaming import *
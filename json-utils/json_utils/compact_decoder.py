@@ -0,0 +1,175 @@
+"""
+** JSON UTILS: COMPACT DECODER **
+=================================
+A JSON decoder for big datasets (fi. lists of homogeneous objects), that uses less
+ memory than the default one:
+ - the keys are interned: a key is a single string, shared by all the objects that
+    have it, even across many decode() calls (fi. the lines of a NDJSON file);
+ - optionally, objects are decoded to compact records (instead of dicts), with a
+    class per shape (the tuple of the keys): a record stores only the values.
+
+```py
+import json
+import json_utils
+
+data = json.loads(text, cls=json_utils.CompactDecoder, records="slots")
+assert data[0]["name"] == data[0].name
+
+# The interned keys and record classes are shared by all the lines.
+with open("export.ndjson") as fp:
+    records = list(
+        json_utils.iter_ndjson(fp, cls=json_utils.CompactDecoder, records="slots")
+    )
+```
+"""
+
+import json
+import keyword
+from collections import namedtuple
+from typing import Any, Iterator
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "CompactDecoder",
+    "Record",
+]
+
+
+class Record:
+    """
+    The base class of the records decoded by CompactDecoder(records="slots"): an
+     object with a slot per key (so without a dict for each instance).
+    It has a read-only dict-like API, and it is encoded back to a JSON object by
+     CustomJsonEncoder (see to_dict()).
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def keys(self) -> tuple[str]:
+        return self.__slots__
+
+    def values(self) -> list:
+        return [getattr(self, x) for x in self.__slots__]
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [(x, getattr(self, x)) for x in self.__slots__]
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Record({self.to_dict()!r})"
+
+
+# The names that a Record or a namedtuple must keep for its own attributes.
+_RESERVED_NAMES = set(dir(Record)) | set(dir(tuple))
+
+
+def _is_valid_shape(keys: tuple[str]) -> bool:
+    return len(set(keys)) == len(keys) and all(
+        key.isidentifier()
+        and not keyword.iskeyword(key)
+        and not key.startswith("_")
+        and key not in _RESERVED_NAMES
+        for key in keys
+    )
+
+
+def _make_record_class(keys: tuple[str]) -> type:
+    # A __init__ with a parameter per key is much faster than a loop of setattr().
+    # Note: the instance is `_record` (not `self`, a common key fi. in the HAL and
+    #  JSON:API links), and the keys never start with "_".
+    args = ", ".join(keys)
+    body = "".join(f"\n    _record.{key} = {key}" for key in keys) or "\n    pass"
+    namespace = dict()
+    exec(f"def __init__(_record, {args}):{body}", namespace)
+    return type(
+        "Record", (Record,), {"__slots__": keys, "__init__": namespace["__init__"]}
+    )
+
+
+class CompactDecoder(json.JSONDecoder):
+    """
+    A JSON decoder that interns the keys and, optionally, decodes objects to compact
+     records. Decoding is a bit slower than with the default decoder (objects are
+     built in Python), but the decoded data can take several times less memory.
+
+    Args:
+        records: None to decode objects to dicts; "slots" to decode them to Record
+         instances (with the attributes and a read-only dict-like API); "tuple" to
+         decode them to namedtuples (the smallest, but encoded back to JSON arrays).
+         Objects whose keys are not valid attribute names (fi. "first-name",
+         "_id", "keys") are decoded to dicts anyway.
+        max_shapes: the max number of record classes (1 for each set of keys): the
+         objects with new shapes after that are decoded to dicts.
+        **kwargs: passed down to json.JSONDecoder(...), eg. `parse_float=Decimal`.
+
+    Usage:
+        json.loads(text, cls=json_utils.CompactDecoder, records="slots")
+    """
+
+    def __init__(self, *, records: str | None = None, max_shapes: int = 1024, **kwargs):
+        if records not in (None, "slots", "tuple"):
+            raise ValueError(f'records must be None, "slots" or "tuple", not {records}')
+        for hook in ("object_hook", "object_pairs_hook"):
+            if kwargs.get(hook) is not None:
+                raise ValueError(f"{hook} is not supported by CompactDecoder")
+            kwargs.pop(hook, None)
+        object_pairs_hook = self._make_dict
+        if records is not None:
+            object_pairs_hook = self._make_record
+        super().__init__(object_pairs_hook=object_pairs_hook, **kwargs)
+        self.records = records
+        self.max_shapes = max_shapes
+        self._keys = dict()
+        # Shape (tuple of keys) -> record class (or None to decode to dicts).
+        self._record_classes = dict()
+
+    def _make_dict(self, pairs: list[tuple[str, Any]]) -> dict:
+        keys = self._keys
+        return {keys.setdefault(key, key): value for key, value in pairs}
+
+    def _make_record(self, pairs: list[tuple[str, Any]]) -> Any:
+        shape = tuple([key for key, _ in pairs])
+        try:
+            record_class = self._record_classes[shape]
+        except KeyError:
+            record_class = self._add_record_class(shape)
+        if record_class is None:
+            return self._make_dict(pairs)
+        return record_class(*[value for _, value in pairs])
+
+    def _add_record_class(self, shape: tuple[str]) -> type | None:
+        if len(self._record_classes) >= self.max_shapes:
+            return None
+        record_class = None
+        if _is_valid_shape(shape):
+            keys = tuple(self._keys.setdefault(key, key) for key in shape)
+            if self.records == "slots":
+                record_class = _make_record_class(keys)
+            else:
+                record_class = namedtuple("Record", keys)
+        self._record_classes[shape] = record_class
+        return record_class
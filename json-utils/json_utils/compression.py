@@ -0,0 +1,234 @@
+"""
+** JSON UTILS: COMPRESSION **
+=============================
+Read and write JSON (and NDJSON) files compressed with gzip, zlib or lzma (xz),
+ streaming: the data is compressed and decompressed in chunks, never all in memory.
+On read, the compression is detected from the first bytes of the file, so any file
+ (compressed or not) can be read the same way.
+
+```py
+import json_utils
+
+json_utils.dump_json_file(data, "/tmp/activities.json.gz")  # gzip by the extension.
+data = json_utils.load_json_file("/tmp/activities.json.gz")
+
+# Any stream fn on a compressed file.
+with json_utils.open_json_file("/tmp/activities.ndjson.xz", "w") as fp:
+    json_utils.dump_ndjson(iter_activities(), fp)
+with json_utils.open_json_file("/tmp/activities.ndjson.xz") as fp:
+    for activity in json_utils.iter_ndjson(fp):
+        ...
+```
+"""
+
+import gzip
+import io
+import json
+import lzma
+import os
+import zlib
+from typing import IO, Any
+
+from .streaming import dump_stream
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "open_json_file",
+    "dump_json_file",
+    "load_json_file",
+]
+
+_COMPRESSIONS = ("gzip", "zlib", "lzma")
+
+# File extension -> compression, for writing with compression="auto".
+_EXTENSIONS = {
+    ".gz": "gzip",
+    ".gzip": "gzip",
+    ".zz": "zlib",
+    ".zlib": "zlib",
+    ".xz": "lzma",
+    ".lzma": "lzma",
+}
+
+# The default compression level: the same of the command line tools (gzip, xz),
+#  a good trade-off between speed and size.
+_DEFAULT_LEVEL = 6
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def _detect_compression(head: bytes) -> str | None:
+    # Detect the compression from the magic bytes (the first bytes) of a file.
+    if head.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if head.startswith(b"\xfd7zXZ\x00") or head.startswith(b"\x5d\x00\x00"):
+        # The .xz format, or the legacy .lzma format.
+        return "lzma"
+    # A zlib header: a deflate method byte with a checksum, and no preset dictionary
+    #  (the FDICT bit, unsupported by the reader). The only JSON texts that pass the
+    #  checksum start with "80", and those have the FDICT bit set.
+    if (
+        len(head) >= 2
+        and head[0] & 0x0F == 8
+        and not head[1] & 0x20
+        and (head[0] << 8 | head[1]) % 31 == 0
+    ):
+        return "zlib"
+    return None
+
+
+class _ZlibReader(io.RawIOBase):
+    # A read-only file-like object that decompresses a zlib stream in chunks (the
+    #  std lib has gzip.open() and lzma.open(), but nothing like that for zlib).
+    def __init__(self, fp: IO[bytes]):
+        self._fp = fp
+        self._decompressor = zlib.decompressobj()
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = b""
+        while not data:
+            if not self._pending:
+                if self._decompressor.eof:
+                    return 0
+                self._pending = self._fp.read(_CHUNK_SIZE)
+                if not self._pending:
+                    data = self._decompressor.flush()
+                    if not data:
+                        raise EOFError("Compressed file ended before the end")
+                    break
+            data = self._decompressor.decompress(self._pending, len(buffer))
+            self._pending = self._decompressor.unconsumed_tail
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._fp.close()
+        super().close()
+
+
+class _ZlibWriter(io.RawIOBase):
+    # A write-only file-like object that compresses to a zlib stream in chunks.
+    def __init__(self, fp: IO[bytes], level: int):
+        self._fp = fp
+        self._compressor = zlib.compressobj(level)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._fp.write(self._compressor.compress(data))
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._fp.write(self._compressor.flush())
+            self._fp.close()
+        super().close()
+
+
+def open_json_file(
+    path: str | os.PathLike,
+    mode: str = "r",
+    compression: str | None = "auto",
+    level: int = _DEFAULT_LEVEL,
+) -> IO[str]:
+    """
+    Open a (possibly compressed) JSON or NDJSON file as a text file (UTF-8), that
+     compresses or decompresses in chunks (streaming).
+
+    Args:
+        path: the path of the file.
+        mode: "r" to read, "w" to write, "a" to append (only without compression or
+         with gzip and lzma, that support multiple streams in a file).
+        compression: "gzip", "zlib", "lzma" or None; "auto" to detect it from the
+         magic bytes (the first bytes) of the file when reading, or from the
+         extension (.gz, .zz or .zlib, .xz or .lzma) when writing.
+        level: the compression level (when writing): 0-9, the higher the smaller
+         and slower.
+
+    Returns: a text file object, to use in a `with` statement.
+
+    Example:
+        with json_utils.open_json_file("/tmp/export.ndjson.gz", "w") as fp:
+            json_utils.dump_ndjson(records, fp)
+    """
+    if mode not in ("r", "w", "a"):
+        raise ValueError(f'mode must be "r", "w" or "a", not {mode}')
+    if compression not in ("auto", None, *_COMPRESSIONS):
+        raise ValueError(f"Unknown compression: {compression}")
+
+    if compression == "auto":
+        if mode == "r":
+            with open(path, "rb") as fp:
+                compression = _detect_compression(fp.read(6))
+        else:
+            compression = _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+    # Note: "utf-8-sig" skips a BOM when reading, but it would write one.
+    encoding = "utf-8-sig" if mode == "r" else "utf-8"
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", compresslevel=level, encoding=encoding)
+    if compression == "lzma":
+        preset = None if mode == "r" else level
+        return lzma.open(path, mode + "t", preset=preset, encoding=encoding)
+    if compression is None:
+        return open(path, mode, encoding=encoding)
+
+    if mode == "a":
+        raise ValueError("Cannot append to a zlib file")
+    raw = open(path, mode + "b")
+    if mode == "r":
+        binary = io.BufferedReader(_ZlibReader(raw), _CHUNK_SIZE)
+    else:
+        binary = io.BufferedWriter(_ZlibWriter(raw, level), _CHUNK_SIZE)
+    return io.TextIOWrapper(binary, encoding=encoding)
+
+
+def dump_json_file(
+    data: Any,
+    path: str | os.PathLike,
+    compression: str | None = "auto",
+    level: int = _DEFAULT_LEVEL,
+    **kwargs,
+) -> None:
+    """
+    Write a Python object to a (possibly compressed) JSON file, streaming (see
+     dump_stream() and open_json_file()).
+
+    Args:
+        data: any Python object; an iterator is written as a JSON array.
+        path: the path of the file.
+        compression: see open_json_file(); "auto" to detect it from the extension.
+        level: the compression level: 0-9, the higher the smaller and slower.
+        **kwargs: passed down to dump_stream(...), eg. `indent=4`.
+
+    Example:
+        json_utils.dump_json_file(activities, "/tmp/activities.json.gz")
+    """
+    with open_json_file(path, "w", compression, level) as fp:
+        dump_stream(data, fp, **kwargs)
+
+
+def load_json_file(
+    path: str | os.PathLike, compression: str | None = "auto", **kwargs
+) -> Any:
+    """
+    Read a (possibly compressed) JSON file, see open_json_file().
+    Note: the decompression is streaming, but the decoded data is all in memory;
+     for huge arrays, use iter_json_array() on open_json_file().
+
+    Args:
+        path: the path of the file.
+        compression: see open_json_file(); "auto" to detect it from the magic bytes.
+        **kwargs: passed down to json.load(...), eg. `cls=CompactDecoder`.
+
+    Example:
+        activities = json_utils.load_json_file("/tmp/activities.json.gz")
+    """
+    with open_json_file(path, "r", compression) as fp:
+        return json.load(fp, **kwargs)
@@ -9,42 +9,408 @@ data = {"date": datetime(2025, 1, 1)}
 json_utils.to_json_string(data, indent=4)
 
 json.dumps(data, cls=json_utils.CustomJsonEncoder)
+
+# Add a custom type.
+json_utils.register_type_handler(Point, lambda obj: [obj.lat, obj.lon])
+
+# Use orjson (if installed) for compact JSON strings, see to_json_string().
+json_utils.to_json_string(data, separators=(",", ":"), ensure_ascii=False, backend="auto")
 ```
 """
 
 import contextlib
+import dataclasses
+import importlib
 import inspect
 import json
+import math
+import re
+import threading
 import warnings
 from datetime import datetime
-from typing import Any
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, get_type_hints
 from uuid import UUID
 
+try:
+    # orjson is an optional extra: pip install "json-utils[orjson]".
+    _orjson = importlib.import_module("orjson")
+except ImportError:
+    _orjson = None
+
 # Objects exported to the `import *` in `__init__.py`.
 __all__ = [
     "CustomJsonEncoder",
+    "register_type_handler",
+    "compile_serializer",
     "to_json_string",
     "to_json",
     "prettify_to_non_json_string",
 ]
 
+# Type -> fn that converts an instance to a JSON-serializable object.
+_TYPE_HANDLERS: dict[type, Callable[[Any], Any]] = {
+    datetime: lambda obj: obj.isoformat(),
+    bytes: lambda obj: obj.decode(),
+    UUID: str,
+}
+
+# Class name -> handler, for classes from libs that we don't want to import.
+_CLASS_NAME_HANDLERS: dict[str, Callable[[Any], Any]] = {
+    # It's the Decimal class coming from DynamoDB.
+    "Decimal": float,
+    # It's the pydantic.HttpUrl class coming from pydantic.
+    "Url": str,
+}
+
+# The types encoded natively by json.
+_JSON_TYPES = {str, int, float, bool, type(None), list, tuple, dict}
+
+# Concrete class -> its handler (or None), so the lookup is a single dict get.
+_handlers_cache: dict[type, Callable[[Any], Any] | None] = dict()
+
+# The classes whose serializer is being compiled, in the current thread.
+_compiling = threading.local()
+
+
+def register_type_handler(cls: type, handler: Callable[[Any], Any]) -> None:
+    """
+    Register a fn to convert the instances of a class (and of its subclasses) to a
+     JSON-serializable object, in CustomJsonEncoder and in to_json_string().
+    It takes precedence over the built-in handlers (datetime, bytes, UUID, ...).
+
+    Args:
+        cls: the class.
+        handler: a fn that takes an instance and returns a JSON-serializable object.
+
+    Example:
+        json_utils.register_type_handler(Point, lambda obj: [obj.lat, obj.lon])
+        json_utils.to_json_string({"start": Point(46.46961, 10.36953)})
+    """
+    _TYPE_HANDLERS[cls] = handler
+    _handlers_cache.clear()
+
+
+def _to_dict(obj: Any) -> Any:
+    return obj.to_dict()
+
+
+def _get_handler(cls: type) -> Callable[[Any], Any] | None:
+    try:
+        return _handlers_cache[cls]
+    except KeyError:
+        pass
+    handler = None
+    # The most specific class first.
+    for klass in cls.__mro__:
+        if klass in _TYPE_HANDLERS:
+            handler = _TYPE_HANDLERS[klass]
+            break
+    else:
+        if cls.__name__ in _CLASS_NAME_HANDLERS:
+            handler = _CLASS_NAME_HANDLERS[cls.__name__]
+        elif callable(getattr(cls, "to_dict", None)):
+            handler = _to_dict
+        else:
+            # Dataclasses and pydantic and peewee models.
+            # Note: no handler while compiling, for fields annotated with the class
+            #  itself (fi. a tree). It is tracked per thread, and not cached, so
+            #  that other threads never get a None for a class being compiled.
+            classes = _compiling.__dict__.setdefault("classes", set())
+            if cls in classes:
+                return None
+            classes.add(cls)
+            try:
+                with contextlib.suppress(TypeError):
+                    handler = compile_serializer(cls)
+            finally:
+                classes.discard(cls)
+    _handlers_cache[cls] = handler
+    return handler
+
+
+def _get_fields(cls: type) -> tuple[list[tuple[str, Any]], str, str]:
+    # The fields of a model class as (name, annotation), and the templates (to
+    #  format with the name) of the Python expressions that read a field value and
+    #  the extra items (as `**mapping`) of an instance `obj`.
+    if dataclasses.is_dataclass(cls):
+        try:
+            annotations = get_type_hints(cls)
+        except Exception:
+            # Fi. a forward reference that cannot be resolved.
+            annotations = dict()
+        fields = [(f.name, annotations.get(f.name)) for f in dataclasses.fields(cls)]
+        return fields, "obj.{}", ""
+    model_fields = getattr(cls, "model_fields", None)
+    if isinstance(model_fields, dict) and hasattr(cls, "model_dump"):
+        # A pydantic (v2) model: the same fields of model_dump() (with no field or
+        #  model serializers, see compile_serializer()).
+        fields = [
+            (name, info.annotation)
+            for name, info in model_fields.items()
+            if not info.exclude
+        ]
+        fields += [(name, None) for name in getattr(cls, "model_computed_fields", ())]
+        extra = ""
+        if getattr(cls, "model_config", {}).get("extra") == "allow":
+            extra = "**(obj.__pydantic_extra__ or {})"
+        return fields, "obj.{}", extra
+    field_names = getattr(getattr(cls, "_meta", None), "sorted_field_names", None)
+    if isinstance(field_names, list) and hasattr(cls, "select"):
+        # A peewee model: the values are read from the raw data, like in
+        #  playhouse.shortcuts.model_to_dict(recurse=False), so that a foreign key
+        #  is its id (and not a query to get the related model).
+        return [(name, None) for name in field_names], "obj.__data__.get({!r})", ""
+    raise TypeError(f"Cannot compile a serializer for {cls}")
+
+
+def _has_pydantic_serializers(cls: type) -> bool:
+    decorators = getattr(cls, "__pydantic_decorators__", None)
+    return bool(
+        getattr(decorators, "field_serializers", None)
+        or getattr(decorators, "model_serializers", None)
+    )
+
+
+def _model_dump_json_mode(obj: Any) -> dict:
+    return obj.model_dump(mode="json")
+
+
+def compile_serializer(cls: type) -> Callable[[Any], dict]:
+    """
+    Compile a fn that converts the instances of a model class (a dataclass, a
+     pydantic model or a peewee model) to a dict, for CustomJsonEncoder and
+     to_json_string().
+    The fields are read once from the class, and the fn is generated with a plain
+     dict literal of the fields, so encoding many instances skips the introspection
+     (of dataclasses.asdict(), model_dump(), ...) for each one. Nested models are
+     encoded by their own serializers. Fields annotated with a type that has a
+     handler (datetime, UUID, ...) are converted right away (if the value is really
+     of that type).
+
+    Model classes get a compiled serializer automatically (cached per class), unless
+     they have a `to_dict()` method, which takes precedence. Use this fn to register
+     the compiled serializer anyway:
+        json_utils.register_type_handler(MyModel, json_utils.compile_serializer(MyModel))
+
+    Pydantic models with `@field_serializer` or `@model_serializer` are not compiled:
+     the fn is just `model_dump(mode="json")`.
 
-def to_json_string(data: Any, sort_keys=False, **kwargs) -> str:
+    Args:
+        cls: a dataclass, a pydantic (v2) model class or a peewee model class.
+
+    Returns: a fn that takes an instance and returns a dict.
+    """
+    if _has_pydantic_serializers(cls):
+        return _model_dump_json_mode
+    fields, value_template, extra = _get_fields(cls)
+    namespace = dict()
+    items = []
+    for i, (name, annotation) in enumerate(fields):
+        value = value_template.format(name)
+        handler = None
+        if isinstance(annotation, type) and annotation not in _JSON_TYPES:
+            handler = _get_handler(annotation)
+        if handler is not None:
+            namespace[f"handler_{i}"] = handler
+            namespace[f"type_{i}"] = annotation
+            value = (
+                f"handler_{i}(value) if (value := {value}).__class__ is type_{i}"
+                " else value"
+            )
+        items.append(f"{name!r}: {value}")
+    if extra:
+        items.append(extra)
+    source = f"def serialize(obj):\n    return {{{', '.join(items)}}}\n"
+    exec(
+        compile(source, f"<json_utils serializer for {cls.__qualname__}>", "exec"),
+        namespace,
+    )
+    return namespace["serialize"]
+
+
+@lru_cache(maxsize=64)
+def _get_encoder(sort_keys: bool, kwargs: tuple) -> "CustomJsonEncoder":
+    # Encoders are immutable and re-entrant, so 1 encoder per set of options can be
+    #  reused instead of creating one on each call (like json.dumps(cls=...) does).
+    return CustomJsonEncoder(sort_keys=sort_keys, **dict(kwargs))
+
+
+def _get_custom_encoder(sort_keys: bool, kwargs: dict) -> "CustomJsonEncoder":
+    try:
+        return _get_encoder(sort_keys, tuple(sorted(kwargs.items())))
+    except TypeError:
+        # Unhashable kwargs, like `separators` as a list.
+        return CustomJsonEncoder(sort_keys=sort_keys, **kwargs)
+
+
+# The kwargs that orjson can reproduce exactly.
+_ORJSON_COMPATIBLE_KWARGS = {"separators", "ensure_ascii", "indent"}
+
+# A float that orjson writes differently from json is < 1e-4 (orjson writes 0.00001
+#  while json writes 1e-05, and 1.5e-7 while json writes 1.5e-07) or, before
+#  orjson 3.9, in exponent notation (orjson writes 1e16 while json writes 1e+16).
+# The output is checked with substring searches (as fast as orjson itself), and
+#  only the exponents found are checked to be in a number (and not fi. in a word
+#  or in the hex digits of a UUID); a match in a string is just a (rare) useless
+#  fallback to json.
+_ORJSON_SIGNED_EXPONENT = _orjson is not None and _orjson.dumps(1e16) == b"1e+16"
+_FLOAT_EXPONENT_MARKER = b"e-" if _ORJSON_SIGNED_EXPONENT else b"e"
+_FLOAT_EXPONENT_REGEX = re.compile(
+    rb"e-\d" if _ORJSON_SIGNED_EXPONENT else rb"e[-+]?\d"
+)
+
+
+def _has_float_mismatch(result: bytes) -> bool:
+    if b"0.0000" in result:
+        return True
+    if _FLOAT_EXPONENT_MARKER not in result:
+        return False
+    for match in _FLOAT_EXPONENT_REGEX.finditer(result):
+        # The mantissa: digits (and a dot, and a sign) before the `e`, at the start
+        #  or after a `:`, `,`, `[` or a whitespace.
+        start = match.start()
+        head = result[max(0, start - 32) : start]
+        rest = head.rstrip(b"0123456789.")
+        if len(rest) == len(head):
+            continue
+        rest = rest.removesuffix(b"-")
+        if not rest or rest[-1:] in b":,[ \n":
+            return True
+    return False
+
+
+# The types that orjson serializes natively (so their handlers would be bypassed),
+#  and their built-in handler (the same output of orjson).
+_ORJSON_NATIVE_TYPES = {UUID: str, Enum: None}
+
+
+def _has_orjson_native_handlers() -> bool:
+    # True if a handler was registered for a type that orjson serializes natively.
+    for cls, handler in _TYPE_HANDLERS.items():
+        for native_cls, builtin_handler in _ORJSON_NATIVE_TYPES.items():
+            if issubclass(cls, native_cls) and handler is not builtin_handler:
+                return True
+    return False
+
+
+# The types that orjson and json serialize in the same way.
+_ORJSON_SAME_TYPES = {str, int, bool, type(None)}
+
+
+def _has_orjson_mismatch(data: Any, check_floats: bool = True) -> bool:
+    # True if the data has a value that orjson serializes while json does not: a
+    #  plain Enum member (orjson writes its value; json sends it to the handlers, so
+    #  it raises TypeError), or differently: NaN and Infinity (orjson writes null,
+    #  json NaN and Infinity).
+    # Note: orjson cannot be told to send enums to `default`, so the data is walked.
+    stack = [data]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        obj = pop()
+        cls = obj.__class__
+        if cls in _ORJSON_SAME_TYPES:
+            continue
+        if cls is dict:
+            extend(obj.values())
+        elif cls is list or cls is tuple:
+            extend(obj)
+        elif cls is float:
+            if check_floats and not math.isfinite(obj):
+                return True
+        elif isinstance(obj, Enum):
+            if not isinstance(obj, (str, int, float)):
+                return True
+        elif isinstance(obj, dict):
+            # Fi. an OrderedDict.
+            extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            extend(obj)
+    return False
+
+
+def _orjson_default(obj: Any) -> Any:
+    handler = _get_handler(obj.__class__)
+    if handler is not None:
+        result = handler(obj)
+    elif callable(getattr(obj, "to_dict", None)):
+        result = obj.to_dict()
+    else:
+        raise TypeError
+    # Fi. a dataclass with an Enum field.
+    if _has_orjson_mismatch(result):
+        raise TypeError
+    return result
+
+
+def _to_json_string_with_orjson(data: Any, sort_keys: bool, kwargs: dict) -> str | None:
+    # The same JSON string of json.dumps(), but with orjson; or None when the args
+    #  or the data are not supported by orjson.
+    if not kwargs.keys() <= _ORJSON_COMPATIBLE_KWARGS:
+        return None
+    if _has_orjson_native_handlers():
+        return None
+    if kwargs.get("ensure_ascii", True):
+        return None
+    indent = kwargs.get("indent")
+    if indent is None:
+        if tuple(kwargs.get("separators", ())) != (",", ":"):
+            return None
+        option = 0
+    elif indent == 2 and tuple(kwargs.get("separators", (",", ": "))) == (",", ": "):
+        option = _orjson.OPT_INDENT_2
+    else:
+        return None
+    # Datetimes and dataclasses are sent to the handlers, like with json.
+    option |= _orjson.OPT_PASSTHROUGH_DATETIME | _orjson.OPT_PASSTHROUGH_DATACLASS
+    if sort_keys:
+        option |= _orjson.OPT_SORT_KEYS
+    try:
+        result = _orjson.dumps(data, default=_orjson_default, option=option)
+    except TypeError:
+        # Fi. non-str dict keys, ints > 64 bits or an unsupported type.
+        return None
+    if _has_float_mismatch(result):
+        return None
+    # Note: NaN and Infinity can only be in the data if there is a null.
+    if _has_orjson_mismatch(data, check_floats=b"null" in result):
+        return None
+    return result.decode()
+
+
+def to_json_string(data: Any, sort_keys=False, backend: str = "json", **kwargs) -> str:
     """
     Convert a Python object to a JSON string.
     The advantage, compared to a plain json.dumps(), is that it can handle types like
      datetime, bytes, UUID, that would raise a TypeError with a plain json.dumps().
+     More types can be added with register_type_handler().
 
     Args:
         data: any Python object.
         sort_keys: True to sort keys in the JSON string (if the JSON is a map or list).
+        backend: "json" (the std lib) or "auto" to use orjson (a C-accelerated lib,
+         optional extra: pip install "json-utils[orjson]") when it produces the
+         same string. It does only with `separators=(",", ":"), ensure_ascii=False`
+         (compact JSON) or `indent=2, ensure_ascii=False`, otherwise (or if orjson
+         fails or is not installed, or the output has floats formatted differently,
+         or the data has NaN, Infinity or plain enums, or a handler is registered
+         for UUID or Enum) it falls back to the std lib transparently, so the
+         output is always the same of the std lib.
         **kwargs: passed down to json.dumps(...), eg. `indent=4`.
 
     Usage:
         data = {"date": datetime(2025, 1, 1)}
         json_utils.to_json(data, indent=4)
     """
-    return json.dumps(data, cls=CustomJsonEncoder, sort_keys=sort_keys, **kwargs)
+    if backend not in ("json", "auto"):
+        raise ValueError(f'backend must be "json" or "auto", not {backend}')
+    if backend == "auto" and _orjson is not None:
+        result = _to_json_string_with_orjson(data, sort_keys, kwargs)
+        if result is not None:
+            return result
+
+    return _get_custom_encoder(sort_keys, kwargs).encode(data)
 
 
 def to_json(*args, **kwargs) -> str:
@@ -67,7 +433,8 @@ def to_json(*args, **kwargs) -> str:
 class CustomJsonEncoder(json.JSONEncoder):
     """
     A custom JSON encoder that can handle types like datetime, bytes, UUID, etc,
-     unlike the std lib default encoder.
+     unlike the std lib default encoder. More types can be added with
+     register_type_handler().
 
     Usage:
         import json
@@ -76,27 +443,29 @@ class CustomJsonEncoder(json.JSONEncoder):
     """
 
     def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        elif isinstance(obj, bytes):
-            return obj.decode()
-        elif obj.__class__.__name__ == "Decimal":
-            # It's the Decimal class coming from DynamoDB and
-            #  we don't want to import its lib, so we check for the
-            #  class name.
-            return float(obj)
-        elif obj.__class__.__name__ == "Url":
-            # It's the pydantic.HttpUrl class coming from pydantic and
-            #  we don't want to import its lib, so we check for the
-            #  class name.
-            return str(obj)
-        elif hasattr(obj, "to_dict") and callable(obj.to_dict):
+        # The handler is looked up by class in a dict (see register_type_handler()),
+        #  instead of a chain of isinstance() for every object.
+        handler = _get_handler(obj.__class__)
+        if handler is not None:
+            return handler(obj)
+        if callable(getattr(obj, "to_dict", None)):
+            # A `to_dict` set on the instance (and not on the class).
             return obj.to_dict()
-        elif isinstance(obj, UUID):
-            return str(obj)
         return json.JSONEncoder.default(self, obj)
 
 
+# The replacements of prettify_to_non_json_string() and prettify_file().
+# Note: they all start with a backslash and contain no other backslash (and the
+#  new values contain none), so applying them one after the other is the same as a
+#  single pass, and a text can be split at any char but the last 5 before a
+#  backslash.
+_PRETTIFY_REPLACEMENTS = (
+    ("\\n", "\n"),  # \n -> new line.
+    ("\\u00a0", " "),  # \\u00a0 -> space.
+    ('\\"', '"'),  # \\" -> ".
+)
+
+
 def prettify_to_non_json_string(text: str):
     """
     Take a string (likely a JSON string) and performs char replacements
@@ -131,9 +500,6 @@ def prettify_to_non_json_string(text: str):
         }
         \"""
     """
-    text = (
-        text.replace("\\n", "\n")  # \n -> new line.
-        .replace("\\u00a0", " ")  # \\u00a0 -> space.
-        .replace('\\"', '"')  # \\" -> ".
-    )
+    for old, new in _PRETTIFY_REPLACEMENTS:
+        text = text.replace(old, new)
     return text
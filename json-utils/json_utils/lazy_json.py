@@ -0,0 +1,232 @@
+"""
+** JSON UTILS: LAZY JSON **
+===========================
+A read-only view on a JSON document that decodes only what is accessed: useful
+ when only a few fields of a big JSON body are needed.
+
+```py
+import json_utils
+
+doc = json_utils.LazyJson(request_body)
+# Only the path to "athlete" and its "id" are decoded: "streams" (a huge value)
+#  is skipped without decoding it.
+athlete_id = doc["athlete"]["id"]
+streams = doc["streams"].to_python()  # Decode a whole sub-tree.
+```
+"""
+
+import json
+import re
+from json.decoder import scanstring
+from typing import Any, Iterator
+
+from .json_utils import register_type_handler
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "LazyJson",
+]
+
+_MISSING = object()
+
+_WHITESPACE_REGEX = re.compile(r"[ \t\n\r]*")
+# Skipping a nested value (without decoding it) is the hot path, so it is done in
+#  C as much as possible, by regex: _NEXT_BRACKET_REGEX matches anything up to the
+#  next bracket (the group 1) that does not close a nested value, skipping whole
+#  strings (so brackets in strings are ignored) and whole nested values up to
+#  _MAX_REGEX_DEPTH levels; only deeper values take more than 1 match.
+# Note: the patterns are "unrolled loops" (no `+` inside a `*`, and alternatives
+#  that start with different chars), so there is no catastrophic backtracking.
+_MAX_REGEX_DEPTH = 4
+_NOT_SPECIAL = r'[^"\[\]{}]*'
+_STRING = r'"(?:[^"\\]|\\.)*"'
+
+
+def _make_nested_value_pattern(depth: int) -> str:
+    items = _STRING
+    if depth > 1:
+        items += "|" + _make_nested_value_pattern(depth - 1)
+    return rf"[\[{{]{_NOT_SPECIAL}(?:(?:{items}){_NOT_SPECIAL})*[\]}}]"
+
+
+_NEXT_BRACKET_REGEX = re.compile(
+    rf"{_NOT_SPECIAL}(?:(?:{_STRING}|{_make_nested_value_pattern(_MAX_REGEX_DEPTH)})"
+    rf"{_NOT_SPECIAL})*([\[\]{{}}])",
+    re.S,
+)
+
+
+class LazyJson:
+    """
+    A lazy JSON object or array, with a read-only dict-like (or list-like) API.
+
+    The members of the object (or the items of the array) are indexed in a single
+     pass, on access and only as far as needed: fi. doc["id"] stops at the member
+     "id", so the members after it are not even scanned (until needed). Scalars
+     (strings, numbers, ...) are decoded, while nested objects and arrays are
+     skipped (just matching their brackets) and become LazyJson themselves, decoded
+     only when accessed.
+    The document is not validated upfront: an invalid part raises JSONDecodeError
+     only when accessed (or never). With duplicated keys, the first one may be
+     returned (instead of the last one, like json.loads()).
+
+    Args:
+        data: a JSON document (str or UTF-8 bytes) that is an object or an array.
+        **kwargs: passed down to json.JSONDecoder(...), eg. `parse_float=Decimal`.
+
+    Example:
+        doc = json_utils.LazyJson('{"athlete": {"id": 123}, "streams": [...]}')
+        assert doc["athlete"]["id"] == 123
+    """
+
+    def __init__(self, data: str | bytes, **kwargs):
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode("utf-8-sig")
+        start = _WHITESPACE_REGEX.match(data).end()
+        if data[start : start + 1] not in ("{", "["):
+            raise json.JSONDecodeError("Expecting object or array", data, start)
+        self._init(data, start, json.JSONDecoder(**kwargs))
+
+    def _init(self, text: str, start: int, decoder: json.JSONDecoder) -> None:
+        self._text = text
+        self._start = start
+        self._decoder = decoder
+        self.is_object = text[start] == "{"
+        # Key -> value for an object, list of values for an array: filled as the
+        #  scan goes on, up to `_scan_pos` (None when the scan is complete).
+        self._index = dict() if self.is_object else []
+        self._scan_pos = start + 1
+
+    @classmethod
+    def _from_offset(
+        cls, text: str, start: int, decoder: json.JSONDecoder
+    ) -> "LazyJson":
+        doc = object.__new__(cls)
+        doc._init(text, start, decoder)
+        return doc
+
+    def _skip_ws(self, pos: int) -> int:
+        return _WHITESPACE_REGEX.match(self._text, pos).end()
+
+    def _expect(self, pos: int, chars: str) -> str:
+        char = self._text[pos : pos + 1]
+        if not char or char not in chars:
+            expected = " or ".join(repr(x) for x in chars)
+            raise json.JSONDecodeError(f"Expecting {expected}", self._text, pos)
+        return char
+
+    def _skip_container(self, pos: int) -> int:
+        # The end of the object or array that starts at `pos`.
+        depth = 1
+        pos += 1
+        while True:
+            match = _NEXT_BRACKET_REGEX.match(self._text, pos)
+            if match is None:
+                raise json.JSONDecodeError("Unterminated value", self._text, pos)
+            pos = match.end()
+            if match.group(1) in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return pos
+
+    def _read_value(self, pos: int) -> tuple[Any, int]:
+        # The value at `pos` (a LazyJson for objects and arrays) and its end.
+        if self._text[pos : pos + 1] in ("{", "["):
+            value = self._from_offset(self._text, pos, self._decoder)
+            return value, self._skip_container(pos)
+        return self._decoder.raw_decode(self._text, pos)
+
+    def _scan(self, key: str | int | None = None) -> None:
+        # Index the next members (or items) until `key` is indexed (or the end).
+        text = self._text
+        index = self._index
+        closing = "}" if self.is_object else "]"
+        pos = self._skip_ws(self._scan_pos)
+        if not index and text[pos : pos + 1] == closing:
+            self._scan_pos = None
+            return
+        while True:
+            if self.is_object:
+                self._expect(pos, '"')
+                current_key, pos = scanstring(text, pos + 1)
+                pos = self._skip_ws(pos)
+                self._expect(pos, ":")
+                value, pos = self._read_value(self._skip_ws(pos + 1))
+                index[current_key] = value
+                is_found = current_key == key
+            else:
+                value, pos = self._read_value(pos)
+                index.append(value)
+                is_found = len(index) - 1 == key
+            pos = self._skip_ws(pos)
+            if self._expect(pos, "," + closing) == closing:
+                self._scan_pos = None
+                return
+            pos = self._skip_ws(pos + 1)
+            if is_found:
+                self._scan_pos = pos
+                return
+
+    @property
+    def index(self) -> dict | list:
+        # All the members (or items), with nested objects and arrays as LazyJson.
+        if self._scan_pos is not None:
+            self._scan()
+        return self._index
+
+    def __getitem__(self, key: str | int | slice) -> Any:
+        if self._scan_pos is not None:
+            if isinstance(key, int) and key >= 0 and not self.is_object:
+                if key >= len(self._index):
+                    self._scan(key)
+            elif not isinstance(key, str) or key not in self._index:
+                self._scan(key if isinstance(key, str) else None)
+        return self._index[key]
+
+    def get(self, key: str | int, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except (KeyError, IndexError, TypeError):
+            return default
+
+    def __contains__(self, item: Any) -> bool:
+        if self.is_object:
+            return self.get(item, _MISSING) is not _MISSING
+        return item in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self) -> Iterator:
+        # The keys (for an object) or the items (for an array), like dict and list.
+        return iter(self.index)
+
+    def keys(self):
+        return self.index.keys()
+
+    def values(self):
+        return self.index.values()
+
+    def items(self):
+        return self.index.items()
+
+    def to_python(self) -> dict | list:
+        """
+        Decode the whole object (or array) to Python objects, like json.loads().
+        """
+        return self._decoder.raw_decode(self._text, self._start)[0]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, LazyJson):
+            other = other.to_python()
+        return self.to_python() == other
+
+    def __repr__(self) -> str:
+        kind = "object" if self.is_object else "array"
+        return f"<LazyJson {kind} at offset {self._start}>"
+
+
+# So LazyJson can be encoded by CustomJsonEncoder and to_json_string().
+register_type_handler(LazyJson, LazyJson.to_python)
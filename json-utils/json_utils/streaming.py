@@ -0,0 +1,525 @@
+"""
+** JSON UTILS: STREAMING **
+===========================
+Write (and read) large JSON data in chunks, so that the whole JSON string is never
+ in memory (unlike to_json_string()). The types are handled like in
+ to_json_string() (datetime, bytes, UUID, ...).
+
+```py
+import json_utils
+
+with open("export.json", "w") as fp:
+    # Any JSON-serializable object, or an iterator (fi. a generator) that is
+    #  written as a JSON array, one item at a time.
+    json_utils.dump_stream((row.to_dict() for row in query), fp)
+
+# NDJSON (JSON Lines): 1 JSON object per line.
+with open("export.ndjson", "w") as fp:
+    json_utils.dump_ndjson((row.to_dict() for row in query), fp)
+with open("export.ndjson") as fp:
+    for record in json_utils.iter_ndjson(fp):
+        ...
+
+# The items of a huge JSON array, one at a time (fi. {"data": {"items": [...]}}).
+with open("export.json", "rb") as fp:
+    for item in json_utils.iter_json_array(fp, path="data.items", parse_datetimes=True):
+        ...
+
+# prettify_to_non_json_string() on a huge file (fi. a CloudWatch logs export).
+json_utils.prettify_file("logs.json", "logs.txt", workers=4)
+```
+"""
+
+import codecs
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from typing import IO, Any, Iterable, Iterator
+
+from .json_utils import _PRETTIFY_REPLACEMENTS, _get_custom_encoder
+
+# Objects exported to the `import *` in `__init__.py`.
+__all__ = [
+    "dump_stream",
+    "dump_ndjson",
+    "iter_ndjson",
+    "iter_json_array",
+    "prettify_stream",
+    "prettify_file",
+]
+
+# The default size (in chars) of the buffer flushed to the file at once.
+_BUFFER_SIZE = 64 * 1024
+
+
+class _BufferedWriter:
+    # Join small chunks (like the ones of JSONEncoder.iterencode()) and write them
+    #  in bigger blocks: a write() per chunk is slow, a single write() is the whole
+    #  string in memory.
+    def __init__(self, fp: IO[str], buffer_size: int):
+        self.fp = fp
+        self.buffer_size = buffer_size
+        self._chunks = []
+        self._size = 0
+
+    def write(self, chunk: str) -> None:
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._chunks:
+            self.fp.write("".join(self._chunks))
+            self._chunks = []
+            self._size = 0
+
+
+def _iterencode_items(items: Iterator[Any], encoder: json.JSONEncoder):
+    # Encode an iterator as a JSON array, one item at a time: the same string as
+    #  encoding a list with all the items.
+    if encoder.indent is None:
+        newline = None
+        item_separator = encoder.item_separator
+        opening, closing = "[", "]"
+    else:
+        indent = encoder.indent
+        if not isinstance(indent, str):
+            indent = " " * indent
+        # Note: JSON strings cannot contain new lines (they are escaped), so every
+        #  new line in an encoded item is an indentation to increase.
+        newline = "\n" + indent
+        item_separator = encoder.item_separator + newline
+        opening, closing = "[" + newline, "\n]"
+
+    is_first = True
+    for item in items:
+        if is_first:
+            yield opening
+            is_first = False
+        else:
+            yield item_separator
+        for chunk in encoder.iterencode(item):
+            yield chunk if newline is None else chunk.replace("\n", newline)
+    yield "[]" if is_first else closing
+
+
+def dump_stream(
+    data: Any,
+    fp: IO[str],
+    sort_keys=False,
+    buffer_size: int = _BUFFER_SIZE,
+    **kwargs,
+) -> None:
+    """
+    Write a Python object as a JSON string to a (text) file, in chunks: the same
+     string of to_json_string(), but never all in memory.
+
+    Args:
+        data: any Python object; an iterator (fi. a generator) is written as a JSON
+         array, consuming one item at a time (so the items never are all in memory).
+        fp: a file opened in text mode (or any object with a `write(str)` method).
+        sort_keys: True to sort keys in the JSON string (if the JSON is a map or list).
+        buffer_size: the chunks are joined and written in blocks of about this size
+         (in chars).
+        **kwargs: passed down to json.dumps(...), eg. `indent=4`.
+
+    Example:
+        with open("export.json", "w") as fp:
+            json_utils.dump_stream((row.to_dict() for row in query), fp, indent=2)
+    """
+    encoder = _get_custom_encoder(sort_keys, kwargs)
+    if isinstance(data, Iterator):
+        chunks = _iterencode_items(data, encoder)
+    else:
+        chunks = encoder.iterencode(data)
+
+    writer = _BufferedWriter(fp, buffer_size)
+    for chunk in chunks:
+        writer.write(chunk)
+    writer.flush()
+
+
+def dump_ndjson(
+    records: Iterable[Any],
+    fp: IO[str],
+    sort_keys=False,
+    buffer_size: int = _BUFFER_SIZE,
+    **kwargs,
+) -> int:
+    """
+    Write records to a (text) file as NDJSON (aka JSON Lines): 1 JSON string per
+     line. Records are consumed one at a time, so `records` can be a generator.
+
+    Args:
+        records: an iterable of Python objects (usually dicts).
+        fp: a file opened in text mode (or any object with a `write(str)` method).
+        sort_keys: True to sort keys in the JSON strings.
+        buffer_size: the lines are joined and written in blocks of about this size
+         (in chars).
+        **kwargs: passed down to json.dumps(...), eg. `ensure_ascii=False`; but not
+         `indent` as a record must be on a single line.
+
+    Returns: the number of records written.
+
+    Example:
+        with open("export.ndjson", "w") as fp:
+            json_utils.dump_ndjson((row.to_dict() for row in query), fp)
+    """
+    if kwargs.get("indent") is not None:
+        raise ValueError("indent is not supported in NDJSON")
+    encoder = _get_custom_encoder(sort_keys, kwargs)
+    writer = _BufferedWriter(fp, buffer_size)
+    n_records = 0
+    for record in records:
+        writer.write(encoder.encode(record))
+        writer.write("\n")
+        n_records += 1
+    writer.flush()
+    return n_records
+
+
+def iter_ndjson(fp: IO, **kwargs) -> Iterator[Any]:
+    """
+    Read a NDJSON (aka JSON Lines) file one line at a time: the memory is bounded by
+     the longest line. Blank lines are skipped.
+
+    Args:
+        fp: a file opened in text or binary (UTF-8) mode (or any iterable of lines).
+        **kwargs: passed down to json.loads(...), eg. `parse_float=Decimal` or
+         `cls=CompactDecoder`; a single decoder is used for all the lines.
+
+    Yields: the records, as Python objects.
+
+    Example:
+        with open("export.ndjson") as fp:
+            for record in json_utils.iter_ndjson(fp):
+                ...
+    """
+    decoder = kwargs.pop("cls", json.JSONDecoder)(**kwargs)
+    for line_number, line in enumerate(fp, start=1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8-sig" if line_number == 1 else "utf-8")
+        if not line.strip():
+            continue
+        try:
+            yield decoder.decode(line)
+        except json.JSONDecodeError as exc:
+            raise json.JSONDecodeError(
+                f"{exc.msg} (at NDJSON line {line_number})", exc.doc, exc.pos
+            ) from exc
+
+
+# The datetimes written by to_json_string() (with isoformat()), plus a "Z" suffix.
+_DATETIME_REGEX = re.compile(
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?(Z|[+-]\d{2}:\d{2})?"
+)
+_WHITESPACE_REGEX = re.compile(r"[ \t\n\r]*")
+# A JSON string, or the chars that open and close objects and arrays; a lone quote
+#  is a string truncated at the end of the buffer.
+_STRUCTURE_REGEX = re.compile(r'"(?:[^"\\]|\\.)*"|["\[\]{}]')
+
+
+def _parse_datetimes(obj: Any) -> Any:
+    # Replace (recursively) the strings that are ISO 8601 datetimes with datetimes.
+    if isinstance(obj, str):
+        match = _DATETIME_REGEX.fullmatch(obj)
+        if match:
+            text = obj
+            if text.endswith("Z"):
+                # Python < 3.11 does not support "Z" in fromisoformat().
+                text = text[:-1] + "+00:00"
+            if match.group(2):
+                # Python < 3.11 supports only fractions of 3 or 6 digits.
+                start, end = match.span(2)
+                text = text[:start] + match.group(2).ljust(7, "0") + text[end:]
+            try:
+                return datetime.fromisoformat(text)
+            except ValueError:
+                # Fi. "2025-02-30T10:00:00": not a datetime, just a string.
+                return obj
+        return obj
+    if isinstance(obj, dict):
+        return {key: _parse_datetimes(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_parse_datetimes(x) for x in obj]
+    return obj
+
+
+class _IncrementalReader:
+    # A buffer over a (text or binary) file, read in chunks as the parsing goes on:
+    #  only the text not parsed yet is kept.
+    def __init__(self, fp: IO, chunk_size: int, decoder: json.JSONDecoder):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = decoder
+        self.buffer = ""
+        self.pos = 0
+        self.is_eof = False
+        self._bytes_decoder = None
+
+    def fill(self, size: int | None = None) -> None:
+        # Drop the parsed text and read (at least) a chunk more.
+        data = self.fp.read(max(size or 0, self.chunk_size))
+        if not data:
+            self.is_eof = True
+        if isinstance(data, bytes):
+            if self._bytes_decoder is None:
+                self._bytes_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+            # Note: a multi-byte char split between 2 chunks is kept by the decoder.
+            data = self._bytes_decoder.decode(data, final=self.is_eof)
+        self.buffer = self.buffer[self.pos :] + data
+        self.pos = 0
+
+    def peek(self) -> str:
+        # The next non-whitespace char ("" at the end of the file).
+        while True:
+            self.pos = _WHITESPACE_REGEX.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or self.is_eof:
+                return self.buffer[self.pos : self.pos + 1]
+            self.fill()
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            expected = " or ".join(repr(x) for x in chars)
+            raise json.JSONDecodeError(f"Expecting {expected}", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def decode_value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.is_eof:
+                    raise
+            else:
+                if self.is_eof or not self._is_number_truncated(end):
+                    self.pos = end
+                    return value
+            # The value is truncated: read more (doubling the buffer, so that a big
+            #  value is parsed a few times, not once per chunk).
+            self.fill(len(self.buffer) - self.pos)
+
+    def _is_number_truncated(self, end: int) -> bool:
+        # A number cut by the end of the buffer is decoded as its valid prefix (fi.
+        #  "1." as 1, "1e" as 1, "-1.5e+" as -1.5): it might continue in the next
+        #  chunk when it reaches the end of the buffer or it is followed by a char
+        #  that can continue a number.
+        # Note: any other value that decodes is complete.
+        if self.buffer[self.pos] not in "-0123456789":
+            return False
+        return end >= len(self.buffer) or self.buffer[end] in ".eE+-"
+
+    def skip_value(self) -> None:
+        # Skip a value without decoding it (so a big object costs no memory).
+        if self.peek() not in "[{":
+            self.decode_value()
+            return
+        depth = 0
+        while True:
+            for match in _STRUCTURE_REGEX.finditer(self.buffer, self.pos):
+                token = match.group()
+                if token == '"':
+                    # A truncated string: read more and scan it again.
+                    self.pos = match.start()
+                    break
+                if token in "[{":
+                    depth += 1
+                elif token in "]}":
+                    depth -= 1
+                    if depth == 0:
+                        self.pos = match.end()
+                        return
+            else:
+                self.pos = len(self.buffer)
+            if self.is_eof:
+                raise json.JSONDecodeError("Unterminated value", self.buffer, self.pos)
+            self.fill()
+
+
+def iter_json_array(
+    fp: IO,
+    path: str | None = None,
+    parse_datetimes=False,
+    parse_decimals=False,
+    chunk_size: int = _BUFFER_SIZE,
+    **kwargs,
+) -> Iterator[Any]:
+    """
+    Parse a JSON array incrementally, yielding its items one at a time: unlike
+     json.load(), the memory is bounded by the biggest item (not by the whole
+     array). Useful for huge files like exports and dumps.
+    The file is read in chunks, and only until the end of the array.
+
+    Args:
+        fp: a file opened in text or binary (UTF-8) mode.
+        path: None if the array is the top-level value; otherwise the dotted path of
+         the array in nested objects, fi. "data.items" for {"data": {"items": [...]}}.
+         The values of the other keys are skipped without being decoded.
+        parse_datetimes: True to convert the strings that are ISO 8601 datetimes
+         (like the ones written by to_json_string()) to datetimes.
+        parse_decimals: True to decode floats as Decimal (instead of float).
+        chunk_size: the size of the chunks read from the file.
+        **kwargs: passed down to json.JSONDecoder(...), eg. `object_hook=...`; or
+         `cls` to use another decoder class, like in json.loads(...).
+
+    Yields: the items of the array, as Python objects.
+
+    Example:
+        with open("activities.json", "rb") as fp:
+            for activity in json_utils.iter_json_array(fp, parse_datetimes=True):
+                ...
+    """
+    if parse_decimals:
+        kwargs["parse_float"] = Decimal
+    decoder = kwargs.pop("cls", json.JSONDecoder)(**kwargs)
+    reader = _IncrementalReader(fp, chunk_size, decoder)
+
+    for key in path.split(".") if path else ():
+        reader.expect("{")
+        if reader.peek() == "}":
+            raise KeyError(path)
+        while True:
+            if reader.peek() != '"':
+                reader.expect('"')
+            current_key = reader.decode_value()
+            reader.expect(":")
+            if current_key == key:
+                break
+            reader.skip_value()
+            if reader.expect(",}") == "}":
+                raise KeyError(path)
+
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    while True:
+        item = reader.decode_value()
+        yield _parse_datetimes(item) if parse_datetimes else item
+        if reader.expect(",]") == "]":
+            return
+
+
+_PRETTIFY_BYTES_REPLACEMENTS = tuple(
+    (old.encode(), new.encode()) for old, new in _PRETTIFY_REPLACEMENTS
+)
+# The max number of chars of an escape after its backslash.
+_MAX_ESCAPE_TAIL = max(len(old) for old, _ in _PRETTIFY_REPLACEMENTS) - 1
+# The size of the chunks of prettify_stream() and prettify_file(): it fits in the
+#  CPU cache, so the replacements (each a fast pass in C) work in the cache.
+_PRETTIFY_CHUNK_SIZE = 1024 * 1024
+
+
+def _prettify_chunk(chunk: str | bytes) -> str | bytes:
+    if isinstance(chunk, str):
+        replacements = _PRETTIFY_REPLACEMENTS
+    else:
+        replacements = _PRETTIFY_BYTES_REPLACEMENTS
+    for old, new in replacements:
+        chunk = chunk.replace(old, new)
+    return chunk
+
+
+def prettify_stream(src: IO, dst: IO, chunk_size: int = _PRETTIFY_CHUNK_SIZE) -> None:
+    """
+    Streaming prettify_to_non_json_string(): read a file in chunks and write the
+     prettified text to another file, with the same result but never all in memory.
+    An escape split between 2 chunks (fi. "\\u00" and "a0") is carried over to the
+     next chunk.
+
+    Args:
+        src: the input file, opened in binary (UTF-8) or text mode.
+        dst: the output file, opened in the same mode of `src`.
+        chunk_size: the size of the chunks read from `src`.
+
+    Example:
+        with open("logs.json", "rb") as src, open("logs.txt", "wb") as dst:
+            json_utils.prettify_stream(src, dst)
+    """
+    tail = None
+    while chunk := src.read(chunk_size):
+        data = chunk if tail is None else tail + chunk
+        backslash = "\\" if isinstance(data, str) else b"\\"
+        # The 1st backslash in the last chars might start an escape that continues
+        #  in the next chunk.
+        cut = data.find(backslash, max(0, len(data) - _MAX_ESCAPE_TAIL))
+        if cut == -1:
+            cut = len(data)
+        dst.write(_prettify_chunk(data[:cut]))
+        tail = data[cut:]
+    if tail:
+        dst.write(_prettify_chunk(tail))
+
+
+def _iter_line_ranges(path: str | os.PathLike, size: int):
+    # Split a file in ranges of about `size` bytes, ending at a new line (a record
+    #  boundary in NDJSON and CloudWatch exports, and never inside an escape).
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as fp:
+        start = 0
+        while start < file_size:
+            end = start + size
+            while end < file_size:
+                fp.seek(end)
+                block = fp.read(_PRETTIFY_CHUNK_SIZE)
+                newline = block.find(b"\n")
+                if newline != -1:
+                    end += newline + 1
+                    break
+                end += len(block)
+            end = min(end, file_size)
+            yield start, end
+            start = end
+
+
+def _prettify_range(path: str | os.PathLike, start: int, end: int) -> bytes:
+    # Run in a worker process.
+    with open(path, "rb") as fp:
+        fp.seek(start)
+        return _prettify_chunk(fp.read(end - start))
+
+
+def prettify_file(
+    src_path: str | os.PathLike,
+    dst_path: str | os.PathLike,
+    workers: int | None = 1,
+    chunk_size: int = _PRETTIFY_CHUNK_SIZE,
+) -> None:
+    """
+    Streaming prettify_to_non_json_string() from a file to another file (see
+     prettify_stream()), optionally in parallel across processes.
+
+    Args:
+        src_path: the path of the input file (UTF-8).
+        dst_path: the path of the output file.
+        workers: the number of processes; None for the number of CPUs. With more
+         than 1, the file is split at new lines (record boundaries) in ranges of
+         about 8 chunks, prettified by the workers and written in order; at most 2
+         ranges per worker are in flight, so the memory is bounded.
+        chunk_size: the size of the chunks read from the input file.
+
+    Example:
+        json_utils.prettify_file("logs.json", "logs.txt", workers=4)
+    """
+    workers = workers or os.cpu_count() or 1
+    with open(dst_path, "wb") as dst:
+        if workers == 1:
+            with open(src_path, "rb") as src:
+                prettify_stream(src, dst, chunk_size)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = deque()
+            for start, end in _iter_line_ranges(src_path, chunk_size * 8):
+                futures.append(executor.submit(_prettify_range, src_path, start, end))
+                if len(futures) >= workers * 2:
+                    dst.write(futures.popleft().result())
+            while futures:
+                dst.write(futures.popleft().result())
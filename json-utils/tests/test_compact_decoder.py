@@ -0,0 +1,103 @@
+import io
+import json
+import sys
+
+import pytest
+
+import json_utils
+
+TEXT = json.dumps(
+    [
+        {
+            "id": 1,
+            "name": "Stelvio",
+            "tags": ["a"],
+            "start": {"lat": 46.5, "lon": 10.4},
+        },
+        {"id": 2, "name": "Gavia", "tags": [], "start": {"lat": 46.3, "lon": 10.5}},
+        {"first-name": "x", "_id": 3, "keys": 4},
+    ]
+)
+
+
+class TestCompactDecoder:
+    def test_dicts(self):
+        data = json.loads(TEXT, cls=json_utils.CompactDecoder)
+        assert data == json.loads(TEXT)
+        assert all(type(x) is dict for x in data)
+
+    def test_interned_keys(self):
+        decoder = json_utils.CompactDecoder()
+        data1 = decoder.decode('{"name": 1}')
+        data2 = decoder.decode('{"name": 2}')
+        assert next(iter(data1)) is next(iter(data2))
+
+    def test_slots(self):
+        data = json.loads(TEXT, cls=json_utils.CompactDecoder, records="slots")
+        assert data == json.loads(TEXT)
+        record = data[0]
+        assert isinstance(record, json_utils.Record)
+        assert record.name == record["name"] == "Stelvio"
+        assert record.start.lat == 46.5
+        assert record.get("xxx", 0) == 0
+        assert list(record) == list(record.keys()) == ["id", "name", "tags", "start"]
+        assert type(data[0]) is type(data[1])
+        assert not hasattr(record, "__dict__")
+        with pytest.raises(KeyError):
+            record["xxx"]
+        # Invalid attribute names: a dict.
+        assert type(data[2]) is dict
+
+    def test_slots_to_json(self):
+        data = json.loads(TEXT, cls=json_utils.CompactDecoder, records="slots")
+        assert json_utils.to_json_string(data) == json_utils.to_json_string(
+            json.loads(TEXT)
+        )
+
+    def test_tuple(self):
+        data = json.loads(TEXT, cls=json_utils.CompactDecoder, records="tuple")
+        assert data[0].name == "Stelvio"
+        assert data[0]._asdict()["id"] == 1
+        assert type(data[2]) is dict
+
+    def test_memory(self):
+        text = json.dumps([{"id": i, "lat": 1.5, "lon": 2.5} for i in range(100)])
+        data = json.loads(text)
+        records = json.loads(text, cls=json_utils.CompactDecoder, records="slots")
+        assert sys.getsizeof(records[0]) * 2 < sys.getsizeof(data[0])
+
+    def test_max_shapes(self):
+        text = json.dumps([{"a": 1}, {"b": 1}, {"a": 2}])
+        data = json.loads(
+            text, cls=json_utils.CompactDecoder, records="slots", max_shapes=1
+        )
+        assert [type(x) is dict for x in data] == [False, True, False]
+
+    def test_self_key(self):
+        text = '{"links": {"self": "/a/1", "next": "/a/2"}}'
+        for records in ("slots", "tuple"):
+            data = json.loads(text, cls=json_utils.CompactDecoder, records=records)
+            assert data.links.self == "/a/1"
+
+    def test_invalid_records(self):
+        with pytest.raises(ValueError):
+            json_utils.CompactDecoder(records="xxx")
+
+    def test_hooks_not_supported(self):
+        with pytest.raises(ValueError):
+            json.loads("{}", cls=json_utils.CompactDecoder, object_pairs_hook=dict)
+        with pytest.raises(ValueError):
+            json.loads("{}", cls=json_utils.CompactDecoder, object_hook=dict)
+
+    def test_streaming(self):
+        fp = io.StringIO('{"id": 1}\n{"id": 2}\n')
+        data = list(
+            json_utils.iter_ndjson(fp, cls=json_utils.CompactDecoder, records="slots")
+        )
+        assert [x.id for x in data] == [1, 2]
+        assert type(data[0]) is type(data[1])
+
+        data = json_utils.iter_json_array(
+            io.StringIO(TEXT), cls=json_utils.CompactDecoder, records="tuple"
+        )
+        assert next(data).name == "Stelvio"
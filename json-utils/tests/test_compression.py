@@ -0,0 +1,96 @@
+import gzip
+import json
+import lzma
+import zlib
+from datetime import datetime
+
+import pytest
+
+import json_utils
+
+DATA = [
+    {"id": i, "date": datetime(2025, 1, 1), "name": "Stelvio è"} for i in range(5000)
+]
+EXPECTED = json.loads(json_utils.to_json_string(DATA))
+
+
+class TestDumpAndLoadJsonFile:
+    @pytest.mark.parametrize(
+        "filename, magic",
+        [
+            ("data.json", b"[{"),
+            ("data.json.gz", b"\x1f\x8b"),
+            ("data.json.zz", b"\x78"),
+            ("data.json.xz", b"\xfd7zXZ"),
+        ],
+    )
+    def test_happy_flow(self, tmp_path, filename, magic):
+        path = tmp_path / filename
+        json_utils.dump_json_file(DATA, path)
+        assert path.read_bytes().startswith(magic)
+        assert json_utils.load_json_file(path) == EXPECTED
+
+    def test_compressed_with_std_libs(self, tmp_path):
+        text = json_utils.to_json_string(DATA).encode()
+        for compress in (gzip.compress, zlib.compress, lzma.compress):
+            # The extension does not matter on read.
+            path = tmp_path / "data.json"
+            path.write_bytes(compress(text))
+            assert json_utils.load_json_file(path) == EXPECTED
+
+    def test_explicit_compression(self, tmp_path):
+        path = tmp_path / "data.json"
+        json_utils.dump_json_file(iter(DATA), path, compression="zlib", level=1)
+        assert json.loads(zlib.decompress(path.read_bytes())) == EXPECTED
+        assert json_utils.load_json_file(path, compression="zlib") == EXPECTED
+
+    def test_invalid_compression(self, tmp_path):
+        with pytest.raises(ValueError):
+            json_utils.dump_json_file(DATA, tmp_path / "data.json", compression="zip")
+
+    @pytest.mark.parametrize("text", ["80", "80.5e3\n", "[80]", "8"])
+    def test_not_compressed(self, tmp_path, text):
+        path = tmp_path / "data.json"
+        path.write_text(text)
+        assert json_utils.load_json_file(path) == json.loads(text)
+
+    def test_zlib_window_sizes(self, tmp_path):
+        path = tmp_path / "data.json"
+        text = json_utils.to_json_string(DATA).encode()
+        for wbits in range(9, 16):
+            compressor = zlib.compressobj(wbits=wbits)
+            path.write_bytes(compressor.compress(text) + compressor.flush())
+            assert json_utils.load_json_file(path) == EXPECTED
+
+    def test_truncated_zlib(self, tmp_path):
+        path = tmp_path / "data.json"
+        path.write_bytes(zlib.compress(json_utils.to_json_string(DATA).encode())[:-100])
+        with pytest.raises(EOFError):
+            json_utils.load_json_file(path)
+
+
+class TestOpenJsonFile:
+    @pytest.mark.parametrize("compression", ["gzip", "zlib", "lzma", None])
+    def test_ndjson(self, tmp_path, compression):
+        path = tmp_path / "data.ndjson"
+        with json_utils.open_json_file(path, "w", compression) as fp:
+            json_utils.dump_ndjson(iter(DATA), fp)
+        with json_utils.open_json_file(path) as fp:
+            assert list(json_utils.iter_ndjson(fp)) == EXPECTED
+
+    @pytest.mark.parametrize("compression", ["gzip", "zlib", "lzma", None])
+    def test_iter_json_array(self, tmp_path, compression):
+        path = tmp_path / "data.json"
+        json_utils.dump_json_file(DATA, path, compression)
+        with json_utils.open_json_file(path) as fp:
+            assert list(json_utils.iter_json_array(fp)) == EXPECTED
+
+    def test_append(self, tmp_path):
+        path = tmp_path / "data.ndjson.gz"
+        for record in DATA[:3]:
+            with json_utils.open_json_file(path, "a") as fp:
+                json_utils.dump_ndjson([record], fp)
+        with json_utils.open_json_file(path) as fp:
+            assert list(json_utils.iter_ndjson(fp)) == EXPECTED[:3]
+        with pytest.raises(ValueError):
+            json_utils.open_json_file(tmp_path / "data.ndjson.zz", "a")
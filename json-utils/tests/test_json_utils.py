@@ -1,5 +1,11 @@
+import dataclasses
+import enum
 import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime
+from uuid import UUID
 
 import pytest
 
@@ -13,6 +19,108 @@ class TestToJsonString:
             json.dumps(data)
         assert json_utils.to_json_string(data)
 
+    def test_same_as_json_dumps(self):
+        data = {"b": [1, 2.5, None, True], "a": {"x": "à"}}
+        for kwargs in ({}, {"indent": 4}, {"separators": [",", ":"]}):
+            assert json_utils.to_json_string(
+                data, sort_keys=True, **kwargs
+            ) == json.dumps(data, sort_keys=True, **kwargs)
+
+    def test_backend_auto(self):
+        pytest.importorskip("orjson")
+        data = {
+            "date": datetime(2025, 1, 1, 10, 30),
+            "uuid": UUID("12345678-1234-5678-1234-567812345678"),
+            "bytes": b"xyz",
+            "text": "Passo dello Stelvio è",
+            "numbers": [1, -2.5, 0.1, None, True, [], {}],
+        }
+        for kwargs in (
+            dict(separators=(",", ":"), ensure_ascii=False),
+            dict(indent=2, ensure_ascii=False),
+        ):
+            for sort_keys in (False, True):
+                assert json_utils.to_json_string(
+                    data, sort_keys=sort_keys, backend="auto", **kwargs
+                ) == json_utils.to_json_string(data, sort_keys=sort_keys, **kwargs)
+
+    def test_backend_auto_fallback(self):
+        # Not supported by orjson: int keys, big ints and floats formatted
+        #  differently (exponents and < 1e-4).
+        for data in ({1: "a"}, [2**70], [1e16, 1e-7], {"a": 1e-5}, 1e16, -1e-5):
+            assert json_utils.to_json_string(
+                data, separators=(",", ":"), ensure_ascii=False, backend="auto"
+            ) == json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        # Not supported kwargs.
+        assert json_utils.to_json_string([1], indent=4, backend="auto") == json.dumps(
+            [1], indent=4
+        )
+
+    def test_float_mismatch(self):
+        has_float_mismatch = json_utils.json_utils._has_float_mismatch
+        for result in (b"0.00001", b"[1.5e-7]", b'{"a":-3e-9}', b'{\n  "a": 3e-9\n}'):
+            assert has_float_mismatch(result)
+        # Exponents in strings: in words and in the hex digits of a UUID.
+        for result in (
+            b'"e-mail"',
+            b'["12345678-12e4-5e67-12e-4-123456789012"]',
+            b'{"key_1e":1.5}',
+        ):
+            assert not has_float_mismatch(result)
+
+    def test_backend_auto_registered_handler(self, monkeypatch):
+        pytest.importorskip("orjson")
+        module = json_utils.json_utils
+        monkeypatch.setitem(module._TYPE_HANDLERS, UUID, lambda x: x.hex)
+        monkeypatch.setattr(module, "_handlers_cache", dict())
+        data = [UUID("12345678-1234-5678-1234-567812345678")]
+        assert (
+            json_utils.to_json_string(
+                data, separators=(",", ":"), ensure_ascii=False, backend="auto"
+            )
+            == '["12345678123456781234567812345678"]'
+        )
+
+    def test_backend_auto_nan_and_infinity(self):
+        pytest.importorskip("orjson")
+        for data in (
+            {"x": float("nan")},
+            [float("inf"), None],
+            Segment(1, 2, float("-inf")),
+        ):
+            assert json_utils.to_json_string(
+                data, backend="auto"
+            ) == json_utils.to_json_string(data)
+        # A null without floats: no fallback needed.
+        assert json_utils.to_json_string({"x": None}, backend="auto") == '{"x": null}'
+
+    def test_backend_auto_enum(self):
+        pytest.importorskip("orjson")
+
+        class Color(enum.Enum):
+            RED = 1
+
+        class Size(enum.IntEnum):
+            SMALL = 1
+
+        for data in (
+            {"e": Color.RED},
+            [[Color.RED]],
+            OrderedDict(e=Color.RED),
+            Segment(1, 2, Color.RED),
+        ):
+            with pytest.raises(TypeError):
+                json_utils.to_json_string(data)
+            with pytest.raises(TypeError):
+                json_utils.to_json_string(data, backend="auto")
+        assert json_utils.to_json_string({"e": Size.SMALL}, backend="auto") == (
+            json_utils.to_json_string({"e": Size.SMALL})
+        )
+
+    def test_invalid_backend(self):
+        with pytest.raises(ValueError):
+            json_utils.to_json_string([1], backend="xyz")
+
 
 class TestPrettifyToNonJsonString:
     def test_happy_flow(self):
@@ -36,3 +144,187 @@ class TestCustomJsonEncoder:
         with pytest.raises(TypeError):
             json.dumps(data)
         assert json.dumps(data, cls=json_utils.CustomJsonEncoder)
+
+    def test_to_dict(self):
+        class Point:
+            def to_dict(self):
+                return {"lat": 1.0}
+
+        assert json.dumps(Point(), cls=json_utils.CustomJsonEncoder) == '{"lat": 1.0}'
+
+    def test_subclass(self):
+        class MyDatetime(datetime):
+            pass
+
+        data = [MyDatetime(2025, 1, 1)]
+        assert json.dumps(data, cls=json_utils.CustomJsonEncoder) == (
+            '["2025-01-01T00:00:00"]'
+        )
+
+    def test_unknown_type(self):
+        with pytest.raises(TypeError):
+            json.dumps(object(), cls=json_utils.CustomJsonEncoder)
+
+
+class TestRegisterTypeHandler:
+    def test_happy_flow(self):
+        class Point:
+            def __init__(self, lat, lon):
+                self.lat = lat
+                self.lon = lon
+
+        with pytest.raises(TypeError):
+            json_utils.to_json_string(Point(1, 2))
+        json_utils.register_type_handler(Point, lambda obj: [obj.lat, obj.lon])
+        assert json_utils.to_json_string({"p": Point(1, 2)}) == '{"p": [1, 2]}'
+
+
+@dataclass
+class Activity:
+    id: int
+    start: datetime
+    uuid: UUID | None = None
+    tags: list = field(default_factory=list)
+
+
+@dataclass
+class Segment:
+    name: str
+    activity: Activity
+    parent: "Segment | None" = None
+
+
+class TestCompileSerializer:
+    def test_dataclass(self):
+        activity = Activity(1, datetime(2025, 1, 1), tags=["a"])
+        assert json_utils.to_json_string(activity) == (
+            '{"id": 1, "start": "2025-01-01T00:00:00", "uuid": null, "tags": ["a"]}'
+        )
+
+    def test_nested(self):
+        activity = Activity(1, datetime(2025, 1, 1))
+        segment = Segment("Stelvio", activity, Segment("Bormio", activity))
+        assert json.loads(json_utils.to_json_string(segment)) == json.loads(
+            json_utils.to_json_string(dataclasses.asdict(segment))
+        )
+
+    def test_wrong_annotation(self):
+        # The value is not a datetime, as annotated.
+        activity = Activity(1, "2025-01-01")
+        serialize = json_utils.compile_serializer(Activity)
+        assert serialize(activity)["start"] == "2025-01-01"
+
+    def test_to_dict_precedence(self):
+        @dataclass
+        class Point:
+            lat: float
+
+            def to_dict(self):
+                return {"latitude": self.lat}
+
+        assert json_utils.to_json_string(Point(1.0)) == '{"latitude": 1.0}'
+        json_utils.register_type_handler(Point, json_utils.compile_serializer(Point))
+        assert json_utils.to_json_string(Point(1.0)) == '{"lat": 1.0}'
+
+    def test_not_a_model(self):
+        with pytest.raises(TypeError):
+            json_utils.compile_serializer(object)
+
+    def test_pydantic(self):
+        pydantic = pytest.importorskip("pydantic")
+
+        class Model(pydantic.BaseModel):
+            id: int
+            start: datetime
+            activity: Activity | None = None
+
+        model = Model(id=1, start=datetime(2025, 1, 1), activity=Activity(2, None))
+        assert json.loads(json_utils.to_json_string(model)) == json.loads(
+            model.model_dump_json()
+        )
+
+    def test_pydantic_exclude(self):
+        pydantic = pytest.importorskip("pydantic")
+
+        class Model(pydantic.BaseModel):
+            id: int
+            secret: str = pydantic.Field(exclude=True)
+
+        model = Model(id=1, secret="s3cr3t")
+        assert json_utils.to_json_string(model) == '{"id": 1}'
+
+    def test_pydantic_field_serializer(self):
+        pydantic = pytest.importorskip("pydantic")
+
+        class Model(pydantic.BaseModel):
+            id: int
+            start: datetime
+
+            @pydantic.field_serializer("start")
+            def serialize_start(self, value):
+                return "CUSTOM"
+
+        model = Model(id=1, start=datetime(2025, 1, 1))
+        assert json_utils.to_json_string(model) == '{"id": 1, "start": "CUSTOM"}'
+
+    def test_pydantic_model_serializer(self):
+        pydantic = pytest.importorskip("pydantic")
+
+        class Model(pydantic.BaseModel):
+            id: int
+
+            @pydantic.model_serializer
+            def serialize(self):
+                return {"identifier": self.id}
+
+        assert json_utils.to_json_string(Model(id=1)) == '{"identifier": 1}'
+
+    def test_concurrent_compilation(self, monkeypatch):
+        @dataclass
+        class Point:
+            lat: float
+
+        handlers_in_other_thread = []
+        get_fields = json_utils.json_utils._get_fields
+
+        def get_handler():
+            handlers_in_other_thread.append(json_utils.json_utils._get_handler(Point))
+
+        def _get_fields(cls):
+            if threading.current_thread() is threading.main_thread():
+                # Another thread asks for the handler while the class is compiling.
+                thread = threading.Thread(target=get_handler)
+                thread.start()
+                thread.join()
+            return get_fields(cls)
+
+        monkeypatch.setattr(json_utils.json_utils, "_get_fields", _get_fields)
+        assert json_utils.to_json_string(Point(1.0)) == '{"lat": 1.0}'
+        assert handlers_in_other_thread[0](Point(2.0)) == {"lat": 2.0}
+
+    def test_peewee(self):
+        peewee = pytest.importorskip("peewee")
+
+        db = peewee.SqliteDatabase(":memory:")
+
+        class Athlete(peewee.Model):
+            name = peewee.CharField()
+
+            class Meta:
+                database = db
+
+        class Ride(peewee.Model):
+            athlete = peewee.ForeignKeyField(Athlete)
+            start = peewee.DateTimeField()
+
+            class Meta:
+                database = db
+
+        db.create_tables([Athlete, Ride])
+        athlete = Athlete.create(name="Marco")
+        ride = Ride.create(athlete=athlete, start=datetime(2025, 1, 1))
+        assert json.loads(json_utils.to_json_string(ride)) == {
+            "id": ride.id,
+            "athlete": athlete.id,
+            "start": "2025-01-01T00:00:00",
+        }
@@ -0,0 +1,89 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+import json_utils
+
+DATA = {
+    "athlete": {"id": 123, "name": 'Marco "[{" è'},
+    "streams": {
+        "latlng": [[46.5, 10.4], [46.6, 10.5]],
+        "deep": [[[[[[1, "]"]]]]], {"a": [{"b": [{"c": [{}]}]}]}],
+    },
+    "laps": [{"n": 1, "tags": ["a", "}"]}, {"n": 2, "tags": []}],
+    "empty": {},
+    "count": 2,
+    "ratio": 1.5,
+    "flag": None,
+}
+TEXT = json.dumps(DATA, indent=2, ensure_ascii=False)
+
+
+class TestLazyJson:
+    def test_happy_flow(self):
+        doc = json_utils.LazyJson(TEXT)
+        assert doc["athlete"]["id"] == 123
+        assert doc["athlete"]["name"] == DATA["athlete"]["name"]
+        assert doc["laps"][1]["n"] == 2
+        assert doc["laps"][-1]["tags"].to_python() == []
+        assert doc["count"] == 2
+        assert doc["flag"] is None
+        assert doc.to_python() == DATA
+
+    def test_whole_tree(self):
+        def to_python(value):
+            if isinstance(value, json_utils.LazyJson):
+                if value.is_object:
+                    return {k: to_python(v) for k, v in value.items()}
+                return [to_python(x) for x in value]
+            return value
+
+        for text in (TEXT, json.dumps(DATA), json.dumps(DATA).encode()):
+            assert to_python(json_utils.LazyJson(text)) == DATA
+
+    def test_lazy_scan(self):
+        # The invalid part after "a" is never scanned.
+        doc = json_utils.LazyJson('{"a": {"b": 1}, "c": [xxx')
+        assert doc["a"]["b"] == 1
+        with pytest.raises(json.JSONDecodeError):
+            doc["c"]
+
+    def test_dict_api(self):
+        doc = json_utils.LazyJson(TEXT)
+        assert "count" in doc
+        assert "xxx" not in doc
+        assert doc.get("xxx") is None
+        assert list(doc) == list(doc.keys()) == list(DATA)
+        assert len(doc) == len(DATA)
+        assert len(doc["empty"]) == 0
+        with pytest.raises(KeyError):
+            doc["xxx"]
+        with pytest.raises(IndexError):
+            doc["laps"][2]
+        assert doc["laps"][0:1][0]["n"] == 1
+
+    def test_array(self):
+        doc = json_utils.LazyJson(b" [1, [2], {}] ")
+        assert not doc.is_object
+        assert doc[0] == 1
+        assert doc[1] == [2]
+        assert doc[2] == {}
+
+    def test_to_json(self):
+        doc = json_utils.LazyJson(TEXT)
+        assert json_utils.to_json_string(
+            {"x": doc["laps"]}
+        ) == json_utils.to_json_string({"x": DATA["laps"]})
+
+    def test_kwargs(self):
+        doc = json_utils.LazyJson('{"a": {"b": 1.1}}', parse_float=Decimal)
+        assert doc["a"]["b"] == Decimal("1.1")
+
+    def test_invalid(self):
+        with pytest.raises(json.JSONDecodeError):
+            json_utils.LazyJson("123")
+        with pytest.raises(json.JSONDecodeError):
+            json_utils.LazyJson('{"a" 1}')["a"]
+        with pytest.raises(json.JSONDecodeError):
+            json_utils.LazyJson('{"a": [[1]}')["a"]
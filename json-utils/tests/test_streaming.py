@@ -0,0 +1,176 @@
+import io
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+import json_utils
+
+RECORDS = [
+    {"id": 1, "date": datetime(2025, 1, 1), "tags": ["a", "b"]},
+    {"id": 2, "date": datetime(2025, 1, 2), "tags": [], "nested": {"x": [1, {}]}},
+    {"id": 3, "text": "line 1\nline 2"},
+]
+
+
+class TestDumpStream:
+    def test_happy_flow(self):
+        fp = io.StringIO()
+        json_utils.dump_stream({"records": RECORDS}, fp, buffer_size=10)
+        assert fp.getvalue() == json_utils.to_json_string({"records": RECORDS})
+
+    def test_generator(self):
+        for kwargs in ({}, {"indent": 4}, {"indent": "\t"}, {"sort_keys": True}):
+            fp = io.StringIO()
+            json_utils.dump_stream((x for x in RECORDS), fp, **kwargs)
+            assert fp.getvalue() == json_utils.to_json_string(RECORDS, **kwargs)
+
+    def test_empty_generator(self):
+        for kwargs in ({}, {"indent": 4}):
+            fp = io.StringIO()
+            json_utils.dump_stream(iter([]), fp, **kwargs)
+            assert fp.getvalue() == "[]"
+
+    def test_buffered_writes(self):
+        class File(io.StringIO):
+            n_writes = 0
+
+            def write(self, text):
+                self.n_writes += 1
+                return super().write(text)
+
+        fp = File()
+        json_utils.dump_stream(iter(RECORDS * 100), fp, buffer_size=1000)
+        assert 1 < fp.n_writes < len(fp.getvalue()) / 1000 + 2
+
+
+class TestNdjson:
+    def test_happy_flow(self):
+        fp = io.StringIO()
+        assert json_utils.dump_ndjson((x for x in RECORDS), fp) == len(RECORDS)
+        lines = fp.getvalue().splitlines()
+        assert len(lines) == len(RECORDS)
+
+        fp.seek(0)
+        records = list(json_utils.iter_ndjson(fp))
+        assert records == json.loads(json_utils.to_json_string(RECORDS))
+
+    def test_read_bytes_and_blank_lines(self):
+        fp = io.BytesIO(b'{"a": 1}\n\n  \n{"a": 2}\n')
+        assert list(json_utils.iter_ndjson(fp)) == [{"a": 1}, {"a": 2}]
+
+    def test_invalid_line(self):
+        fp = io.StringIO('{"a": 1}\n{"a": \n')
+        with pytest.raises(json.JSONDecodeError, match="line 2"):
+            list(json_utils.iter_ndjson(fp))
+
+    def test_indent(self):
+        with pytest.raises(ValueError):
+            json_utils.dump_ndjson(RECORDS, io.StringIO(), indent=2)
+
+
+class TestIterJsonArray:
+    def test_happy_flow(self):
+        text = json_utils.to_json_string(RECORDS, indent=2)
+        for chunk_size in (1, 7, 1000):
+            items = json_utils.iter_json_array(io.StringIO(text), chunk_size=chunk_size)
+            assert list(items) == json.loads(text)
+
+    def test_bytes(self):
+        data = ["Passo dello Stelvio è", 12345, -1.5e-7, True, None, {"a": "à"}]
+        text = json.dumps(data, ensure_ascii=False)
+        for chunk_size in (1, 3, 1000):
+            fp = io.BytesIO(text.encode())
+            items = json_utils.iter_json_array(fp, chunk_size=chunk_size)
+            assert list(items) == data
+
+    def test_numbers_across_chunks(self):
+        data = [1.5e10, 12.25, -0.5, 1e-7, 3, -12, 0.1 + 0.2] * 20
+        text = json.dumps(data)
+        for chunk_size in range(1, 51):
+            items = json_utils.iter_json_array(io.StringIO(text), chunk_size=chunk_size)
+            assert list(items) == data
+
+    def test_path(self):
+        data = {
+            "meta": {"skip": ["]", "}", '"\\"[', {"x": [[], {}]}], "n": 1},
+            "count": 2,
+            "data": {"other": "x", "items": [{"id": 1}, {"id": 2}]},
+        }
+        text = json.dumps(data)
+        for chunk_size in (1, 5, 1000):
+            items = json_utils.iter_json_array(
+                io.StringIO(text), path="data.items", chunk_size=chunk_size
+            )
+            assert list(items) == [{"id": 1}, {"id": 2}]
+
+    def test_path_not_found(self):
+        with pytest.raises(KeyError):
+            list(json_utils.iter_json_array(io.StringIO('{"a": []}'), path="b"))
+        with pytest.raises(KeyError):
+            list(json_utils.iter_json_array(io.StringIO("{}"), path="b"))
+
+    def test_lazy(self):
+        items = json_utils.iter_json_array(io.StringIO('[{"a": 1}, {"a": 2}, xxx'))
+        assert next(items) == {"a": 1}
+        assert next(items) == {"a": 2}
+        with pytest.raises(json.JSONDecodeError):
+            next(items)
+
+    def test_empty(self):
+        assert list(json_utils.iter_json_array(io.StringIO(" [ ] "))) == []
+
+    def test_not_an_array(self):
+        with pytest.raises(json.JSONDecodeError):
+            list(json_utils.iter_json_array(io.StringIO('{"a": 1}')))
+
+    def test_parse_datetimes_and_decimals(self):
+        text = json_utils.to_json_string(RECORDS + [{"x": "2025-01-01T10:00:00Z"}])
+        items = list(
+            json_utils.iter_json_array(
+                io.StringIO(text), parse_datetimes=True, parse_decimals=True
+            )
+        )
+        assert items[0]["date"] == datetime(2025, 1, 1)
+        assert items[3]["x"] == datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+
+        # Short fractions (not supported by fromisoformat() on Python 3.10) and
+        #  invalid dates (kept as strings).
+        text = '["2025-01-01T10:00:00.5", "2025-01-01T10:00:00.12Z", "2025-02-30T10:00:00"]'
+        items = list(
+            json_utils.iter_json_array(io.StringIO(text), parse_datetimes=True)
+        )
+        assert items == [
+            datetime(2025, 1, 1, 10, 0, 0, 500000),
+            datetime(2025, 1, 1, 10, 0, 0, 120000, tzinfo=timezone.utc),
+            "2025-02-30T10:00:00",
+        ]
+
+        items = json_utils.iter_json_array(io.StringIO("[1.1]"), parse_decimals=True)
+        assert list(items) == [Decimal("1.1")]
+
+
+class TestPrettify:
+    # Escapes at every offset, so they cross the chunk boundaries.
+    TEXT = '{"msg": "a\\nb\\u00a0c \\"d\\" \\\\n è\\u00a0\\n"}\n' * 5
+
+    def test_stream(self):
+        expected = json_utils.prettify_to_non_json_string(self.TEXT)
+        for chunk_size in range(1, 8):
+            dst = io.StringIO()
+            json_utils.prettify_stream(io.StringIO(self.TEXT), dst, chunk_size)
+            assert dst.getvalue() == expected
+
+            dst = io.BytesIO()
+            json_utils.prettify_stream(io.BytesIO(self.TEXT.encode()), dst, chunk_size)
+            assert dst.getvalue() == expected.encode()
+
+    def test_file(self, tmp_path):
+        src_path = tmp_path / "logs.json"
+        src_path.write_text(self.TEXT * 100, encoding="utf-8")
+        expected = json_utils.prettify_to_non_json_string(self.TEXT * 100)
+        for workers in (1, 2):
+            dst_path = tmp_path / f"logs-{workers}.txt"
+            json_utils.prettify_file(src_path, dst_path, workers, chunk_size=100)
+            assert dst_path.read_text(encoding="utf-8") == expected